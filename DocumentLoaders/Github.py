@@ -1,14 +1,26 @@
+import asyncio
+import base64
 import os
 from typing import List, Optional, Callable
+from urllib.parse import quote
 
+import requests
 from dotenv import load_dotenv
 from langchain_community.document_loaders import GithubFileLoader
 from langchain.schema import Document
 import streamlit as st
 
+from DocumentLoaders.RepoMirror import get_repo_mirror
+from Utilities.GetHttpClient import get_async_http_client
+from Utilities.Telemetry import requests_hook
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Shared HTTP session so single-file requests reuse the TLS connection to GitHub
+_session = requests.Session()
+_session.hooks["response"].append(requests_hook("github"))
+
 
 class GitHubLoader:
     """
@@ -48,6 +60,10 @@ class GitHubLoader:
     ) -> List[Document]:
         """Loads a single file from the GitHub repository, optionally applying a file filter."""
 
+        # ✅ Serve from the local mirror when it is enabled
+        if mirror := get_repo_mirror(self.repo, self.branch):
+            return mirror.load_files(file_filter)
+
         loader = GithubFileLoader(
             repo=self.repo,
             branch=self.branch,
@@ -56,3 +72,137 @@ class GitHubLoader:
             file_filter=file_filter,
         )
         return loader.load()
+
+    def load_file(self, file_path: str) -> Optional[Document]:
+        """
+        Loads a single file by its exact path with one request to the contents API,
+        instead of listing the whole repository tree and filtering it.
+
+        Args:
+            file_path: The exact path of the file inside the repository.
+
+        Returns:
+            The Document for the file, or None if the file does not exist.
+        """
+        if not file_path:
+            raise ValueError("`file_path` cannot be empty.")
+
+        if mirror := get_repo_mirror(self.repo, self.branch):
+            return mirror.load_file(file_path)
+
+        file_info = self._file_info(_session.get(**self._contents_request(file_path)))
+        if file_info is None:
+            return None
+
+        content = self._inline_content(file_info)
+        if content is None:
+            content = self._raw_content(_session.get(**self._raw_request(file_path)))
+
+        return self._to_document(file_info, content)
+
+    async def aload_file(self, file_path: str) -> Optional[Document]:
+        """Async version of `load_file`, using the shared non-blocking HTTP client."""
+        if not file_path:
+            raise ValueError("`file_path` cannot be empty.")
+
+        # The first use of a mirror clones the repository, which must not block the event loop
+        if mirror := await asyncio.to_thread(get_repo_mirror, self.repo, self.branch):
+            return await asyncio.to_thread(mirror.load_file, file_path)
+
+        client = get_async_http_client()
+
+        file_info = self._file_info(await client.get(**self._contents_request(file_path)))
+        if file_info is None:
+            return None
+
+        content = self._inline_content(file_info)
+        if content is None:
+            content = self._raw_content(await client.get(**self._raw_request(file_path)))
+
+        return self._to_document(file_info, content)
+
+    # ✅ The request and response handling below is shared by `load_file` and `aload_file`;
+    # `requests` and `httpx` responses have the same `status_code`, `raise_for_status`, `json` and `content`
+
+    def _contents_request(self, file_path: str) -> dict:
+        return {
+            "url": self._contents_url(file_path),
+            "headers": self._headers(),
+            "params": {"ref": self.branch},
+            "timeout": 30,
+        }
+
+    def _raw_request(self, file_path: str) -> dict:
+        # Files above 1 MB are not inlined by the contents API, the raw blob is fetched instead
+        return {
+            "url": self._contents_url(file_path),
+            "headers": {**self._headers(), "Accept": "application/vnd.github.raw"},
+            "params": {"ref": self.branch},
+            "timeout": 60,
+        }
+
+    @staticmethod
+    def _file_info(response) -> Optional[dict]:
+        """The file metadata of a contents API response, or None if the path is not a file."""
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        file_info = response.json()
+        if isinstance(file_info, list) or file_info.get("type") != "file":
+            # The path points to a directory or a submodule
+            return None
+        return file_info
+
+    @staticmethod
+    def _inline_content(file_info: dict) -> Optional[str]:
+        """The file content inlined in the contents API response, or None if it is too large."""
+        if file_info.get("encoding") == "base64" and file_info.get("content"):
+            return base64.b64decode(file_info["content"]).decode("utf-8")
+        return None
+
+    @staticmethod
+    def _raw_content(response) -> str:
+        response.raise_for_status()
+        return response.content.decode("utf-8")
+
+    def _contents_url(self, file_path: str) -> str:
+        return f"{self.github_api_url}/repos/{self.repo}/contents/{quote(file_path)}"
+
+    def _headers(self) -> dict:
+        return {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.github_token}",
+        }
+
+    def _to_document(self, file_info: dict, content: str) -> Document:
+        return Document(
+            page_content=content,
+            metadata={
+                "path": file_info["path"],
+                "sha": file_info["sha"],
+                "source": f"{self.github_api_url}/{self.repo}/blob/{self.branch}/{file_info['path']}",
+            },
+        )
+
+    def get_tree(self, tree_ish: Optional[str] = None, recursive: bool = False) -> dict:
+        """
+        Lists a git tree of the repository with a single request to the git trees API.
+
+        Args:
+            tree_ish: A tree SHA, or a branch name. Defaults to the loader's branch.
+            recursive: Whether to list all nested entries instead of the direct children only.
+
+        Returns:
+            The tree as returned by GitHub: {"sha": ..., "tree": [{"path", "type", "sha", "size"}, ...], "truncated": ...}
+        """
+        if mirror := get_repo_mirror(self.repo, self.branch):
+            return mirror.get_tree(tree_ish if tree_ish != self.branch else None, recursive)
+
+        url = f"{self.github_api_url}/repos/{self.repo}/git/trees/{quote(tree_ish or self.branch, safe='')}"
+
+        response = _session.get(
+            url, headers=self._headers(), params={"recursive": 1} if recursive else None, timeout=60
+        )
+        response.raise_for_status()
+        return response.json()
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import List, Optional, Callable
 
@@ -6,6 +7,10 @@ from langchain_community.document_loaders import GithubFileLoader
 from langchain.schema import Document
 import streamlit as st
 
+from DocumentLoaders.Github import GitHubLoader
+from DocumentLoaders.RepoMirror import get_repo_mirror
+from DocumentLoaders.SourceCache import get_source_cache
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -35,6 +40,10 @@ def load_github_files(
     if not repo:
         raise ValueError("`repo` cannot be empty.")
 
+    # ✅ Serve from the local mirror when it is enabled
+    if mirror := get_repo_mirror(repo, branch):
+        return mirror.load_files(file_filter)
+
     loader = GithubFileLoader(
         repo=repo,
         branch=branch,
@@ -43,3 +52,101 @@ def load_github_files(
         file_filter=file_filter,
     )
     return loader.load()
+
+
+def load_github_file(
+    repo: str,
+    file_path: str,
+    branch: str = "main",
+    github_token: str = st.secrets["CISCO_GITHUB_TOKEN"],
+    github_api_url: str = "https://api.github.com",
+    sha: Optional[str] = None,
+) -> Optional[Document]:
+    """
+    Loads a single file from a GitHub repository, served from the source cache when possible.
+
+    Args:
+        repo: The GitHub repository in "owner/repo" format.
+        file_path: The exact path of the file inside the repository.
+        branch: The branch to load from (default: "main").
+        github_token: GitHub personal access token.
+        github_api_url: The base URL for the GitHub API (default: public GitHub API).
+        sha: The current blob SHA of the file, if known. A cached copy is only used when it matches.
+
+    Returns:
+        The Document for the file, or None if the file does not exist.
+    """
+    if not repo:
+        raise ValueError("`repo` cannot be empty.")
+
+    source_cache = get_source_cache()
+
+    # ✅ Serve repeated lookups from the cache instead of the GitHub API
+    cached = source_cache.get(repo, branch, file_path, sha=sha)
+    if cached:
+        return _cached_document(cached, repo, branch, github_api_url)
+
+    # ✅ Fetch the known path directly, no need to list the whole repository tree
+    document = GitHubLoader(
+        repo=repo,
+        branch=branch,
+        github_token=github_token,
+        github_api_url=github_api_url,
+    ).load_file(file_path)
+
+    if not document:
+        return None
+
+    source_cache.put(
+        repo, branch, file_path, document.page_content, sha=document.metadata.get("sha")
+    )
+    return document
+
+
+async def aload_github_file(
+    repo: str,
+    file_path: str,
+    branch: str = "main",
+    github_token: str = st.secrets["CISCO_GITHUB_TOKEN"],
+    github_api_url: str = "https://api.github.com",
+    sha: Optional[str] = None,
+) -> Optional[Document]:
+    """
+    Async version of `load_github_file`. Cache disk I/O runs in a worker thread and the
+    GitHub request goes through the shared non-blocking HTTP client.
+    """
+    if not repo:
+        raise ValueError("`repo` cannot be empty.")
+
+    source_cache = get_source_cache()
+
+    cached = await asyncio.to_thread(source_cache.get, repo, branch, file_path, sha)
+    if cached:
+        return _cached_document(cached, repo, branch, github_api_url)
+
+    document = await GitHubLoader(
+        repo=repo,
+        branch=branch,
+        github_token=github_token,
+        github_api_url=github_api_url,
+    ).aload_file(file_path)
+
+    if not document:
+        return None
+
+    await asyncio.to_thread(
+        source_cache.put,
+        repo, branch, file_path, document.page_content, document.metadata.get("sha"),
+    )
+    return document
+
+
+def _cached_document(cached, repo: str, branch: str, github_api_url: str) -> Document:
+    return Document(
+        page_content=cached.content,
+        metadata={
+            "path": cached.path,
+            "sha": cached.sha,
+            "source": f"{github_api_url}/{repo}/blob/{branch}/{cached.path}",
+        },
+    )
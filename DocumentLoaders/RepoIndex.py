@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from DocumentLoaders.Github import GitHubLoader
+from Utilities.AbapPatterns import ABAP_FILE_NAME
+from Utilities.GetConfig import get_setting, get_float_setting
+
+# The file holding the source of an object wins over its XML metadata
+_EXTENSION_PRIORITY = {"abap": 0, "asddls": 0, "acds": 0, "xml": 1}
+
+
+class IndexEntry(NamedTuple):
+    """A single ABAP object of the repository."""
+
+    path: str
+    object_type: str
+    sha: str
+    size: int
+
+
+def parse_abap_file_name(file_path: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Splits an abapGit file path into (object name, object type, extension).
+
+    Returns:
+        The lower-case object name with its namespace restored, or None for files that are
+        not the main file of an ABAP object (e.g. `*.clas.locals_imp.abap`).
+    """
+    match = ABAP_FILE_NAME.match(file_path.rsplit("/", 1)[-1])
+    if not match:
+        return None
+    return match["name"].replace("#", "/").lower(), match["type"], match["ext"]
+
+
+class RepoIndex:
+    """
+    An in-memory index of the ABAP objects of one branch: object name -> path, type, blob SHA, size.
+
+    The index is built once from the git trees API and refreshed incrementally: the root tree
+    is re-read at most every `refresh_interval` seconds and only the top-level folders whose
+    tree SHA changed are listed again. Lookups in between never touch the network.
+    """
+
+    def __init__(
+        self,
+        repo: str,
+        branch: str = "main",
+        github_token: Optional[str] = None,
+        github_api_url: str = "https://api.github.com",
+        refresh_interval: float = 60,
+    ):
+        """
+        Initializes the RepoIndex.
+
+        Args:
+            repo: The GitHub repository in "owner/repo" format.
+            branch: The branch to index (default: "main").
+            github_token: GitHub personal access token. Defaults to `CISCO_GITHUB_TOKEN`.
+            github_api_url: The base URL for the GitHub API.
+            refresh_interval: Minimum number of seconds between two checks of the branch head.
+        """
+        if not repo:
+            raise ValueError("`repo` cannot be empty.")
+
+        self.repo = repo
+        self.branch = branch
+        self.refresh_interval = refresh_interval
+        self.loader = GitHubLoader(
+            repo=repo,
+            branch=branch,
+            github_token=github_token or get_setting("CISCO_GITHUB_TOKEN"),
+            github_api_url=github_api_url,
+        )
+
+        self.root_sha: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        # (object name, object type) -> entry, plus the folder each key came from
+        self._entries: Dict[Tuple[str, str], IndexEntry] = {}
+        self._folders: Dict[str, Tuple[str, Dict[Tuple[str, str], IndexEntry]]] = {}
+
+    def lookup(self, object_name: str, object_type: str) -> Optional[IndexEntry]:
+        """
+        Finds an ABAP object in the index.
+
+        Args:
+            object_name: The object name, e.g. `ZCL_FOO` or `/ABC/CL_BAR`.
+            object_type: The abapGit object type, e.g. `clas`, `intf`, `tabl`, `prog`, `ddls`.
+
+        Returns:
+            The IndexEntry, or None if the branch does not contain the object.
+        """
+        self.ensure_fresh()
+        return self._entries.get((object_name.strip().lower(), object_type.strip().lower()))
+
+    async def alookup(self, object_name: str, object_type: str) -> Optional[IndexEntry]:
+        """Async version of `lookup`. A due refresh runs in a worker thread so the event loop is never blocked."""
+        if not self._is_fresh():
+            await asyncio.to_thread(self.ensure_fresh)
+        return self._entries.get((object_name.strip().lower(), object_type.strip().lower()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ensure_fresh(self) -> None:
+        """Refreshes the index if the last check of the branch head is older than the refresh interval."""
+        if self._is_fresh():
+            return
+
+        with self._lock:
+            if self._is_fresh():
+                return
+            try:
+                self.refresh()
+            except Exception as error:
+                if not self.root_sha:
+                    raise
+                # Keep serving the last known index while GitHub is unavailable
+                print(f"Refreshing the index of {self.repo}@{self.branch} failed: {error}")
+                self._checked_at = time.time()
+
+    def _is_fresh(self) -> bool:
+        return bool(self.root_sha) and time.time() - self._checked_at < self.refresh_interval
+
+    def refresh(self) -> None:
+        """Re-reads the root tree and re-lists only the folders whose tree SHA changed."""
+        root = self.loader.get_tree()
+        self._checked_at = time.time()
+
+        if root["sha"] == self.root_sha:
+            return
+
+        folders = {}
+        root_entries = {}
+
+        for item in root.get("tree", []):
+            if item["type"] == "tree":
+                known = self._folders.get(item["path"])
+                if known and known[0] == item["sha"]:
+                    folders[item["path"]] = known
+                else:
+                    folders[item["path"]] = (item["sha"], self._list_folder(item))
+            elif item["type"] == "blob":
+                self._add_entry(root_entries, item["path"], item)
+
+        folders[""] = (root["sha"], root_entries)
+
+        entries: Dict[Tuple[str, str], IndexEntry] = {}
+        for _, folder_entries in folders.values():
+            for key, entry in folder_entries.items():
+                self._merge_entry(entries, key, entry)
+
+        # ✅ Swap in the new index at once so concurrent lookups never see a partial one
+        self._folders = folders
+        self._entries = entries
+        self.root_sha = root["sha"]
+
+    def _list_folder(self, folder: dict) -> Dict[Tuple[str, str], IndexEntry]:
+        tree = self.loader.get_tree(folder["sha"], recursive=True)
+        if tree.get("truncated"):
+            print(f"Tree of '{folder['path']}' in {self.repo} was truncated by GitHub.")
+
+        folder_entries: Dict[Tuple[str, str], IndexEntry] = {}
+        for item in tree.get("tree", []):
+            if item["type"] == "blob":
+                self._add_entry(folder_entries, f"{folder['path']}/{item['path']}", item)
+        return folder_entries
+
+    def _add_entry(self, entries: dict, path: str, item: dict) -> None:
+        parsed = parse_abap_file_name(path)
+        if not parsed:
+            return
+        name, object_type, _ = parsed
+        self._merge_entry(
+            entries,
+            (name, object_type),
+            IndexEntry(path=path, object_type=object_type, sha=item["sha"], size=item.get("size", 0)),
+        )
+
+    @staticmethod
+    def _merge_entry(entries: dict, key: Tuple[str, str], entry: IndexEntry) -> None:
+        current = entries.get(key)
+        if current is None or _priority(entry.path) < _priority(current.path):
+            entries[key] = entry
+
+
+def _priority(path: str) -> int:
+    return _EXTENSION_PRIORITY.get(path.rsplit(".", 1)[-1], 2)
+
+
+_indexes: Dict[Tuple[str, str], RepoIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_repo_index(repo: str, branch: str = "main") -> RepoIndex:
+    """
+    Returns the process-wide index of a repository branch, creating it on first use.
+
+    The refresh interval is read from the `REPO_INDEX_REFRESH_SECONDS` setting (default: 60).
+    """
+    with _indexes_lock:
+        index = _indexes.get((repo, branch))
+        if index is None:
+            index = RepoIndex(
+                repo=repo,
+                branch=branch,
+                refresh_interval=get_float_setting("REPO_INDEX_REFRESH_SECONDS", 60),
+            )
+            _indexes[(repo, branch)] = index
+        return index
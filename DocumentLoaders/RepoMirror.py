@@ -0,0 +1,395 @@
+import base64
+import mmap
+import shutil
+import subprocess
+import tarfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+from langchain.schema import Document
+
+from Utilities.GetConfig import get_setting, get_bool_setting, get_float_setting
+
+
+class _Snapshot(NamedTuple):
+    """One synced commit of a branch, published as a whole so readers never mix two commits."""
+
+    files: Dict[str, Tuple[str, int]]  # path -> (blob SHA, size)
+    snapshot_dir: Path
+    commit: str
+
+
+class RepoMirror:
+    """
+    A local mirror of one branch of a GitHub repository.
+
+    The repository is kept as a bare clone that is synced by `git fetch` in a background
+    thread. Every synced commit is extracted once into a snapshot folder, and files are
+    served from that snapshot through memory-mapped reads, so tool calls never hit the
+    GitHub API. `remote_url` can point to any git URL, including a local stand-in repo.
+
+    The mirrors of several branches of one repository share its bare clone, and the lock
+    that serializes the fetches into it.
+    """
+
+    def __init__(
+        self,
+        repo: str,
+        branch: str = "main",
+        mirror_dir: str = ".cache/mirrors",
+        remote_url: Optional[str] = None,
+        github_token: Optional[str] = None,
+        github_api_url: str = "https://api.github.com",
+        sync_interval: float = 300,
+        retry_backoff: float = 30,
+    ):
+        """
+        Initializes the RepoMirror.
+
+        Args:
+            repo: The GitHub repository in "owner/repo" format.
+            branch: The branch to mirror (default: "main").
+            mirror_dir: Folder holding the bare clones and the extracted snapshots.
+            remote_url: Git URL to clone from. Defaults to the web host of `github_api_url`.
+            github_token: GitHub personal access token, sent as an HTTP header and never stored in the clone.
+            github_api_url: The base URL for the GitHub API, used to derive the clone URL.
+            sync_interval: Seconds between two background fetches.
+            retry_backoff: Seconds before a failed first sync is tried again (doubled on every failure).
+        """
+        if not repo:
+            raise ValueError("`repo` cannot be empty.")
+
+        self.repo = repo
+        self.branch = branch
+        self.remote_url = remote_url or _clone_url(repo, github_api_url)
+        self.github_token = github_token
+        self.github_api_url = github_api_url
+        self.sync_interval = sync_interval
+        self.retry_backoff = retry_backoff
+
+        safe_name = repo.replace("/", "__")
+        self.git_dir = Path(mirror_dir) / f"{safe_name}.git"
+        self.snapshot_root = Path(mirror_dir) / "snapshots" / safe_name / branch.replace("/", "__")
+
+        self._snapshot: Optional[_Snapshot] = None
+
+        self._sync_lock = _git_dir_lock(self.git_dir)
+        self._start_lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def commit(self) -> Optional[str]:
+        """The commit currently served."""
+        snapshot = self._snapshot
+        return snapshot.commit if snapshot else None
+
+    @property
+    def snapshot_dir(self) -> Optional[Path]:
+        """The folder of the commit currently served."""
+        snapshot = self._snapshot
+        return snapshot.snapshot_dir if snapshot else None
+
+    # ------------------------------------------------------------------ #
+    # Sync
+    # ------------------------------------------------------------------ #
+
+    def start(self) -> "RepoMirror":
+        """Syncs the mirror once (blocking) and starts the background sync thread."""
+        if not self.commit:
+            self.sync()
+
+        if self._thread is None and self.sync_interval > 0:
+            self._thread = threading.Thread(
+                target=self._sync_loop, name=f"mirror-{self.repo}@{self.branch}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def ensure_started(self) -> bool:
+        """
+        Starts the mirror on first use. A failed start is retried after a backoff, and until
+        then the callers fall back to the GitHub API instead of waiting on the clone.
+
+        Returns:
+            True if the mirror serves files.
+        """
+        if self.commit:
+            return True
+
+        with self._start_lock:
+            if self.commit:
+                return True
+            if time.monotonic() < self._retry_at:
+                return False
+            try:
+                self.start()
+            except Exception as error:
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(self.retry_backoff * 2 ** (self._failures - 1), 3600)
+                print(f"Starting the mirror of {self.repo}@{self.branch} failed: {error}")
+                return False
+            self._failures = 0
+            return True
+
+    def stop(self) -> None:
+        """Stops the background sync thread."""
+        self._stop.set()
+
+    def sync(self) -> bool:
+        """
+        Fetches the branch and extracts a new snapshot if the branch head moved.
+
+        Returns:
+            True if a new commit is now served, False if the mirror was already up to date.
+        """
+        with self._sync_lock:
+            if not (self.git_dir / "HEAD").exists():
+                self.git_dir.mkdir(parents=True, exist_ok=True)
+                self._git("init", "--bare", "--quiet")
+
+            self._git(
+                "fetch", "--quiet", "--prune", "--depth=1", self.remote_url,
+                f"+refs/heads/{self.branch}:refs/heads/{self.branch}",
+                authenticated=True,
+            )
+            commit = self._git("rev-parse", f"refs/heads/{self.branch}").strip()
+            if commit == self.commit:
+                return False
+
+            snapshot_dir = self.snapshot_root / commit
+            if not snapshot_dir.exists():
+                self._extract_snapshot(commit, snapshot_dir)
+
+            files = {}
+            for line in self._git("ls-tree", "-r", "-l", "-z", commit).split("\0"):
+                if not line:
+                    continue
+                info, path = line.split("\t", 1)
+                _, object_type, sha, size = info.split()
+                if object_type == "blob":
+                    files[path] = (sha, int(size))
+
+            # ✅ Readers switch to the new snapshot at once
+            self._snapshot = _Snapshot(files, snapshot_dir, commit)
+
+            self._remove_old_snapshots(keep=commit)
+            return True
+
+    def _sync_loop(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as error:
+                print(f"Syncing the mirror of {self.repo}@{self.branch} failed: {error}")
+
+    def _extract_snapshot(self, commit: str, snapshot_dir: Path) -> None:
+        tmp_dir = snapshot_dir.with_name(f"{commit}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        # Stream the archive into the snapshot folder instead of buffering it in memory
+        process = subprocess.Popen(
+            ["git", f"--git-dir={self.git_dir}", "archive", "--format=tar", commit],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        with tarfile.open(fileobj=process.stdout, mode="r|") as tar:
+            tar.extractall(tmp_dir, filter="data")
+        if process.wait() != 0:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise RuntimeError(f"git archive failed for {self.repo}@{commit}")
+
+        tmp_dir.rename(snapshot_dir)
+
+    def _remove_old_snapshots(self, keep: str) -> None:
+        # The previous snapshot stays until the next sync, for readers still using it
+        snapshots = sorted(
+            (path for path in self.snapshot_root.iterdir() if path.name != keep),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for snapshot in snapshots[:-1]:
+            shutil.rmtree(snapshot, ignore_errors=True)
+
+    def _git(self, *args: str, authenticated: bool = False) -> str:
+        command = ["git", f"--git-dir={self.git_dir}"]
+        if authenticated and self.github_token and self.remote_url.startswith("http"):
+            credentials = base64.b64encode(f"x-access-token:{self.github_token}".encode()).decode()
+            command += ["-c", f"http.extraHeader=Authorization: Basic {credentials}"]
+
+        result = subprocess.run(
+            command + list(args), capture_output=True, check=False, timeout=600
+        )
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"git {args[0]} failed for {self.repo}: {result.stderr.decode(errors='replace').strip()}"
+            )
+        return result.stdout.decode("utf-8")
+
+    # ------------------------------------------------------------------ #
+    # Reads
+    # ------------------------------------------------------------------ #
+
+    def read_file(self, file_path: str) -> Optional[str]:
+        """Returns the content of a file of the current snapshot, or None if it does not exist."""
+        return self._read(self._snapshot, file_path)
+
+    def load_file(self, file_path: str) -> Optional[Document]:
+        """Loads a single file of the current snapshot as a Document."""
+        snapshot = self._snapshot
+        content = self._read(snapshot, file_path)
+        if content is None:
+            return None
+        return self._document(snapshot, file_path, content)
+
+    def load_files(self, file_filter: Optional[Callable[[str], bool]] = None) -> List[Document]:
+        """Loads all files of the current snapshot accepted by `file_filter`."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+
+        documents = []
+        for file_path in snapshot.files:
+            if file_filter and not file_filter(file_path):
+                continue
+            content = self._read(snapshot, file_path)
+            if content is not None:
+                documents.append(self._document(snapshot, file_path, content))
+        return documents
+
+    @staticmethod
+    def _read(snapshot: Optional[_Snapshot], file_path: str) -> Optional[str]:
+        # Every read goes to the one snapshot taken by the caller, a concurrent sync does not affect it
+        file_info = snapshot.files.get(file_path) if snapshot else None
+        if file_info is None:
+            return None
+
+        with open(snapshot.snapshot_dir / file_path, "rb") as file:
+            if file_info[1] == 0:
+                return ""
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Decoded straight from the mapping, without an intermediate bytes copy
+                with memoryview(mapped) as view:
+                    return str(view, "utf-8")
+
+    def get_tree(self, tree_ish: Optional[str] = None, recursive: bool = False) -> dict:
+        """Lists a git tree of the mirror in the same shape as the GitHub git trees API."""
+        tree_ish = tree_ish or self.commit
+        tree_sha = self._git("rev-parse", f"{tree_ish}^{{tree}}").strip()
+
+        args = ["ls-tree", "-l", "-z"] + (["-r"] if recursive else []) + [tree_sha]
+        tree = []
+        for line in self._git(*args).split("\0"):
+            if not line:
+                continue
+            info, path = line.split("\t", 1)
+            _, object_type, sha, size = info.split()
+            item = {"path": path, "type": object_type, "sha": sha}
+            if object_type == "blob":
+                item["size"] = int(size)
+            tree.append(item)
+
+        return {"sha": tree_sha, "tree": tree, "truncated": False}
+
+    def _document(self, snapshot: _Snapshot, file_path: str, content: str) -> Document:
+        return Document(
+            page_content=content,
+            metadata={
+                "path": file_path,
+                "sha": snapshot.files[file_path][0],
+                "source": f"{self.github_api_url}/{self.repo}/blob/{self.branch}/{file_path}",
+            },
+        )
+
+
+def _clone_url(repo: str, github_api_url: str) -> str:
+    parsed = urlparse(github_api_url)
+    if parsed.netloc == "api.github.com":
+        return f"https://github.com/{repo}.git"
+    # GitHub Enterprise serves the API under <host>/api/v3
+    return f"{parsed.scheme}://{parsed.netloc}/{repo}.git"
+
+
+def create_stand_in_repo(target_dir: str, files: Dict[str, str], branch: str = "main") -> str:
+    """
+    Creates a local git repository with the given files, to run the mirror offline.
+
+    Args:
+        target_dir: Folder of the new repository.
+        files: Mapping of repository paths to file contents, e.g. {"zs4intcpq/zcl_foo.clas.abap": "..."}.
+        branch: Name of the branch to commit to.
+
+    Returns:
+        A `file://` URL to pass as `remote_url` / `GITHUB_MIRROR_URL`.
+    """
+    target = Path(target_dir).resolve()
+    target.mkdir(parents=True, exist_ok=True)
+
+    def git(*args: str) -> None:
+        subprocess.run(["git", "-C", str(target), *args], check=True, capture_output=True)
+
+    git("init", "--quiet", f"--initial-branch={branch}")
+    for file_path, content in files.items():
+        (target / file_path).parent.mkdir(parents=True, exist_ok=True)
+        (target / file_path).write_bytes(content.encode("utf-8"))
+
+    git("add", "--all")
+    git(
+        "-c", "user.name=stand-in", "-c", "user.email=stand-in@localhost",
+        "commit", "--quiet", "--allow-empty", "-m", "Stand-in snapshot",
+    )
+    return target.as_uri()
+
+
+_git_dir_locks: Dict[Path, threading.Lock] = {}
+_git_dir_locks_lock = threading.Lock()
+
+
+def _git_dir_lock(git_dir: Path) -> threading.Lock:
+    """The lock serializing the git commands run in a bare clone, shared by all its branch mirrors."""
+    with _git_dir_locks_lock:
+        return _git_dir_locks.setdefault(git_dir.resolve(), threading.Lock())
+
+
+_mirrors: Dict[Tuple[str, str], RepoMirror] = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_repo_mirror(repo: str, branch: str = "main") -> Optional[RepoMirror]:
+    """
+    Returns the process-wide mirror of a repository branch, or None if mirroring is disabled.
+
+    Settings:
+        GITHUB_MIRROR_ENABLED: Serve GitHub files from a local mirror (default: false).
+        GITHUB_MIRROR_DIR: Folder for clones and snapshots (default: `.cache/mirrors`).
+        GITHUB_MIRROR_URL: Git URL to clone from instead of GitHub, e.g. a local stand-in repo.
+        GITHUB_MIRROR_SYNC_SECONDS: Seconds between background fetches (default: 300).
+        GITHUB_MIRROR_RETRY_SECONDS: Backoff before a failed first clone is retried (default: 30).
+
+    None is also returned while the first clone of the mirror has failed and waits for its retry.
+    """
+    if not get_bool_setting("GITHUB_MIRROR_ENABLED"):
+        return None
+
+    # ✅ Only the registry is locked; the first clone runs under the mirror's own lock, so a
+    # slow clone of one branch does not hold up the others
+    with _mirrors_lock:
+        mirror = _mirrors.get((repo, branch))
+        if mirror is None:
+            mirror = RepoMirror(
+                repo=repo,
+                branch=branch,
+                mirror_dir=get_setting("GITHUB_MIRROR_DIR", ".cache/mirrors"),
+                remote_url=get_setting("GITHUB_MIRROR_URL"),
+                github_token=get_setting("CISCO_GITHUB_TOKEN"),
+                sync_interval=get_float_setting("GITHUB_MIRROR_SYNC_SECONDS", 300),
+                retry_backoff=get_float_setting("GITHUB_MIRROR_RETRY_SECONDS", 30),
+            )
+            _mirrors[(repo, branch)] = mirror
+
+    return mirror if mirror.ensure_started() else None
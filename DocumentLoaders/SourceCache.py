@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from Utilities.GetConfig import get_setting, get_int_setting, get_float_setting
+
+
+def git_blob_sha(content: str) -> str:
+    """Computes the git blob SHA of `content`, i.e. the SHA GitHub reports for the file."""
+    data = content.encode("utf-8")
+    header = f"blob {len(data)}\0".encode("utf-8")
+    return hashlib.sha1(header + data).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedSource:
+    """A single cached file of a GitHub repository."""
+
+    repo: str
+    branch: str
+    path: str
+    sha: str
+    content: str
+    fetched_at: float
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "size", len(self.content.encode("utf-8")))
+
+
+class SourceCache:
+    """
+    A two level (in-process + on-disk) cache for source files loaded from GitHub.
+
+    Entries are keyed by repo/branch/path and carry the blob SHA of the file. File contents
+    are stored on disk content-addressed by that SHA, so the same blob is stored only once
+    no matter how many branches point at it.
+
+    Lookups either pass the current blob SHA (e.g. from the repository tree), in which case
+    any entry with the same SHA is valid regardless of its age, or rely on the TTL.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: float = 15 * 60,
+    ):
+        """
+        Initializes the SourceCache.
+
+        Args:
+            cache_dir: Directory for the on-disk cache. `None` keeps the cache in memory only.
+            max_memory_bytes: Upper bound of the cached content held in memory (LRU evicted).
+            max_disk_bytes: Upper bound of the blobs kept on disk (least recently used evicted).
+            ttl_seconds: How long an entry is served without knowing the current blob SHA.
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[tuple, CachedSource]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.cache_dir:
+            (self.cache_dir / "blobs").mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / "refs").mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def get(
+        self, repo: str, branch: str, path: str, sha: Optional[str] = None
+    ) -> Optional[CachedSource]:
+        """
+        Returns the cached file or `None` on a miss.
+
+        Args:
+            repo: The GitHub repository in "owner/repo" format.
+            branch: The branch the file was loaded from.
+            path: The path of the file inside the repository.
+            sha: The current blob SHA of the file, if known. Entries with a different SHA are stale.
+        """
+        key = (repo, branch, path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._is_valid(entry, sha):
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._read_from_disk(repo, branch, path, sha)
+        if entry:
+            with self._lock:
+                self._store_in_memory(key, entry)
+        return entry
+
+    def put(self, repo: str, branch: str, path: str, content: str, sha: Optional[str] = None) -> CachedSource:
+        """Adds (or replaces) a file in the cache and returns the stored entry."""
+        entry = CachedSource(
+            repo=repo,
+            branch=branch,
+            path=path,
+            sha=sha or git_blob_sha(content),
+            content=content,
+            fetched_at=time.time(),
+        )
+
+        with self._lock:
+            self._store_in_memory((repo, branch, path), entry)
+
+        self._write_to_disk(entry)
+        return entry
+
+    def invalidate(self, repo: Optional[str] = None, branch: Optional[str] = None) -> None:
+        """Drops the in-memory entries of a repo (and branch); blobs on disk stay content-addressed."""
+        with self._lock:
+            for key in list(self._entries):
+                if (repo is None or key[0] == repo) and (branch is None or key[1] == branch):
+                    self._memory_bytes -= self._entries.pop(key).size
+
+        if self.cache_dir:
+            for ref_file in (self.cache_dir / "refs").glob("*.json"):
+                try:
+                    ref = json.loads(ref_file.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                if (repo is None or ref.get("repo") == repo) and (
+                    branch is None or ref.get("branch") == branch
+                ):
+                    ref_file.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Removes every entry from memory and disk."""
+        self.invalidate()
+        if self.cache_dir:
+            for blob in (self.cache_dir / "blobs").glob("*/*"):
+                blob.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+
+    def _is_valid(self, entry: CachedSource, sha: Optional[str]) -> bool:
+        if sha:
+            return entry.sha == sha
+        return time.time() - entry.fetched_at < self.ttl_seconds
+
+    def _store_in_memory(self, key: tuple, entry: CachedSource) -> None:
+        """Adds an entry to the LRU and evicts the oldest ones beyond the byte budget. Caller holds the lock."""
+        previous = self._entries.pop(key, None)
+        if previous:
+            self._memory_bytes -= previous.size
+
+        if entry.size > self.max_memory_bytes:
+            return
+
+        self._entries[key] = entry
+        self._memory_bytes += entry.size
+
+        while self._memory_bytes > self.max_memory_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    def _ref_file(self, repo: str, branch: str, path: str) -> Path:
+        digest = hashlib.sha1(f"{repo}\0{branch}\0{path}".encode("utf-8")).hexdigest()
+        return self.cache_dir / "refs" / f"{digest}.json"
+
+    def _blob_file(self, sha: str) -> Path:
+        return self.cache_dir / "blobs" / sha[:2] / sha
+
+    def _read_from_disk(
+        self, repo: str, branch: str, path: str, sha: Optional[str]
+    ) -> Optional[CachedSource]:
+        if not self.cache_dir:
+            return None
+
+        try:
+            ref = json.loads(self._ref_file(repo, branch, path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            ref = None
+
+        if sha:
+            # ✅ Content-addressed: any blob with the requested SHA is valid
+            fetched_at = ref["fetched_at"] if ref and ref.get("sha") == sha else time.time()
+        elif ref and time.time() - ref.get("fetched_at", 0) < self.ttl_seconds:
+            sha, fetched_at = ref["sha"], ref["fetched_at"]
+        else:
+            return None
+
+        blob_file = self._blob_file(sha)
+        try:
+            content = blob_file.read_bytes().decode("utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        # ✅ Never serve a truncated or corrupted blob
+        if git_blob_sha(content) != sha:
+            blob_file.unlink(missing_ok=True)
+            return None
+
+        os.utime(blob_file)  # Keep the LRU order on disk
+        return CachedSource(repo, branch, path, sha, content, fetched_at)
+
+    def _write_to_disk(self, entry: CachedSource) -> None:
+        if not self.cache_dir:
+            return
+
+        try:
+            blob_file = self._blob_file(entry.sha)
+            if not blob_file.exists():
+                blob_file.parent.mkdir(parents=True, exist_ok=True)
+                _atomic_write(blob_file, entry.content)
+                self._evict_disk()
+
+            ref = {
+                "repo": entry.repo,
+                "branch": entry.branch,
+                "path": entry.path,
+                "sha": entry.sha,
+                "fetched_at": entry.fetched_at,
+            }
+            _atomic_write(self._ref_file(entry.repo, entry.branch, entry.path), json.dumps(ref))
+        except OSError as error:
+            # The disk cache is an optimisation only, never fail a lookup because of it
+            print(f"Source cache write failed: {error}")
+
+    def _evict_disk(self) -> None:
+        blobs = [(blob.stat(), blob) for blob in (self.cache_dir / "blobs").glob("*/*")]
+        total = sum(stat.st_size for stat, _ in blobs)
+        if total <= self.max_disk_bytes:
+            return
+
+        for stat, blob in sorted(blobs, key=lambda item: item[0].st_mtime):
+            blob.unlink(missing_ok=True)
+            total -= stat.st_size
+            if total <= self.max_disk_bytes:
+                break
+
+
+def _atomic_write(file_path: Path, content: str) -> None:
+    tmp_file = file_path.with_name(f"{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_file.write_bytes(content.encode("utf-8"))
+    os.replace(tmp_file, file_path)
+
+
+_source_cache: Optional[SourceCache] = None
+_source_cache_lock = threading.Lock()
+
+
+def get_source_cache() -> SourceCache:
+    """
+    Returns the process-wide source cache, configured from the `SOURCE_CACHE_*` settings.
+
+    Settings:
+        SOURCE_CACHE_DIR: On-disk cache directory (default: `.cache/sources`, empty to disable).
+        SOURCE_CACHE_MAX_MEMORY_MB: In-process LRU budget in MB (default: 64).
+        SOURCE_CACHE_MAX_DISK_MB: On-disk budget in MB (default: 512).
+        SOURCE_CACHE_TTL_SECONDS: Lifetime of entries looked up without a blob SHA (default: 900).
+    """
+    global _source_cache
+
+    with _source_cache_lock:
+        if _source_cache is None:
+            _source_cache = SourceCache(
+                cache_dir=get_setting("SOURCE_CACHE_DIR", ".cache/sources") or None,
+                max_memory_bytes=get_int_setting("SOURCE_CACHE_MAX_MEMORY_MB", 64) * 1024 * 1024,
+                max_disk_bytes=get_int_setting("SOURCE_CACHE_MAX_DISK_MB", 512) * 1024 * 1024,
+                ttl_seconds=get_float_setting("SOURCE_CACHE_TTL_SECONDS", 15 * 60),
+            )
+        return _source_cache
@@ -1,6 +1,6 @@
 import time
 
-from ChatModels.GetAuthToken import clear_auth_token, get_auth_token
+from Utilities.GetAuthToken import clear_auth_token, get_auth_token
 
 # Get the start time as a floating-point timestamp
 start_time = time.time()
@@ -0,0 +1,48 @@
+import json
+
+from langchain_core.tools import BaseTool
+from typing import Any, Type
+from pydantic import BaseModel, Field
+
+from Workflows.ContextManager import get_context_manager
+
+
+class ExpandToolOutputInput(BaseModel):
+    """Input schema for ExpandToolOutput."""
+
+    ref: str = Field(
+        description="The ref of a tool output that was compacted in an earlier turn."
+    )
+
+
+class ExpandToolOutput(BaseTool):  # type: ignore[override, override]
+    """Tool that returns the full content of a tool output compacted from the conversation context."""
+
+    name: str = "expand_tool_output"
+    description: str = (
+        "Returns the full content of a tool output from an earlier turn that was replaced by a reference."
+    )
+    args_schema: Type[BaseModel] = ExpandToolOutputInput
+
+    def _run(self, **kwargs) -> Any:
+        """
+        Looks up a compacted tool output by its ref.
+        """
+
+        ref = str(kwargs.get("ref", "")).strip()
+
+        if not ref:
+            raise ValueError("`ref` cannot be empty.")
+
+        content = get_context_manager().get_output(ref)
+
+        if content is None:
+            raise ValueError(
+                f"Output '{ref}' is no longer available, call the original tool again."
+            )
+
+        # Tool outputs are stored JSON encoded, decode them so they are not encoded twice
+        try:
+            return json.loads(content)
+        except ValueError:
+            return content
@@ -1,9 +1,8 @@
 from typing import List, Optional, Tuple, Type
-import re
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool
 from langchain_core.callbacks import CallbackManagerForToolRun
-from Utilities.GetClassSourceCode import get_class_source_code
+from Utilities.AbapClass import AbapClass, aget_abap_class, get_abap_class
 
 
 class ClassDefinitionInput(BaseModel):
@@ -37,22 +36,26 @@ class GetClassDefinition(BaseTool):  # type: ignore[override, override]
         if not class_name:
             raise ValueError("`class_name` cannot be empty.")
 
-        # Retrieve class source code
-        class_source_code = get_class_source_code(class_name)
+        # Retrieve the parsed class (shared with the other class tools)
+        return self._class_definition(class_name, get_abap_class(class_name))
 
-        if not class_source_code:
-            raise ValueError(
-                f"Class '{class_name}' not found or source code retrieval failed."
-            )
+    async def _arun(self, **kwargs) -> Tuple[str, str]:
+        """Async version of `_run`: the class source is fetched without blocking the event loop."""
+
+        class_name = kwargs.get("class_name")
+
+        if not class_name:
+            raise ValueError("`class_name` cannot be empty.")
+
+        return self._class_definition(class_name, await aget_abap_class(class_name))
 
-        # Apply regex to extract the class definition only
-        class_definition_pattern = re.compile(
-            r"(?i)class\s+\w+\s+definition.*?endclass\.", re.IGNORECASE | re.DOTALL
-        )
-        class_definition_code = class_definition_pattern.search(class_source_code)
+    @staticmethod
+    def _class_definition(class_name: str, abap_class: AbapClass) -> Tuple[str, str]:
+        # The class definition is a slice of the parsed source
+        class_definition_code = abap_class.definition_code
 
         if class_definition_code:
-            return (class_definition_code.group(0), class_source_code)
+            return (class_definition_code, abap_class.source)
         else:
             raise ValueError(
                 f"Class definition not found in source code for '{class_name}'."
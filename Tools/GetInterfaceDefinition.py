@@ -1,4 +1,4 @@
-from Utilities.GetClassSourceCode import get_interface_source_code
+from Utilities.GetClassSourceCode import aget_interface_source_code, get_interface_source_code
 from langchain_core.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
@@ -36,8 +36,22 @@ class GetInterfaceDefinition(BaseTool):  # type: ignore[override, override]
             raise ValueError("`interface_name` cannot be empty.")
 
         # Retrieve class source code
-        interface_source_code = get_interface_source_code(interface_name)
+        return self._check_source(get_interface_source_code(interface_name))
 
+    async def _arun(self, **kwargs) -> str:
+        """Async version of `_run`: the interface source is fetched without blocking the event loop."""
+
+        input_data = InterfaceDefinitionInput.model_validate(kwargs)
+
+        interface_name = input_data.interface_name
+
+        if not interface_name:
+            raise ValueError("`interface_name` cannot be empty.")
+
+        return self._check_source(await aget_interface_source_code(interface_name))
+
+    @staticmethod
+    def _check_source(interface_source_code: str) -> str:
         if interface_source_code:
             return interface_source_code
         else:
@@ -1,9 +1,8 @@
 from typing import List, Optional, Tuple, Type
-import re
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool
 from langchain_core.callbacks import CallbackManagerForToolRun
-from Utilities.GetClassSourceCode import get_class_source_code
+from Utilities.AbapClass import AbapClass, aget_abap_class, get_abap_class
 
 
 class MethodCodeInput(BaseModel):
@@ -41,23 +40,30 @@ class GetMethodCode(BaseTool):  # type: ignore[override, override]
         if not meth_name:
             raise ValueError("`meth_name` cannot be empty.")
 
-        # Retrieve class source code
-        class_source_code = get_class_source_code(class_name)
+        # Retrieve the parsed class (shared with the other class tools)
+        return self._method_code(meth_name, get_abap_class(class_name))
 
-        if not class_source_code:
-            raise ValueError(
-                f"Class '{class_name}' not found or source code retrieval failed."
-            )
+    async def _arun(self, **kwargs) -> str:
+        """Async version of `_run`: the class source is fetched without blocking the event loop."""
+
+        class_name = kwargs.get("class_name")
+        meth_name = kwargs.get("meth_name")
+
+        if not class_name:
+            raise ValueError("`class_name` cannot be empty.")
+
+        if not meth_name:
+            raise ValueError("`meth_name` cannot be empty.")
 
-        # Extract method body
-        method_body_pattern = re.compile(
-            rf"METHOD\s+(?:\w+~)?{meth_name}\b.*?ENDMETHOD", re.IGNORECASE | re.DOTALL
-        )
+        return self._method_code(meth_name, await aget_abap_class(class_name))
 
-        method_code = method_body_pattern.search(class_source_code)
+    @staticmethod
+    def _method_code(meth_name: str, abap_class: AbapClass) -> str:
+        # Look up the method span, also matching interface methods like `zif_foo~meth_name`
+        method = abap_class.get_method(meth_name)
 
-        if method_code:
-            return method_code.group(0)
+        if method:
+            return abap_class.method_code(method)
         else:
             raise ValueError(
                 f"Failed to extract source code for the method: {meth_name}."
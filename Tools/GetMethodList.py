@@ -1,8 +1,7 @@
 from typing import List, Type
-import re
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool 
-from Utilities.GetClassSourceCode import get_class_source_code
+from Utilities.AbapClass import AbapClass, aget_abap_class, get_abap_class
 
 class MethodListInput(BaseModel):
     """Input for the GetClassDefinition tool."""
@@ -32,32 +31,28 @@ class GetMethodList(BaseTool):  # type: ignore[override, override]
         if not class_name:
             raise ValueError("`class_name` cannot be empty.")
 
-        # Retrieve class source code
-        class_source_code = get_class_source_code(class_name)
+        # Retrieve the parsed class (shared with the other class tools)
+        return self._method_list(class_name, get_abap_class(class_name))
 
-        if not class_source_code:
-            raise ValueError(
-                f"Class '{class_name}' not found or source code retrieval failed."
-            )
+    async def _arun(self, **kwargs) -> List[str]:
+        """Async version of `_run`: the class source is fetched without blocking the event loop."""
+
+        class_name = kwargs.get("class_name")
 
-        # Apply regex to extract the class definition only
-        class_impl_pattern = re.compile(
-            r"(?i)class\s+\w+\s+implementation.*?endclass\.", re.IGNORECASE | re.DOTALL
-        )
-        class_impl_code = class_impl_pattern.search(class_source_code)
+        if not class_name:
+            raise ValueError("`class_name` cannot be empty.")
 
-        if not class_impl_code:
+        return self._method_list(class_name, await aget_abap_class(class_name))
+
+    @staticmethod
+    def _method_list(class_name: str, abap_class: AbapClass) -> List[str]:
+        if not abap_class.implementation:
             raise ValueError(
                 f"Class Implementation not found in source code for '{class_name}'."
             )
 
-        # Extract methods
-        method_pattern = re.compile(
-            r"^\s*METHOD\s+([\w~]+)\s*\.", re.IGNORECASE | re.MULTILINE
-        )
-
-        methods = method_pattern.findall(class_impl_code.group(0))
-        methods = [method.lower() for method in methods]
+        # Methods are already split out of the class implementation
+        methods = [method.lower() for method in abap_class.method_names]
 
         if methods:
             # return MethodListOutput(class_name=class_name, methods=methods) 
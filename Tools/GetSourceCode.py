@@ -1,6 +1,5 @@
-from Utilities.RemoveComments import remove_comments
+from Utilities.GetClassSourceCode import aget_object_source_code, get_object_source_code
 from langchain_core.tools import BaseTool
-from DocumentLoaders.Github import GitHubLoader
 from typing import Optional, Type
 from pydantic import BaseModel, Field
 
@@ -39,10 +38,20 @@ class GetSourceCode(BaseTool): # type: ignore[override, override]
         Fetch the source code of an ABAP object and remove comments.
         """
 
+        # Load source code from GitHub, located through the repository index
+        return get_object_source_code(*self._read_input(kwargs))
+
+    async def _arun(self, **kwargs) -> str:
+        """Async version of `_run`: the source is fetched without blocking the event loop."""
+
+        return await aget_object_source_code(*self._read_input(kwargs))
+
+    @staticmethod
+    def _read_input(kwargs: dict) -> tuple:
         object_name = kwargs.get("object_name")
         object_type = kwargs.get("object_type")
-        repo = kwargs.get("repo")
-        branch = kwargs.get("branch")
+        repo = kwargs.get("repo") or "cisco-it-finance/sap-brim-repo"
+        branch = kwargs.get("branch") or "dha-main"
 
         # Validate object_name
         if not object_name:
@@ -55,17 +64,4 @@ class GetSourceCode(BaseTool): # type: ignore[override, override]
                 f"Invalid object_type '{object_type}'. Must be one of {allowed_types}"
             )
 
-        # Load source code from GitHub
-        github_loader = GitHubLoader(repo=repo, branch=branch)
-        document = github_loader.load_files(
-            file_filter=lambda file_path: file_path
-            == f"zs4intcpq/{object_name.lower()}.{object_type.lower()}.abap",
-        )
-
-        if not document:
-            raise ValueError(
-                f"Object {object_name}/{object_type} was not found in the repository."
-            )
-
-        # Remove comments and return cleaned source code
-        return remove_comments(document[0].page_content)
\ No newline at end of file
+        return object_name, object_type, repo, branch
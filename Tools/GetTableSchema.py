@@ -1,18 +1,67 @@
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool
+import httpx
 import requests
-from requests.auth import HTTPBasicAuth
-from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+
+from Utilities.ODataClient import SELECT_FIELDS, ODataClient, get_odata_client
+
+OUTPUT_FORMATS = ("compact", "odata")
+
+# Columns of the compact output, in order; `tableName` becomes the key of each table
+COMPACT_COLUMNS = [field for field in SELECT_FIELDS if field != "tableName"]
+
+
+def format_schemas(
+    response: Dict[str, Any], output_format: str = "compact", table_names: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Shapes a table schema response for the LLM.
+
+    The compact format drops the OData annotations and turns the per-field objects into
+    parallel arrays per table, so every column name is sent once instead of once per field.
+    Each of the requested `table_names` without any field is reported as "not found".
+    """
+    if output_format == "odata":
+        return response
+
+    tables: Dict[str, Any] = {}
+    for row in response.get("value", []):
+        table = tables.setdefault(
+            str(row.get("tableName", "")), {column: [] for column in COMPACT_COLUMNS}
+        )
+        for column in COMPACT_COLUMNS:
+            value = row.get(column)
+            # Lengths and decimals come as numeric strings
+            if column in ("leng", "decimals") and isinstance(value, str) and value.isdigit():
+                value = int(value)
+            table[column].append(value)
+
+    # ✅ A table without rows does not exist, or none of its fields match the filter
+    found = {table_name.upper() for table_name in tables}
+    for table_name in table_names or []:
+        if table_name.upper() not in found:
+            tables[table_name] = f"not found: {table_name}"
+
+    return tables
 
 
 class GetTableSchemaInput(BaseModel):
     """This is Filter Criteria for the API which will be fetching the table schema based on table_name and field_names (optional)."""
 
-    table_name: str = Field(description="DB Table Name")
+    table_name: Optional[str] = Field(default=None, description="DB Table Name")
+    table_names: Optional[List[str]] = Field(
+        default=None,
+        description="List (array) of DB Table Names, to fetch the schemas of several tables in one call",
+    )
     field_names: Optional[List[str]] = Field(
         description="List (array) of Fields to be filtered"
     )
+    output_format: Optional[str] = Field(
+        default="compact",
+        description="'compact' (default) for the columns of each table as parallel arrays, 'odata' for the raw OData response",
+    )
     # system_id: str = Field(
     #     description="System ID for the API Call. List of allowed values:['DHA', 'D2A', 'RHA' ]"
     # )
@@ -25,22 +74,22 @@ class GetTableSchema(BaseTool):  # type: ignore[override, override]
 
     name: str = "get_table_schema"
     description: str = (
-        """Fetches the table schema and returns an JSON output like below: 
+        """Fetches the table schema of one table (`table_name`) or of several tables in one call (`table_names`).
+        By default returns a compact JSON output with one entry per table and the columns as parallel arrays:
         {
-            "@odata.context" : "$metadata#TabFields(fieldname,keyflag,datatype,leng,decimals,description,tableName)",
-            "@odata.metadataEtag" : "W/\"20250118000644\"",
-            "value" : [
-                {
-                "tableName" : "ZDT_SOM_HEADCUST",
-                "fieldname" : "REFOBJKEY",
-                "keyflag" : true,
-                "datatype" : "CHAR",
-                "leng" : "10",
-                "decimals" : "0",
-                "description" : ""
-                }
-            ]
+            "ZDT_SOM_HEADCUST": {
+                "fieldname": ["MANDT", "REFOBJKEY"],
+                "keyflag": [true, true],
+                "datatype": ["CLNT", "CHAR"],
+                "leng": [3, 10],
+                "decimals": [0, 0],
+                "description": ["Client", ""]
+            },
+            "ZDT_UNKNOWN": "not found: ZDT_UNKNOWN"
         }
+        A requested table that does not exist (or has none of the requested fields) is reported as "not found".
+        With `output_format` "odata" the raw OData response (`@odata.context`, `@odata.metadataEtag`
+        and one object per field in `value`) is returned instead.
         """
     )
     args_schema: Type[BaseModel] = GetTableSchemaInput
@@ -52,72 +101,59 @@ class GetTableSchema(BaseTool):  # type: ignore[override, override]
         **kwargs,
     ) -> Dict[str, Any]:
 
-        # Extract parameters from kwargs if they are passed dynamically
-        table_name = kwargs.get("table_name")
-        field_names = kwargs.get("field_names")
+        client, table_names, field_names, output_format = self._read_input(kwargs)
 
-        system_id = kwargs.get("system_id", "RHA").upper()
-        user_name = kwargs.get("user_name", "vaibhago")
-        password = kwargs.get("password", "Aichusiddhu123$$")
+        try:
+            # ✅ Cached schemas cost no round trip, the others are fetched in one pooled request
+            return format_schemas(
+                client.get_table_schemas(table_names, field_names), output_format, table_names
+            )
 
-        if not table_name:
-            raise ValueError("Please provide the `table_name`.")
+        except requests.exceptions.RequestException as error:
+            return {"error": f"Error: {str(error)}"}
 
-        # Define system mappings
-        system_config = {
-            "RHA": {
-                "hostname": "https://saphec-preprod.cisco.com:44300",
-                "sap_client": 300,
-            },
-            "D2A": {
-                "hostname": "https://saphec-dv2.cisco.com:44300",
-                "sap_client": 110,
-            },
-            "DHA": {
-                "hostname": "https://saphec-dev.cisco.com:44300",
-                "sap_client": 110,
-            },
-        }
+    async def _arun(
+        self,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Async version of `_run`, using the shared non-blocking HTTP client."""
 
-        if system_id not in system_config:
-            raise ValueError(
-                f"Invalid system_id: {system_id}. Allowed values: {list(system_config.keys())}"
-            )
+        client, table_names, field_names, output_format = self._read_input(kwargs)
 
-        filters=""
-        
-        # Construct the fieldname filter dynamically
-        if isinstance(field_names, list) and field_names:
-            fieldname_filter = " or ".join(
-                [f"fieldname eq '{field}'" for field in field_names]
+        try:
+            return format_schemas(
+                await client.aget_table_schemas(table_names, field_names), output_format, table_names
             )
-            filters = fieldname_filter
-        else:
-            filters = "keyflag eq true"  # Fetch only the key fields
 
-        hostname = system_config[system_id]["hostname"]
-        sap_client = system_config[system_id]["sap_client"]
+        except httpx.HTTPError as error:
+            return {"error": f"Error: {str(error)}"}
 
-        base_url = f"{hostname}/sap/opu/odata4/sap/zsb_table_schema/srvd_a2x/sap/zsd_table_schema/0001/TabFields"
+    @staticmethod
+    def _read_input(kwargs: dict) -> Tuple[ODataClient, List[str], Optional[List[str]], str]:
+        """Returns the OData client of the requested system, the table names, the field filter and the output format."""
 
-        # Construct the full API URL with filters
-        url = (
-            f"{base_url}?"
-            f"$filter=(tableName eq '{table_name}' and ({filters}))"
-            f"&sap-client={sap_client}"
-        )
+        # Extract parameters from kwargs if they are passed dynamically
+        table_names = list(kwargs.get("table_names") or [])
+        if kwargs.get("table_name"):
+            table_names.insert(0, kwargs["table_name"])
+        # Drop duplicates, keeping the order
+        table_names = list(dict.fromkeys(name.upper() for name in table_names))
 
-        try:
-            # Make the request with authentication
-            response = requests.get(
-                url, auth=HTTPBasicAuth(user_name, password), timeout=10
-            )
+        field_names = kwargs.get("field_names")
+
+        system_id = kwargs.get("system_id", "RHA").upper()
+        user_name = kwargs.get("user_name", "vaibhago")
+        password = kwargs.get("password", "Aichusiddhu123$$")
 
-            # Check for successful response
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise Exception(f"Error: {response.status_code} - {response.reason}")
+        output_format = (kwargs.get("output_format") or "compact").lower()
 
-        except requests.exceptions.RequestException as error:
-            return {(f"Error: {str(error)}")}
+        if not table_names:
+            raise ValueError("Please provide the `table_name`.")
+
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Invalid output_format: '{output_format}'. Allowed values: {list(OUTPUT_FORMATS)}"
+            )
+
+        return get_odata_client(system_id, user_name, password), table_names, field_names, output_format
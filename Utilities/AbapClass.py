@@ -0,0 +1,222 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from Utilities import AbapPatterns
+from Utilities.AbapLexer import WORD, iter_statements, tokenize
+from Utilities.GetClassSourceCode import aget_class_source_code, get_class_source_code
+
+Span = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class AbapMethod:
+    """A method implementation, as offsets into the class source."""
+
+    name: str  # As written in the source, e.g. `zif_foo~bar`
+    start: int  # Offset of the METHOD keyword
+    end: int  # Offset right after the ENDMETHOD keyword
+
+    @property
+    def short_name(self) -> str:
+        """The method name without the interface prefix."""
+        return self.name.rsplit("~", 1)[-1]
+
+
+@dataclass
+class AbapClass:
+    """
+    A parsed ABAP class. The source is parsed once and every part of the class is kept as
+    offsets into it, so the tools only slice the source instead of scanning it again.
+    """
+
+    source: str
+    sha: str
+    definition: Optional[Span] = None
+    implementation: Optional[Span] = None
+    sections: Dict[str, Span] = field(default_factory=dict)
+    interfaces: List[str] = field(default_factory=list)
+    methods: List[AbapMethod] = field(default_factory=list)
+
+    @property
+    def definition_code(self) -> Optional[str]:
+        return self.slice(self.definition)
+
+    @property
+    def implementation_code(self) -> Optional[str]:
+        return self.slice(self.implementation)
+
+    @property
+    def method_names(self) -> List[str]:
+        return [method.name for method in self.methods]
+
+    def slice(self, span: Optional[Span]) -> Optional[str]:
+        return self.source[span[0] : span[1]] if span else None
+
+    def section_code(self, section: str) -> Optional[str]:
+        """Returns the `public`, `protected` or `private` section of the definition."""
+        return self.slice(self.sections.get(section.lower()))
+
+    def get_method(self, method_name: str) -> Optional[AbapMethod]:
+        """
+        Finds a method implementation by its name. `bar` also matches `zif_foo~bar`.
+        """
+        method_name = method_name.strip().lower()
+        for method in self.methods:
+            if method.name.lower() == method_name or method.short_name.lower() == method_name:
+                return method
+        return None
+
+    def method_code(self, method: AbapMethod) -> str:
+        return self.source[method.start : method.end]
+
+
+def iter_methods(source: str, start: int = 0, end: Optional[int] = None) -> Iterator[AbapMethod]:
+    """
+    Splits the method implementations out of `source[start:end]` in a single linear scan.
+
+    Lines are visited once: a `METHOD <name>.` line opens a method, the next ENDMETHOD closes it.
+    Comment lines and trailing `"` comments are skipped, so commented-out code never opens or
+    closes a method.
+
+    Yields:
+        AbapMethod: The methods in source order, with their offsets into `source`.
+    """
+    end = len(source) if end is None else end
+    current: Optional[Tuple[str, int]] = None
+    pos = start
+
+    while pos < end:
+        line_end = source.find("\n", pos, end)
+        if line_end == -1:
+            line_end = end
+        line = source[pos:line_end]
+        stripped = line.lstrip()
+
+        if stripped and stripped[0] not in "*\"":
+            code = _strip_trailing_comment(line) if '"' in line else line
+            search_from = 0
+
+            if current is None and stripped[:6].upper() == "METHOD":
+                header = AbapPatterns.METHOD_HEADER.match(code)
+                if header:
+                    current = (header.group(3), pos + header.start(2))
+                    search_from = header.end()
+
+            if current is not None and "ENDMETHOD" in code.upper():
+                closing = AbapPatterns.ENDMETHOD.search(code, search_from)
+                if closing:
+                    yield AbapMethod(name=current[0], start=current[1], end=pos + closing.end())
+                    current = None
+
+        pos = line_end + 1
+
+
+def _strip_trailing_comment(line: str) -> str:
+    """Cuts a `"` comment off a line of code, ignoring quotes inside '...' and `...` literals."""
+    quote = None
+    for index, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'`":
+            quote = char
+        elif char == '"':
+            return line[:index]
+    return line
+
+
+def parse_abap_class(source: str) -> AbapClass:
+    """
+    Parses the source of an ABAP class into an AbapClass. Results are memoized by the SHA of the
+    source, so the same class is parsed only once no matter how many tools ask for it.
+    """
+    sha = hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+    with _parsed_classes_lock:
+        abap_class = _parsed_classes.get(sha)
+        if abap_class:
+            _parsed_classes.move_to_end(sha)
+            return abap_class
+
+    abap_class = _parse(source, sha)
+
+    with _parsed_classes_lock:
+        _parsed_classes[sha] = abap_class
+        while len(_parsed_classes) > _MAX_PARSED_CLASSES:
+            _parsed_classes.popitem(last=False)
+
+    return abap_class
+
+
+def _parse(source: str, sha: str) -> AbapClass:
+    abap_class = AbapClass(source=source, sha=sha)
+
+    if definition := AbapPatterns.CLASS_DEFINITION.search(source):
+        abap_class.definition = definition.span()
+
+        # Each section runs up to the next section, or the ENDCLASS of the definition
+        headers = list(AbapPatterns.SECTION_HEADER.finditer(source, *definition.span()))
+        section_ends = [header.start() for header in headers[1:]] + [definition.end()]
+        for header, end in zip(headers, section_ends):
+            abap_class.sections[header.group(1).lower()] = (header.start(1), end)
+
+        # INTERFACES statements, including chains like `INTERFACES: zif_a, zif_b.`
+        for statement in iter_statements(tokenize(definition.group())):
+            if len(statement) > 1 and statement[0].upper == "INTERFACES" and statement[1].kind == WORD:
+                abap_class.interfaces.append(statement[1].upper)
+
+    if implementation := AbapPatterns.CLASS_IMPLEMENTATION.search(source):
+        abap_class.implementation = implementation.span()
+
+        abap_class.methods = list(iter_methods(source, *implementation.span()))
+
+    return abap_class
+
+
+_MAX_PARSED_CLASSES = 128
+_parsed_classes: "OrderedDict[str, AbapClass]" = OrderedDict()
+_parsed_classes_lock = threading.Lock()
+
+
+def get_abap_class(
+    class_name: str,
+    repo: str = "cisco-it-finance/sap-brim-repo",
+    branch: str = "dha-main",
+) -> AbapClass:
+    """
+    Fetches an ABAP class (through the source cache) and returns its parsed model.
+
+    Args:
+        class_name (str): The name of the ABAP class.
+        branch (str, optional): The branch of the GitHub repository. Defaults to "dha-main".
+
+    Returns:
+        AbapClass: The parsed class, shared by all tools working on the same source.
+    """
+    class_source_code = get_class_source_code(class_name, repo=repo, branch=branch)
+
+    if not class_source_code:
+        raise ValueError(
+            f"Class '{class_name}' not found or source code retrieval failed."
+        )
+
+    return parse_abap_class(class_source_code)
+
+
+async def aget_abap_class(
+    class_name: str,
+    repo: str = "cisco-it-finance/sap-brim-repo",
+    branch: str = "dha-main",
+) -> AbapClass:
+    """Async version of `get_abap_class`. Parsing is CPU-bound and memoized, so it stays inline."""
+    class_source_code = await aget_class_source_code(class_name, repo=repo, branch=branch)
+
+    if not class_source_code:
+        raise ValueError(
+            f"Class '{class_name}' not found or source code retrieval failed."
+        )
+
+    return parse_abap_class(class_source_code)
@@ -0,0 +1,108 @@
+from typing import Iterable, Iterator, List, NamedTuple, Union
+
+from Utilities.AbapPatterns import ABAP_TOKEN
+
+# Token kinds
+COMMENT = "comment"
+STRING = "string"
+WORD = "word"
+PERIOD = "period"
+COMMA = "comma"
+COLON = "colon"
+PRAGMA = "pragma"
+PUNCT = "punct"
+
+
+class Token(NamedTuple):
+    """A lexical token of ABAP source code."""
+
+    kind: str
+    text: str
+    start: int  # Offset in the source
+    line: int  # 1-based line number
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper()
+
+
+def is_comment_line(line: str) -> bool:
+    """A full-line comment: `*` in the first column, or a line starting with `"`."""
+    return line[:1] == "*" or line.lstrip()[:1] == '"'
+
+
+def tokenize(source: Union[str, Iterable[str]]) -> Iterator[Token]:
+    """
+    Splits ABAP source code into tokens in a single pass.
+
+    ABAP tokens never span lines, so the source is consumed line by line: `source` can be a
+    string or any iterable of lines (e.g. an open file), and only one line is held at a time.
+
+    Yields:
+        Token: Comments, string literals, words (keywords and identifiers), pragmas, periods,
+        commas, colons and other punctuation, in source order.
+    """
+    lines = source.splitlines(keepends=True) if isinstance(source, str) else source
+    offset = 0
+
+    for line_number, line in enumerate(lines, start=1):
+        if line[:1] == "*":
+            yield Token(COMMENT, line.rstrip("\r\n"), offset, line_number)
+        else:
+            for match in ABAP_TOKEN.finditer(line):
+                yield Token(match.lastgroup, match.group(), offset + match.start(), line_number)
+        offset += len(line)
+
+
+def iter_statements(
+    tokens: Iterable[Token], expand_chains: bool = True
+) -> Iterator[List[Token]]:
+    """
+    Groups tokens into statements ending at a period. Comments and pragmas are dropped.
+
+    Args:
+        tokens: Tokens as produced by `tokenize`.
+        expand_chains: Whether to expand chained statements, i.e. `DATA: a, b.` into `DATA a.` and `DATA b.`
+
+    Yields:
+        The tokens of each statement, without the closing period.
+    """
+    statement: List[Token] = []
+
+    for token in tokens:
+        if token.kind in (COMMENT, PRAGMA):
+            continue
+        if token.kind == PERIOD:
+            if statement:
+                yield from _expand_chain(statement) if expand_chains else (statement,)
+            statement = []
+        else:
+            statement.append(token)
+
+    if statement:
+        yield from _expand_chain(statement) if expand_chains else (statement,)
+
+
+def _expand_chain(statement: List[Token]) -> Iterator[List[Token]]:
+    colon = next((index for index, token in enumerate(statement) if token.kind == COLON), None)
+    if colon is None:
+        yield statement
+        return
+
+    prefix = statement[:colon]
+    part: List[Token] = []
+    depth = 0
+
+    for token in statement[colon + 1 :]:
+        if token.kind == PUNCT and token.text == "(":
+            depth += 1
+        elif token.kind == PUNCT and token.text == ")":
+            depth -= 1
+
+        if token.kind == COMMA and depth == 0:
+            yield prefix + part
+            part = []
+        else:
+            part.append(token)
+
+    yield prefix + part
@@ -0,0 +1,64 @@
+"""
+Registry of the regular expressions used on ABAP sources and repository paths.
+
+All patterns are compiled once at import time; hot paths only reference them.
+"""
+
+import re
+from typing import Dict, Pattern
+
+# `CLASS zcl_foo DEFINITION ... ENDCLASS.`
+CLASS_DEFINITION = re.compile(
+    r"class\s+\w+\s+definition.*?endclass\.", re.IGNORECASE | re.DOTALL
+)
+
+# `CLASS zcl_foo IMPLEMENTATION ... ENDCLASS.`
+CLASS_IMPLEMENTATION = re.compile(
+    r"class\s+\w+\s+implementation.*?endclass\.", re.IGNORECASE | re.DOTALL
+)
+
+# `PUBLIC SECTION.`, `PROTECTED SECTION.`, `PRIVATE SECTION.`
+SECTION_HEADER = re.compile(
+    r"^\s*(public|protected|private)\s+section\s*\.", re.IGNORECASE | re.MULTILINE
+)
+
+# A line opening a method implementation: `METHOD zif_foo~bar.`, matched per line
+METHOD_HEADER = re.compile(r"(\s*)(METHOD\s+([/\w~]+)\s*\.)", re.IGNORECASE)
+
+# The keyword closing a method implementation
+ENDMETHOD = re.compile(r"\bENDMETHOD\b", re.IGNORECASE)
+
+# One alternative per token kind of the ABAP lexer, tried in order on each line
+ABAP_TOKEN = re.compile(
+    r"""
+    (?P<comment>"[^\n]*)
+  | (?P<string>'(?:[^'\n]|'')*'?|`(?:[^`\n]|``)*`?|\|(?:[^|\\\n]|\\.)*\|?)
+  | (?P<pragma>\#\#\w+)
+  | (?P<word>(?:<[\w/]+>|[\w/$%]+)(?:[-~][\w/$%]+)*)
+  | (?P<period>\.)
+  | (?P<comma>,)
+  | (?P<colon>:)
+  | (?P<punct>=>|->|\?=|<=|>=|<>|\S)
+    """,
+    re.VERBOSE,
+)
+
+# abapGit file names: <object name>.<object type>.<extension>, "/" in namespaces is stored as "#"
+ABAP_FILE_NAME = re.compile(
+    r"^(?P<name>[^./]+)\.(?P<type>[a-z0-9]{4})\.(?P<ext>abap|asddls|acds|xml)$"
+)
+
+# Fenced code blocks in LLM responses: ```abap ... ```
+MARKDOWN_CODE_BLOCK = re.compile(r"```(?:\w+)?\n(.*?)```", re.DOTALL)
+
+
+PATTERNS: Dict[str, Pattern] = {
+    "class_definition": CLASS_DEFINITION,
+    "class_implementation": CLASS_IMPLEMENTATION,
+    "section_header": SECTION_HEADER,
+    "method_header": METHOD_HEADER,
+    "endmethod": ENDMETHOD,
+    "abap_token": ABAP_TOKEN,
+    "abap_file_name": ABAP_FILE_NAME,
+    "markdown_code_block": MARKDOWN_CODE_BLOCK,
+}
@@ -1,18 +1,202 @@
 import time
+import random
 import requests
 import base64
-import os
+import threading
 import traceback
-import streamlit as st
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from Utilities.GetConfig import get_setting, get_float_setting, get_int_setting
+
 # Load environment variables
 load_dotenv()
 
-# ✅ Global variables for token caching
-_cached_token = None
-_token_expiry = 0  # Stores token expiry time (UNIX timestamp)
+
+class TokenManager:
+    """
+    Caches a client-credentials access token and keeps it fresh.
+
+    - Single-flight: when the token is missing or expired, exactly one caller fetches a new one
+      while the others wait for it, so concurrent sessions never stampede the token endpoint.
+    - Proactive: a background timer refreshes the token `refresh_margin` seconds before it
+      expires, so requests normally never wait for a refresh.
+    - Retries failed fetches with jittered exponential backoff over a pooled `requests.Session`.
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        token_url: Optional[str] = None,
+        refresh_margin: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        background_refresh: bool = True,
+    ):
+        """
+        Args:
+            client_id (str): The client ID for authentication. Defaults to `CISCO_CLIENT_ID` from Streamlit secrets or environment.
+            client_secret (str): The client secret for authentication. Defaults to `CISCO_CLIENT_SECRET` from Streamlit secrets or environment.
+            token_url (str): The URL for token generation. Defaults to `CISCO_TOKEN_URL` from Streamlit secrets or environment.
+            refresh_margin (float): Seconds before expiry at which the token is refreshed in the background.
+                Defaults to the `TOKEN_REFRESH_MARGIN_SECONDS` setting (300).
+            max_retries (int): Retries of a failed token request. Defaults to the `TOKEN_MAX_RETRIES` setting (3).
+            backoff (float): Base delay in seconds between retries. Defaults to the `TOKEN_BACKOFF_SECONDS` setting (1).
+            background_refresh (bool): Whether to refresh the token ahead of its expiry in a background thread.
+        """
+        self.client_id = client_id or get_setting("CISCO_CLIENT_ID")
+        self.client_secret = client_secret or get_setting("CISCO_CLIENT_SECRET")
+        self.token_url = token_url or get_setting("CISCO_TOKEN_URL")
+
+        if not all([self.client_id, self.client_secret, self.token_url]):
+            raise ValueError(
+                "Missing required parameters. Ensure `client_id`, `client_secret`, and `token_url` are set."
+            )
+
+        self.refresh_margin = (
+            refresh_margin
+            if refresh_margin is not None
+            else get_float_setting("TOKEN_REFRESH_MARGIN_SECONDS", 300)
+        )
+        self.max_retries = (
+            max_retries if max_retries is not None else get_int_setting("TOKEN_MAX_RETRIES", 3)
+        )
+        self.backoff = backoff if backoff is not None else get_float_setting("TOKEN_BACKOFF_SECONDS", 1)
+        self.background_refresh = background_refresh
+
+        self._token: Optional[str] = None
+        self._expiry = 0.0  # UNIX timestamp after which the token must not be used
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._session = requests.Session()
+
+        # Number of token requests sent, useful to check the single-flight behaviour
+        self.fetch_count = 0
+
+    def get_token(self, force_refresh: bool = False) -> Optional[str]:
+        """
+        Returns a valid access token, fetching a new one if needed.
+
+        Args:
+            force_refresh (bool): Fetch a new token even if the cached one is still valid,
+                e.g. after the API rejected it.
+
+        Returns:
+            str: The access token if successfully retrieved, None otherwise.
+        """
+        token = self._token
+        if token and not force_refresh and time.time() < self._expiry:
+            return token
+
+        with self._lock:
+            # Another caller may have refreshed the token while this one was waiting
+            if self._token and time.time() < self._expiry and (
+                not force_refresh or self._token != token
+            ):
+                return self._token
+            return self._refresh()
+
+    def clear(self) -> None:
+        """Clears the cached token and cancels the scheduled background refresh."""
+        with self._lock:
+            self._cancel_timer()
+            self._token = None
+            self._expiry = 0.0
+
+    def stop(self) -> None:
+        """Stops the background refresh. The cached token stays usable until it expires."""
+        with self._lock:
+            self._cancel_timer()
+            self.background_refresh = False
+
+    def _refresh(self) -> Optional[str]:
+        """Fetches a new token. Must be called with the lock held."""
+        try:
+            response_data = self._fetch()
+        except Exception as err:
+            print(f"An error occurred while fetching the authentication token: {err}")
+            traceback.print_exc()
+            # Keep serving the current token while it is still valid
+            if self._token and time.time() < self._expiry:
+                self._schedule(min(60.0, (self._expiry - time.time()) / 2))
+                return self._token
+            return None
+
+        # ✅ Store the new token and expiry time
+        self._token = response_data.get("access_token")
+        expires_in = float(response_data.get("expires_in", 3600))  # Default to 1 hour if not provided
+        self._expiry = time.time() + expires_in - 10  # Buffer of 10 seconds
+
+        # Refresh ahead of expiry, but never more often than every second
+        self._schedule(max(1.0, expires_in - self.refresh_margin))
+
+        return self._token
+
+    def _fetch(self) -> dict:
+        """Requests a token from the token endpoint, retrying with jittered exponential backoff."""
+        credentials = f"{self.client_id}:{self.client_secret}"
+        encoded_credentials = base64.b64encode(credentials.encode("utf-8")).decode("utf-8")
+        headers = {
+            "Accept": "*/*",
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Authorization": f"Basic {encoded_credentials}",
+        }
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.fetch_count += 1
+                response = self._session.post(
+                    self.token_url, headers=headers, data="grant_type=client_credentials", timeout=30
+                )
+                response.raise_for_status()
+                return response.json()
+
+            except requests.exceptions.RequestException as err:
+                # Client errors (bad credentials) will not go away by retrying
+                status = getattr(err.response, "status_code", None)
+                if attempt == self.max_retries or (status and 400 <= status < 500 and status != 429):
+                    raise
+                delay = self.backoff * (2**attempt) * random.uniform(0.5, 1.5)
+                print(f"Token request failed ({err}), retrying in {delay:.1f} seconds.")
+                time.sleep(delay)
+
+    def _schedule(self, delay: float) -> None:
+        self._cancel_timer()
+        if not self.background_refresh:
+            return
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _background_refresh(self) -> None:
+        with self._lock:
+            self._refresh()
+
+
+_managers: Dict[Tuple[Optional[str], Optional[str]], TokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(
+    client_id: Optional[str] = None,
+    client_secret: Optional[str] = None,
+    token_url: Optional[str] = None,
+) -> TokenManager:
+    """Returns the process-wide TokenManager for a client and token URL, creating it on first use."""
+    key = (client_id or get_setting("CISCO_CLIENT_ID"), token_url or get_setting("CISCO_TOKEN_URL"))
+
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = TokenManager(client_id=client_id, client_secret=client_secret, token_url=token_url)
+            _managers[key] = manager
+        return manager
 
 
 def get_auth_token(
@@ -32,66 +216,13 @@ def get_auth_token(
     Returns:
         str: The access token if successfully retrieved, None otherwise.
     """
-    global _cached_token, _token_expiry
-
-    # ✅ Check if cached token is still valid
-    if _cached_token and time.time() < _token_expiry:
-        return _cached_token
-
-    # ✅ Fetch credentials from Streamlit secrets or environment
-    client_id = (
-        client_id or st.secrets.get("CISCO_CLIENT_ID") or os.getenv("CISCO_CLIENT_ID")
-    )
-    client_secret = (
-        client_secret
-        or st.secrets.get("CISCO_CLIENT_SECRET")
-        or os.getenv("CISCO_CLIENT_SECRET")
-    )
-    token_url = (
-        token_url or st.secrets.get("CISCO_TOKEN_URL") or os.getenv("CISCO_TOKEN_URL")
-    )
-
-    if not all([client_id, client_secret, token_url]):
-        raise ValueError(
-            "Missing required parameters. Ensure `client_id`, `client_secret`, and `token_url` are set."
-        )
-
-    payload = "grant_type=client_credentials"
-    credentials = f"{client_id}:{client_secret}"
-    encoded_credentials = base64.b64encode(credentials.encode("utf-8")).decode("utf-8")
-    headers = {
-        "Accept": "*/*",
-        "Content-Type": "application/x-www-form-urlencoded",
-        "Authorization": f"Basic {encoded_credentials}",
-    }
-
-    try:
-        response = requests.post(token_url, headers=headers, data=payload)
-        response.raise_for_status()
-        response_data = response.json()
-
-        # ✅ Store the new token and expiry time
-        _cached_token = response_data.get("access_token")
-        expires_in = response_data.get(
-            "expires_in", 3600
-        )  # Default to 1 hour if not provided
-        _token_expiry = time.time() + expires_in - 10  # Buffer of 10 seconds
-
-        return _cached_token
-
-    except requests.exceptions.HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err}")
-    except Exception as err:
-        print(f"An error occurred: {err}")
-        traceback.print_exc()
-
-    return None
+    return get_token_manager(client_id, client_secret, token_url).get_token()
 
 
 def clear_auth_token():
     """
-    Clears the cached authentication token.
+    Clears the cached authentication tokens.
     """
-    global _cached_token, _token_expiry
-    _cached_token = None
-    _token_expiry = 0
+    with _managers_lock:
+        for manager in _managers.values():
+            manager.clear()
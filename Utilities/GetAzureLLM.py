@@ -1,16 +1,77 @@
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
+import httpx
 from langchain_openai import AzureChatOpenAI
 import streamlit as st
-from typing import Optional
+from typing import Optional, Tuple
 from Utilities.GetAuthToken import (
-    get_auth_token,
+    TokenManager,
+    get_token_manager,
 )
+from Utilities.GetHttpClient import PerLoopTransport
 
 # Load environment variables
 load_dotenv()
 
 
+class TokenAuth(httpx.Auth):
+    """
+    Sets the `api-key` header of every LLM request from the token manager, so a long-lived
+    client always sends the current token. A 401 forces one refresh and a single retry.
+    """
+
+    def __init__(self, token_manager: TokenManager):
+        self.token_manager = token_manager
+
+    def sync_auth_flow(self, request: httpx.Request):
+        token = self.token_manager.get_token()
+        request.headers["api-key"] = token or ""
+        response = yield request
+
+        if response.status_code == 401:
+            request.headers["api-key"] = self.token_manager.get_token(force_refresh=True) or ""
+            yield request
+
+    async def async_auth_flow(self, request: httpx.Request):
+        # A refresh may hit the token endpoint, keep it off the event loop
+        token = await asyncio.to_thread(self.token_manager.get_token)
+        request.headers["api-key"] = token or ""
+        response = yield request
+
+        if response.status_code == 401:
+            token = await asyncio.to_thread(self.token_manager.get_token, True)
+            request.headers["api-key"] = token or ""
+            yield request
+
+
+_http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+_http_clients_lock = threading.Lock()
+
+
+def get_llm_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Returns the process-wide sync and async HTTP clients of the LLM.
+
+    Keep-alive connections to the Azure endpoint are reused across requests, sessions and
+    LLM instances. The async client keeps a connection pool per event loop, so it can be
+    used from any loop.
+    """
+    global _http_clients
+
+    with _http_clients_lock:
+        if _http_clients is None:
+            auth = TokenAuth(get_token_manager())
+            limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            timeout = httpx.Timeout(600.0, connect=10.0)
+            _http_clients = (
+                httpx.Client(auth=auth, limits=limits, timeout=timeout),
+                httpx.AsyncClient(auth=auth, transport=PerLoopTransport(limits), timeout=timeout),
+            )
+        return _http_clients
+
+
 def get_azure_llm(
     deployment_name: Optional[str] = None,
     azure_endpoint: Optional[str] = None,
@@ -60,17 +121,25 @@ def get_azure_llm(
         )
 
     # ✅ Fetch authentication token
-    api_key = get_auth_token()
+    api_key = get_token_manager().get_token()
     if not api_key:
         raise ValueError("Failed to retrieve Cisco authentication token.")
 
+    # ✅ The pooled clients replace the `api-key` header with the current token on every request,
+    # so the instance never needs to be rebuilt when the token rotates
+    http_client, http_async_client = get_llm_http_clients()
+
     # ✅ Return the configured LLM instance
     return AzureChatOpenAI(
         deployment_name=deployment_name,
         azure_endpoint=azure_endpoint,
         api_key=api_key,
+        http_client=http_client,
+        http_async_client=http_async_client,
         api_version=api_version,
         verbose=True,
         temperature=0.2,
+        # Report token usage on streamed responses too
+        stream_usage=True,
         model_kwargs={"user": f'{{"appkey": "{app_key}", "user": "{user_id}"}}'},
     )
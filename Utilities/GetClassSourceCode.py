@@ -1,11 +1,87 @@
 from Utilities.RemoveComments import remove_comments
-from DocumentLoaders.LoadGithubFile import load_github_files
+from DocumentLoaders.LoadGithubFile import aload_github_file, load_github_file
+from DocumentLoaders.RepoIndex import get_repo_index
+
+OBJECT_TYPE_NAMES = {
+    "clas": "Class",
+    "intf": "Interface",
+    "tabl": "Table",
+    "prog": "Program",
+    "ddls": "CDS View",
+}
+
+
+def get_object_source_code(
+    object_name: str,
+    object_type: str,
+    repo: str = "cisco-it-finance/sap-brim-repo",
+    branch: str = "dha-main",
+):
+    """
+    Fetches the source code of an ABAP object from a GitHub repository and removes comments from it.
+    The object is located through the repository index, so it can live in any package of the repository.
+    Args:
+        object_name (str): The name of the ABAP object, e.g. `ZCL_FOO`.
+        object_type (str): The abapGit object type, e.g. 'clas' or 'intf'.
+        branch (str, optional): The branch of the GitHub repository to fetch the source code from. Defaults to "dha-main".
+    Returns:
+        str: The cleaned source code of the specified ABAP object with comments removed.
+    """
+
+    object_label = OBJECT_TYPE_NAMES.get(object_type.lower(), "Object")
+
+    # ✅ Unknown objects are answered from the in-memory index, without a round trip to GitHub
+    entry = get_repo_index(repo, branch).lookup(object_name, object_type)
+    if not entry:
+        raise ValueError(f"{object_label} '{object_name}' not found in the repository.")
+
+    document = load_github_file(
+        repo=repo,
+        branch=branch,
+        file_path=entry.path,
+        sha=entry.sha,
+    )
+
+    if not document:
+        raise ValueError(f"{object_label} '{object_name}' not found in the repository.")
+
+    cleaned_code = remove_comments(document.page_content)
+
+    return cleaned_code
+
+async def aget_object_source_code(
+    object_name: str,
+    object_type: str,
+    repo: str = "cisco-it-finance/sap-brim-repo",
+    branch: str = "dha-main",
+):
+    """
+    Async version of `get_object_source_code`, for the async graph path.
+    """
+
+    object_label = OBJECT_TYPE_NAMES.get(object_type.lower(), "Object")
+
+    entry = await get_repo_index(repo, branch).alookup(object_name, object_type)
+    if not entry:
+        raise ValueError(f"{object_label} '{object_name}' not found in the repository.")
+
+    document = await aload_github_file(
+        repo=repo,
+        branch=branch,
+        file_path=entry.path,
+        sha=entry.sha,
+    )
+
+    if not document:
+        raise ValueError(f"{object_label} '{object_name}' not found in the repository.")
+
+    return remove_comments(document.page_content)
 
 def get_class_source_code(
     class_name: str,
     repo: str = "cisco-it-finance/sap-brim-repo",
     branch: str = "dha-main",
-):  
+):
     """
     Fetches the source code of a specified ABAP class from a GitHub repository and removes comments from it.
     Args:
@@ -14,28 +90,17 @@ def get_class_source_code(
     Returns:
         str: The cleaned source code of the specified ABAP class with comments removed.
     """
-    
+
     if not class_name:
         raise ValueError("`class_name` cannot be empty.")
-    
-    document = load_github_files(
-        repo=repo,
-        branch=branch,
-        file_filter=lambda file_path: file_path == f"zs4intcpq/{class_name.lower()}.clas.abap",
-    )
-
-    if not document:
-        raise ValueError(f"Class '{class_name}' not found in the repository.")
-    
-    cleaned_code = remove_comments(document[0].page_content)
 
-    return cleaned_code
+    return get_object_source_code(class_name, "clas", repo=repo, branch=branch)
 
 def get_interface_source_code(
     interface_name: str,
     repo: str = "cisco-it-finance/sap-brim-repo",
     branch: str = "dha-main",
-):  
+):
     """
     Fetches the source code of a specified ABAP interface from a GitHub repository and removes comments from it.
     Args:
@@ -44,19 +109,36 @@ def get_interface_source_code(
     Returns:
         str: The cleaned source code of the specified ABAP interface with comments removed.
     """
-    
+
     if not interface_name:
         raise ValueError("`interface_name` cannot be empty.")
-    
-    document = load_github_files(
-        repo=repo,
-        branch=branch,
-        file_filter=lambda file_path: file_path == f"zs4intcpq/{interface_name.lower()}.intf.abap",
-    )
 
-    if not document:
-        raise ValueError(f"Interface '{interface_name}' not found in the repository.")
-    
-    cleaned_code = remove_comments(document[0].page_content)
+    return get_object_source_code(interface_name, "intf", repo=repo, branch=branch)
+
+async def aget_class_source_code(
+    class_name: str,
+    repo: str = "cisco-it-finance/sap-brim-repo",
+    branch: str = "dha-main",
+):
+    """
+    Async version of `get_class_source_code`.
+    """
+
+    if not class_name:
+        raise ValueError("`class_name` cannot be empty.")
+
+    return await aget_object_source_code(class_name, "clas", repo=repo, branch=branch)
+
+async def aget_interface_source_code(
+    interface_name: str,
+    repo: str = "cisco-it-finance/sap-brim-repo",
+    branch: str = "dha-main",
+):
+    """
+    Async version of `get_interface_source_code`.
+    """
+
+    if not interface_name:
+        raise ValueError("`interface_name` cannot be empty.")
 
-    return cleaned_code
\ No newline at end of file
+    return await aget_object_source_code(interface_name, "intf", repo=repo, branch=branch)
@@ -0,0 +1,56 @@
+import os
+from typing import Any, Optional
+from dotenv import load_dotenv
+import streamlit as st
+
+# Load environment variables
+load_dotenv()
+
+
+def get_setting(name: str, default: Optional[Any] = None) -> Optional[Any]:
+    """
+    Reads a deployment setting from Streamlit secrets or the environment.
+
+    Args:
+        name (str): The name of the setting, e.g. `SOURCE_CACHE_DIR`.
+        default (Any): Value returned when the setting is not configured anywhere.
+
+    Returns:
+        The configured value, or `default` when it is not set.
+    """
+    # ✅ Streamlit secrets are not available when running outside of `streamlit run`
+    try:
+        value = st.secrets.get(name)
+    except Exception:
+        value = None
+
+    if value is None:
+        value = os.getenv(name)
+
+    return default if value is None else value
+
+
+def get_int_setting(name: str, default: int) -> int:
+    """Reads an integer setting, falling back to `default` when unset or malformed."""
+    try:
+        return int(get_setting(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_float_setting(name: str, default: float) -> float:
+    """Reads a float setting, falling back to `default` when unset or malformed."""
+    try:
+        return float(get_setting(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_bool_setting(name: str, default: bool = False) -> bool:
+    """Reads a boolean setting such as `true`, `1`, `yes` or `on`."""
+    value = get_setting(name)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
@@ -1,9 +1,76 @@
-import re
-from typing import Dict, List
-from Utilities.GetClassSourceCode import get_class_source_code
-from Utilities.RemoveComments import remove_comments
+from typing import Dict, List, NamedTuple
+from Utilities.AbapClass import AbapClass, get_abap_class
+from Utilities.AbapLexer import PUNCT, STRING, WORD, iter_statements, tokenize
 from langchain_core.tools import tool
 
+# Prefixes of the global classes reported as dependencies
+CLASS_PREFIXES = ("CL_", "ZCL_")
+
+class MethodDependencies(NamedTuple):
+    """Dependencies found in a piece of ABAP code, each list unique and in order of first appearance."""
+
+    tables: List[str]
+    function_modules: List[str]
+    classes: List[str]
+
+def scan_dependencies(method_body: str) -> MethodDependencies:
+    """
+    Extracts the tables, function modules and classes used by ABAP code in a single pass over
+    its statements. Comments and string literals never produce false matches.
+
+    Args:
+        method_body: The ABAP method code as a string.
+
+    Returns:
+        The tables used in SELECT queries, the function modules called, and the classes
+        instantiated or called statically, in uppercase.
+    """
+    tables, function_modules, classes = {}, {}, {}
+
+    for statement in iter_statements(tokenize(method_body)):
+        words = [token.upper if token.kind == WORD else None for token in statement]
+        is_select = "SELECT" in words
+
+        for index, token in enumerate(statement):
+            next_token = statement[index + 1] if index + 1 < len(statement) else None
+            word = words[index]
+
+            # Tables after FROM or any type of JOIN in SELECT queries
+            if is_select and word in ("FROM", "JOIN"):
+                # Skip the brackets of nested joins: FROM ( ( ztab AS a INNER JOIN ...
+                table_index = index + 1
+                while table_index < len(statement) and statement[table_index].text == "(":
+                    table_index += 1
+                if table_index < len(statement) and statement[table_index].kind == WORD:
+                    tables.setdefault(statement[table_index].upper, None)
+
+            # CALL FUNCTION 'NAME'
+            elif word == "FUNCTION" and index > 0 and words[index - 1] == "CALL":
+                if next_token and next_token.kind == STRING and next_token.text[:1] == "'":
+                    function_modules.setdefault(next_token.text.strip("'").upper(), None)
+
+            # NEW zcl_foo( ) and CREATE OBJECT lo_obj TYPE zcl_foo
+            elif word in ("NEW", "TYPE") and next_token and next_token.kind == WORD:
+                is_instantiation = word == "NEW" or (
+                    index >= 3 and words[index - 3] == "CREATE" and words[index - 2] == "OBJECT"
+                )
+                if is_instantiation and next_token.upper.startswith(CLASS_PREFIXES):
+                    classes.setdefault(next_token.upper, None)
+
+            # Static method calls: cl_salv_table=>factory( ... )
+            elif (
+                token.kind == WORD
+                and word.startswith(CLASS_PREFIXES)
+                and index + 3 < len(statement)
+                and next_token.kind == PUNCT
+                and next_token.text == "=>"
+                and statement[index + 2].kind == WORD
+                and statement[index + 3].text == "("
+            ):
+                classes.setdefault(word, None)
+
+    return MethodDependencies(list(tables), list(function_modules), list(classes))
+
 def extract_table_names(method_body: str) -> List[str]:
     """
     Extracts table names from SAP ABAP SELECT queries in the given class code.
@@ -14,44 +81,7 @@ def extract_table_names(method_body: str) -> List[str]:
     Returns:
         A list of table names used in the SELECT queries, ensuring uniqueness and maintaining order.
     """
-    # Regex to capture SELECT queries and table names
-    # select_query_pattern = re.compile(
-    #     r"SELECT\s+.*?\s+FROM\s+.*?(?=INTO|WHERE|ORDER|GROUP|END|$)",
-    #     re.IGNORECASE | re.DOTALL,
-    # )
-
-    select_query_pattern = re.compile(
-        r"\bSELECT\b.*?\bFROM\b.*?(?=\bINTO\b|\bWHERE\b|\bORDER\b|\bGROUP\b|\bHAVING\b|\bENDSELECT\b|$)",
-        re.IGNORECASE | re.DOTALL
-    )
-    # Regex to extract tables after FROM or any type of JOIN
-    # table_pattern = re.compile(
-    #     r"(?:FROM|JOIN|LEFT\s+JOIN|RIGHT\s+JOIN|INNER\s+JOIN|OUTER\s+JOIN|LEFT\s+OUTER\s+JOIN|RIGHT\s+OUTER\s+JOIN)\s+([a-zA-Z0-9_/\~]+)(?=\s+|$)",
-    #     re.IGNORECASE
-    # )
-
-    table_pattern = re.compile(
-        r"(?i)\b(?:FROM|(?:(?:LEFT|RIGHT|FULL|INNER|CROSS)\s*(?:OUTER\s*)?)?JOIN)\s+([A-Za-z0-9_]+)",
-        re.IGNORECASE
-    )
-    
-    # To maintain the order and uniqueness:
-    seen_tables = set()
-    ordered_tables = []
-
-    # Find all SELECT queries
-    for match in select_query_pattern.finditer(method_body):
-        query = match.group(0).strip()  # Extract the entire SELECT query
-
-        # Extract table names that appear after FROM or JOIN
-        tables_in_query = table_pattern.findall(query)
-        for tbl in tables_in_query:
-            table_upper = tbl.upper()  # or keep original case if you prefer
-            if table_upper not in seen_tables:
-                seen_tables.add(table_upper)
-                ordered_tables.append(table_upper)
-        
-    return ordered_tables
+    return scan_dependencies(method_body).tables
 
 def extract_class_references(method_body: str) -> List[str]:
     """
@@ -64,44 +94,7 @@ def extract_class_references(method_body: str) -> List[str]:
     Returns:
         A list of unique class names (in uppercase), preserving the order of first appearance.
     """
-    # 1) Pattern for object instantiations:
-    #    - CREATE OBJECT lo_obj TYPE CL_FOO
-    #    - DATA(lo_obj) = NEW ZCL_BAR( )
-    #    - NEW CL_BAZ( )
-    instantiation_pattern = re.compile(
-        r"\b(?:CREATE\s+OBJECT\s+\w+\s+TYPE\s+|CREATE\s+OBJECT\s+|DATA\s*\(\w+\)\s*=\s*NEW\s+|NEW\s+)(CL_\w+|ZCL_\w+)",
-        re.IGNORECASE
-    )
-
-    # 2) Pattern for static method calls:
-    #    - cl_salv_table=>factory( ... )
-    #    - zcl_custom=>do_something( ... )
-    #    - Possibly with or without spaces, e.g. "CL_FOO => method("
-    #      or "CL_FOO=>method("
-    static_call_pattern = re.compile(
-        r"\b(CL_\w+|ZCL_\w+)\s*=>\s*\w+\s*\(",
-        re.IGNORECASE
-    )
-
-    # Find all classes from instantiations
-    instantiations = instantiation_pattern.findall(method_body)
-
-    # Find all classes from static calls
-    static_calls = static_call_pattern.findall(method_body)
-
-    # Combine both lists
-    all_classes = instantiations + static_calls
-
-    # Remove duplicates while preserving order
-    seen = set()
-    ordered_unique = []
-    for class_name in all_classes:
-        uc_name = class_name.upper()
-        if uc_name not in seen:
-            seen.add(uc_name)
-            ordered_unique.append(uc_name)
-
-    return ordered_unique
+    return scan_dependencies(method_body).classes
 
 @tool
 def get_dependencies(class_name: str) -> Dict[str, Dict[str, List[str]]]:
@@ -117,24 +110,33 @@ def get_dependencies(class_name: str) -> Dict[str, Dict[str, List[str]]]:
     if not class_name:
         raise ValueError("Please provide a `class_name`.")
     
-    class_code = get_class_source_code(class_name)
+    # Parsed once and shared with the class tools
+    abap_class = get_abap_class(class_name)
 
-    class_code = remove_comments(class_code)
-    
+    return extract_dependencies(abap_class)
+
+def extract_dependencies(abap_class: AbapClass) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Extracts the interfaces of a parsed class and the tables, function modules and classes
+    used by each of its methods.
+
+    Args:
+        abap_class: The parsed ABAP class.
+
+    Returns:
+        A dictionary with the interfaces and the dependencies per method.
+    """
     dependencies = {
         "interfaces": [],
         "methods": {},
     }
 
     # Extract interfaces
-    interface_pattern = re.compile(r"\bINTERFACES\s+(\w+)", re.IGNORECASE)
-    dependencies["interfaces"] = [interface.upper() for interface in interface_pattern.findall(class_code)]
-
-    # Extract methods
-    method_pattern = re.compile(r"\b[Mm]ETHOD\s+([/\w~]+)\s*\.", re.IGNORECASE)
-    methods = [method.upper() for method in method_pattern.findall(class_code)]
+    dependencies["interfaces"] = list(abap_class.interfaces)
 
-    for method in methods:
+    # Extract methods, already split out of the class in a single pass
+    for abap_method in abap_class.methods:
+        method = abap_method.name.upper()
         dependencies["methods"][method] = {
             "codelines": 0,
             "tables": [],
@@ -144,27 +146,17 @@ def get_dependencies(class_name: str) -> Dict[str, Dict[str, List[str]]]:
         }
 
         # Extract method body
-        method_body_pattern = re.compile(
-            r"METHOD\s+" + method + r".*?ENDMETHOD", re.IGNORECASE | re.DOTALL
-        )
-        method_body = method_body_pattern.search(class_code).group()
+        method_body = abap_class.method_code(abap_method)
         dependencies["methods"][method]["source_code"] = method_body
         
         # Count lines of ABAP code in the method body, excluding blank lines
         code_lines = [line for line in method_body.splitlines() if line.strip()]
         dependencies["methods"][method]["codelines"] = len(code_lines)
 
-        # Extract tables being used in SELECT queries 
-        dependencies["methods"][method]["tables"] = extract_table_names(method_body)
-
-        # Extract function modules
-        function_pattern = re.compile(r"CALL\s+FUNCTION\s+'(\w+)'", re.IGNORECASE)
-        
-        function_modules = [function.upper() for function in function_pattern.findall(method_body)]
-        dependencies["methods"][method]["function_modules"] = list(set(function_modules))
-
-        # Extract class instantiations and static method calls
-        dependencies["methods"][method]["classes"] = extract_class_references(method_body)   
+        # Extract tables, function modules and classes in one pass over the method body
+        method_dependencies = scan_dependencies(method_body)
+        dependencies["methods"][method]["tables"] = method_dependencies.tables
+        dependencies["methods"][method]["function_modules"] = method_dependencies.function_modules
+        dependencies["methods"][method]["classes"] = method_dependencies.classes
 
     return dependencies
-
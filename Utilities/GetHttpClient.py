@@ -0,0 +1,61 @@
+import asyncio
+import weakref
+
+import httpx
+
+from Utilities.Telemetry import httpx_event_hooks
+
+# ✅ One async client (and connection pool) per event loop, as httpx clients are bound to their loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared non-blocking HTTP client of the running event loop.
+
+    Connections are kept alive and reused by all async GitHub and OData requests made on the loop.
+    Every request is recorded as a telemetry span.
+    """
+    loop = asyncio.get_running_loop()
+
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            event_hooks=httpx_event_hooks(),
+        )
+        _async_clients[loop] = client
+
+    return client
+
+
+class PerLoopTransport(httpx.AsyncBaseTransport):
+    """
+    An async transport keeping one connection pool per event loop.
+
+    Clients that outlive a loop (e.g. handed to an LLM instance once and used from every
+    session) send each request through the pool of the loop it runs on.
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        self.limits = limits
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+
+        return await transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
@@ -0,0 +1,300 @@
+import asyncio
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+
+from Utilities.GetConfig import get_float_setting, get_int_setting
+from Utilities.GetHttpClient import get_async_http_client
+from Utilities.SchemaCache import CachedSchema, SchemaCache, get_schema_cache
+from Utilities.Telemetry import requests_hook
+
+# Define system mappings
+SYSTEM_CONFIG = {
+    "RHA": {
+        "hostname": "https://saphec-preprod.cisco.com:44300",
+        "sap_client": 300,
+    },
+    "D2A": {
+        "hostname": "https://saphec-dv2.cisco.com:44300",
+        "sap_client": 110,
+    },
+    "DHA": {
+        "hostname": "https://saphec-dev.cisco.com:44300",
+        "sap_client": 110,
+    },
+}
+
+TABLE_FIELDS_PATH = "/sap/opu/odata4/sap/zsb_table_schema/srvd_a2x/sap/zsd_table_schema/0001/TabFields"
+
+# Columns requested from TabFields (`$select`), nothing else is sent over the wire
+SELECT_FIELDS = ["tableName", "fieldname", "keyflag", "datatype", "leng", "decimals", "description"]
+
+# Transient statuses worth retrying
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def _quote(value: str) -> str:
+    """Quotes a string literal for an OData filter."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def build_table_fields_filter(table_names: Iterable[str], field_names: Optional[List[str]] = None) -> str:
+    """
+    Builds the `$filter` of a TabFields request for one or more tables.
+
+    Without field names only the key fields are requested.
+    """
+    tables = " or ".join(f"tableName eq {_quote(table)}" for table in table_names)
+
+    # Construct the fieldname filter dynamically
+    if isinstance(field_names, list) and field_names:
+        filters = " or ".join(f"fieldname eq {_quote(field)}" for field in field_names)
+    else:
+        filters = "keyflag eq true"  # Fetch only the key fields
+
+    return f"({tables}) and ({filters})"
+
+
+class ODataClient:
+    """
+    Client of the table schema OData service of one SAP system.
+
+    All requests go through one `requests.Session` with a pooled HTTPAdapter, so the TCP/TLS
+    connections are kept alive across tool calls. Connection errors and transient statuses
+    are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        system_id: str,
+        user_name: str,
+        password: str,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        timeout: float = 10,
+    ):
+        """
+        Args:
+            system_id: The SAP system, one of `SYSTEM_CONFIG`.
+            user_name: User name for the Basic Auth of the API calls.
+            password: Password for the Basic Auth of the API calls.
+            max_retries: Retries of a failed request. Defaults to the `ODATA_MAX_RETRIES` setting (3).
+            backoff: Backoff factor in seconds between retries. Defaults to the `ODATA_BACKOFF_SECONDS` setting (0.5).
+            timeout: Timeout of a single request in seconds.
+        """
+        system_id = system_id.upper()
+        if system_id not in SYSTEM_CONFIG:
+            raise ValueError(
+                f"Invalid system_id: {system_id}. Allowed values: {list(SYSTEM_CONFIG.keys())}"
+            )
+
+        self.system_id = system_id
+        self.hostname = SYSTEM_CONFIG[system_id]["hostname"]
+        self.sap_client = SYSTEM_CONFIG[system_id]["sap_client"]
+        self.user_name = user_name
+        self.password = password
+        self.timeout = timeout
+        self.max_retries = max_retries if max_retries is not None else get_int_setting("ODATA_MAX_RETRIES", 3)
+        self.backoff = backoff if backoff is not None else get_float_setting("ODATA_BACKOFF_SECONDS", 0.5)
+
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.auth = HTTPBasicAuth(user_name, password)
+        self.session.hooks["response"].append(requests_hook("odata"))
+
+    def table_fields_url(
+        self, table_names: List[str], field_names: Optional[List[str]] = None
+    ) -> str:
+        """Returns the URL of a TabFields request."""
+        if not table_names:
+            raise ValueError("Please provide the `table_name`.")
+
+        filters = quote(build_table_fields_filter(table_names, field_names), safe="()'")
+
+        # Construct the full API URL with filters
+        return (
+            f"{self.hostname}{TABLE_FIELDS_PATH}?"
+            f"$filter={filters}"
+            f"&$select={','.join(SELECT_FIELDS)}"
+            f"&sap-client={self.sap_client}"
+        )
+
+    def get_table_fields(
+        self, table_names: List[str], field_names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetches the fields of one or more tables in a single request.
+
+        Returns:
+            The OData response; each row carries its `tableName`.
+        """
+        url = self.table_fields_url(table_names, field_names)
+
+        response = self.session.get(url, timeout=self.timeout)
+
+        # Check for successful response
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise Exception(f"Error: {response.status_code} - {response.reason}")
+
+    async def aget_table_fields(
+        self, table_names: List[str], field_names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Async version of `get_table_fields`, using the shared non-blocking HTTP client."""
+        url = self.table_fields_url(table_names, field_names)
+        client = get_async_http_client()
+        auth = httpx.BasicAuth(self.user_name, self.password)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.get(url, auth=auth, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    break
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2**attempt))
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise Exception(f"Error: {response.status_code} - {response.reason_phrase}")
+
+    def get_table_schemas(
+        self, table_names: List[str], field_names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Returns the fields of one or more tables, served from the schema cache where possible.
+
+        The tables missing from the cache are fetched together in a single request.
+        """
+        cache = get_schema_cache()
+        cached, missing = self._lookup(cache, table_names, field_names)
+
+        if missing:
+            response = self.get_table_fields(missing, field_names)
+            stale = self._cache_response(cache, missing, field_names, response, cached)
+            if stale:
+                # The metadata etag changed, the schemas cached before are outdated
+                response = self.get_table_fields(stale, field_names)
+                self._cache_response(cache, stale, field_names, response, cached)
+
+        return self._assemble(table_names, cached)
+
+    async def aget_table_schemas(
+        self, table_names: List[str], field_names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Async version of `get_table_schemas`. Cache I/O runs in a worker thread."""
+        cache = get_schema_cache()
+        cached, missing = await asyncio.to_thread(self._lookup, cache, table_names, field_names)
+
+        if missing:
+            response = await self.aget_table_fields(missing, field_names)
+            stale = await asyncio.to_thread(
+                self._cache_response, cache, missing, field_names, response, cached
+            )
+            if stale:
+                response = await self.aget_table_fields(stale, field_names)
+                await asyncio.to_thread(self._cache_response, cache, stale, field_names, response, cached)
+
+        return self._assemble(table_names, cached)
+
+    def _lookup(
+        self, cache: SchemaCache, table_names: List[str], field_names: Optional[List[str]]
+    ) -> Tuple[Dict[str, Optional[CachedSchema]], List[str]]:
+        cached: Dict[str, Optional[CachedSchema]] = {}
+        missing = []
+        for table_name in table_names:
+            entry = cache.get(self.system_id, table_name, field_names)
+            if entry:
+                cached[table_name] = entry
+            else:
+                missing.append(table_name)
+
+        # ✅ Every response carries the metadata etag: when everything is cached, one table is
+        # fetched again now and then, so a changed etag is noticed without waiting for a miss
+        if not missing and cached and cache.claim_etag_check(self.system_id):
+            missing.append(table_names[0])
+            del cached[table_names[0]]
+        return cached, missing
+
+    def _cache_response(
+        self,
+        cache: SchemaCache,
+        table_names: List[str],
+        field_names: Optional[List[str]],
+        response: Dict[str, Any],
+        cached: Dict[str, Optional[CachedSchema]],
+    ) -> List[str]:
+        """
+        Stores the rows of a response per table into the cache and into `cached`.
+
+        Returns:
+            The tables taken from the cache whose entries predate the etag of the response.
+        """
+        context = response.get("@odata.context", "")
+        etag = response.get("@odata.metadataEtag", "")
+        cache.update_etag(self.system_id, etag)
+
+        rows_by_table: Dict[str, List[dict]] = {}
+        for row in response.get("value", []):
+            rows_by_table.setdefault(str(row.get("tableName", "")).upper(), []).append(row)
+
+        for table_name in table_names:
+            rows = rows_by_table.get(table_name.upper())
+            # Unknown tables are not cached, they may be created later
+            cached[table_name] = (
+                cache.put(self.system_id, table_name, field_names, rows, context, etag) if rows else None
+            )
+
+        stale = [
+            table_name
+            for table_name, entry in cached.items()
+            if table_name not in table_names and entry and etag and entry.etag != etag
+        ]
+        return stale
+
+    @staticmethod
+    def _assemble(table_names: List[str], cached: Dict[str, Optional[CachedSchema]]) -> Dict[str, Any]:
+        """Builds a response in the shape of the OData service from the cached schemas."""
+        entries = [cached[table_name] for table_name in table_names if cached.get(table_name)]
+        newest = max(entries, key=lambda entry: entry.fetched_at, default=None)
+
+        return {
+            "@odata.context": newest.context if newest else "",
+            "@odata.metadataEtag": newest.etag if newest else "",
+            "value": [row for entry in entries for row in entry.rows],
+        }
+
+
+_clients: Dict[Tuple[str, str], ODataClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_odata_client(system_id: str, user_name: str, password: str) -> ODataClient:
+    """Returns the process-wide ODataClient of a system and user, creating it on first use."""
+    key = (system_id.upper(), user_name)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.password != password:
+            client = ODataClient(system_id, user_name, password)
+            _clients[key] = client
+        return client
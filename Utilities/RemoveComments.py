@@ -1,10 +1,11 @@
-import re
+from Utilities.AbapLexer import is_comment_line
 
 """
 Remove comment blocks from the provided source code.
 
-This function uses a regular expression to identify and remove blocks of 
-comments that consist of three or more consecutive comment lines.
+This function scans the source code line by line and removes blocks of 
+comments that consist of three or more consecutive comment lines 
+(blank lines in between are part of the block).
 
 Args:
     source_code (str): The source code from which to remove comment blocks.
@@ -14,10 +15,32 @@ Returns:
 """
 def remove_comments(source_code: str):
 
-    # Define regex to remove comment blocks (3 or more consecutive comment lines)
-    regex = r'(?:(?:^\s*[*"].*$\n?){3,})'
+    cleaned_lines = []
+    block = []  # Lines of the current comment block, including blank lines in between
+    blank_lines = []  # Blank lines not yet known to belong to a comment block
+    comment_count = 0
 
-    # Apply regex to clean up the code
-    cleaned_code = re.sub(regex, "", source_code, flags=re.MULTILINE)
+    def flush_block():
+        # Drop comment blocks with 3 or more comment lines, keep shorter ones
+        if comment_count < 3:
+            cleaned_lines.extend(block)
 
-    return cleaned_code
+    # Single linear pass over the lines, no backtracking
+    for line in source_code.splitlines(keepends=True):
+        if not line.strip():
+            blank_lines.append(line)
+        elif is_comment_line(line):
+            block.extend(blank_lines)
+            block.append(line)
+            blank_lines = []
+            comment_count += 1
+        else:
+            flush_block()
+            cleaned_lines.extend(blank_lines)
+            cleaned_lines.append(line)
+            block, blank_lines, comment_count = [], [], 0
+
+    flush_block()
+    cleaned_lines.extend(blank_lines)
+
+    return "".join(cleaned_lines)
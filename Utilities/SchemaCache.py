@@ -0,0 +1,255 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Utilities.GetConfig import get_setting, get_int_setting, get_float_setting
+
+
+def fields_key(field_names: Optional[List[str]]) -> str:
+    """Normalizes a field filter; the empty key stands for "key fields only"."""
+    if not isinstance(field_names, list) or not field_names:
+        return ""
+    return ",".join(sorted({field.strip().upper() for field in field_names}))
+
+
+@dataclass(frozen=True)
+class CachedSchema:
+    """The fields of one table, as returned by the table schema service."""
+
+    system_id: str
+    table_name: str
+    fields_key: str
+    rows: Tuple[dict, ...]
+    context: str  # `@odata.context` of the response the rows came from
+    etag: str  # `@odata.metadataEtag` of the response the rows came from
+    fetched_at: float
+
+
+class SchemaCache:
+    """
+    A two level (in-process LRU + SQLite) cache for DDIC table schemas.
+
+    Entries are keyed by system/table/field filter. Every response of the schema service
+    reports its `@odata.metadataEtag`; when the etag of a system changes, all the entries
+    stored under an older etag are dropped. The etag of a system is revalidated every
+    `etag_check_seconds`, even when every request is served from the cache; entries older
+    than the TTL are fetched again regardless.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 1024,
+        ttl_seconds: float = 24 * 60 * 60,
+        etag_check_seconds: float = 5 * 60,
+    ):
+        """
+        Initializes the SchemaCache.
+
+        Args:
+            db_path: Path of the SQLite database. `None` keeps the cache in memory only.
+            max_entries: Number of schemas held in memory (LRU evicted).
+            ttl_seconds: How long a schema is served before it is fetched again.
+            etag_check_seconds: How often the metadata etag of a system is revalidated.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.etag_check_seconds = etag_check_seconds
+
+        self._entries: "OrderedDict[tuple, CachedSchema]" = OrderedDict()
+        self._etags: Dict[str, str] = {}
+        self._etags_checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS schemas (
+                    system_id TEXT, table_name TEXT, fields_key TEXT,
+                    rows TEXT, context TEXT, etag TEXT, fetched_at REAL,
+                    PRIMARY KEY (system_id, table_name, fields_key))"""
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS etags (system_id TEXT PRIMARY KEY, etag TEXT)")
+            self._db.commit()
+            self._etags = dict(self._db.execute("SELECT system_id, etag FROM etags"))
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def get(
+        self, system_id: str, table_name: str, field_names: Optional[List[str]] = None
+    ) -> Optional[CachedSchema]:
+        """Returns the cached schema or `None` on a miss."""
+        key = (system_id.upper(), table_name.upper(), fields_key(field_names))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db:
+                entry = self._read_from_db(key)
+                if entry:
+                    self._store_in_memory(key, entry)
+
+            if entry and self._is_valid(entry):
+                self._entries.move_to_end(key)
+                return entry
+            return None
+
+    def put(
+        self,
+        system_id: str,
+        table_name: str,
+        field_names: Optional[List[str]],
+        rows: List[dict],
+        context: str = "",
+        etag: str = "",
+    ) -> CachedSchema:
+        """Adds (or replaces) a table schema and returns the stored entry."""
+        entry = CachedSchema(
+            system_id=system_id.upper(),
+            table_name=table_name.upper(),
+            fields_key=fields_key(field_names),
+            rows=tuple(rows),
+            context=context,
+            etag=etag,
+            fetched_at=time.time(),
+        )
+
+        with self._lock:
+            self._store_in_memory((entry.system_id, entry.table_name, entry.fields_key), entry)
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO schemas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        entry.system_id,
+                        entry.table_name,
+                        entry.fields_key,
+                        json.dumps(entry.rows),
+                        entry.context,
+                        entry.etag,
+                        entry.fetched_at,
+                    ),
+                )
+                self._db.commit()
+        return entry
+
+    def update_etag(self, system_id: str, etag: str) -> None:
+        """Records the current metadata etag of a system, dropping the entries stored under another one."""
+        system_id = system_id.upper()
+
+        with self._lock:
+            self._etags_checked_at[system_id] = time.time()
+            if not etag or self._etags.get(system_id) == etag:
+                return
+            self._etags[system_id] = etag
+
+            for key in [key for key, entry in self._entries.items() if key[0] == system_id and entry.etag != etag]:
+                del self._entries[key]
+
+            if self._db:
+                self._db.execute("DELETE FROM schemas WHERE system_id = ? AND etag != ?", (system_id, etag))
+                self._db.execute("INSERT OR REPLACE INTO etags VALUES (?, ?)", (system_id, etag))
+                self._db.commit()
+
+    def claim_etag_check(self, system_id: str) -> bool:
+        """
+        Whether the etag of a system is due for revalidation. The caller that gets True is
+        expected to send a request; the others keep using the cache until the next interval.
+        """
+        system_id = system_id.upper()
+
+        with self._lock:
+            now = time.time()
+            if now - self._etags_checked_at.get(system_id, 0.0) < self.etag_check_seconds:
+                return False
+            self._etags_checked_at[system_id] = now
+            return True
+
+    def invalidate(self, system_id: Optional[str] = None, table_name: Optional[str] = None) -> None:
+        """Drops the entries of a system (and table), or all of them."""
+        system_id = system_id.upper() if system_id else None
+        table_name = table_name.upper() if table_name else None
+
+        with self._lock:
+            for key in list(self._entries):
+                if (system_id is None or key[0] == system_id) and (table_name is None or key[1] == table_name):
+                    del self._entries[key]
+
+            if self._db:
+                self._db.execute(
+                    "DELETE FROM schemas WHERE (? IS NULL OR system_id = ?) AND (? IS NULL OR table_name = ?)",
+                    (system_id, system_id, table_name, table_name),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Removes every entry and known etag."""
+        self.invalidate()
+        with self._lock:
+            self._etags.clear()
+            if self._db:
+                self._db.execute("DELETE FROM etags")
+                self._db.commit()
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+
+    def _is_valid(self, entry: CachedSchema) -> bool:
+        current_etag = self._etags.get(entry.system_id)
+        if current_etag and entry.etag and entry.etag != current_etag:
+            return False
+        return time.time() - entry.fetched_at < self.ttl_seconds
+
+    def _store_in_memory(self, key: tuple, entry: CachedSchema) -> None:
+        """Adds an entry to the LRU and evicts the oldest ones beyond the budget. Caller holds the lock."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_from_db(self, key: tuple) -> Optional[CachedSchema]:
+        row = self._db.execute(
+            "SELECT rows, context, etag, fetched_at FROM schemas "
+            "WHERE system_id = ? AND table_name = ? AND fields_key = ?",
+            key,
+        ).fetchone()
+        if not row:
+            return None
+        rows, context, etag, fetched_at = row
+        return CachedSchema(*key, rows=tuple(json.loads(rows)), context=context, etag=etag, fetched_at=fetched_at)
+
+
+_schema_cache: Optional[SchemaCache] = None
+_schema_cache_lock = threading.Lock()
+
+
+def get_schema_cache() -> SchemaCache:
+    """
+    Returns the process-wide schema cache, configured from the `SCHEMA_CACHE_*` settings.
+
+    Settings:
+        SCHEMA_CACHE_PATH: SQLite database file (default: `.cache/schemas.sqlite3`, empty to disable).
+        SCHEMA_CACHE_MAX_ENTRIES: Number of schemas held in memory (default: 1024).
+        SCHEMA_CACHE_TTL_SECONDS: Lifetime of a cached schema (default: 86400).
+        SCHEMA_ETAG_CHECK_SECONDS: Interval between two revalidations of the metadata etag of a system (default: 300).
+    """
+    global _schema_cache
+
+    with _schema_cache_lock:
+        if _schema_cache is None:
+            _schema_cache = SchemaCache(
+                db_path=get_setting("SCHEMA_CACHE_PATH", ".cache/schemas.sqlite3") or None,
+                max_entries=get_int_setting("SCHEMA_CACHE_MAX_ENTRIES", 1024),
+                ttl_seconds=get_float_setting("SCHEMA_CACHE_TTL_SECONDS", 24 * 60 * 60),
+                etag_check_seconds=get_float_setting("SCHEMA_ETAG_CHECK_SECONDS", 5 * 60),
+            )
+        return _schema_cache
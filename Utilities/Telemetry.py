@@ -0,0 +1,337 @@
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from Utilities.GetConfig import get_int_setting
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# The conversation the current graph step belongs to
+_conversation: contextvars.ContextVar[str] = contextvars.ContextVar("conversation", default="")
+
+
+@dataclass
+class Span:
+    """
+    One timed operation: a graph node, a tool call, an LLM call or an HTTP request.
+
+    `bytes_in` is what the operation was given (arguments, prompt, request body) and
+    `bytes_out` what it returned (output, response, response body).
+    """
+
+    kind: str  # node, tool, llm, github or odata
+    name: str
+    conversation: str = ""
+    started_at: float = field(default_factory=time.time)
+    wall_time: float = 0.0
+    queue_time: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    status: str = "ok"
+
+    def add_usage(self, message) -> None:
+        """Adds the token usage reported in the metadata of an LLM response."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        if usage:
+            self.prompt_tokens += usage.get("input_tokens", 0) or 0
+            self.completion_tokens += usage.get("output_tokens", 0) or 0
+        else:
+            token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+            self.prompt_tokens += token_usage.get("prompt_tokens", 0) or 0
+            self.completion_tokens += token_usage.get("completion_tokens", 0) or 0
+
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        self.bytes_out += len(content.encode("utf-8"))
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            self.bytes_out += len(json.dumps(tool_call.get("args", {}), default=str))
+
+
+def prompt_bytes(messages) -> int:
+    """Size of the message contents sent to the LLM."""
+    return sum(
+        len((message.content if isinstance(message.content, str) else json.dumps(message.content)).encode("utf-8"))
+        for message in messages
+    )
+
+
+class _Metric:
+    """Aggregates of the spans of one (kind, name)."""
+
+    def __init__(self):
+        self.count: Dict[str, int] = defaultdict(int)  # by status
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.wall_time = 0.0
+        self.queue_time = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class Telemetry:
+    """
+    Records the spans of the workflow.
+
+    Every span is added to process-wide metrics, exposed in the Prometheus text format, and to
+    the timeline of the conversation it belongs to (the most recent spans of the most recently
+    active conversations are kept).
+    """
+
+    def __init__(self, max_spans: int = 200, max_conversations: int = 256):
+        """
+        Args:
+            max_spans: Number of spans kept in the timeline of a conversation.
+            max_conversations: Number of conversations whose timeline is kept.
+        """
+        self.max_spans = max_spans
+        self.max_conversations = max_conversations
+
+        self._metrics: Dict[Tuple[str, str], _Metric] = defaultdict(_Metric)
+        self._timelines: "OrderedDict[str, Deque[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def conversation(self, conversation: str) -> Iterator[None]:
+        """Attributes the spans recorded in the block (and the threads and tasks it starts) to a conversation."""
+        token = _conversation.set(str(conversation or ""))
+        try:
+            yield
+        finally:
+            _conversation.reset(token)
+
+    @contextmanager
+    def span(self, kind: str, name: str, queue_time: float = 0.0) -> Iterator[Span]:
+        """Times the block; an exception leaving the block marks the span as failed."""
+        span = Span(kind=kind, name=name, conversation=_conversation.get(), queue_time=queue_time)
+        started = time.monotonic()
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.wall_time = time.monotonic() - started
+            self.record(span)
+
+    def record(self, span: Span) -> None:
+        """Adds a finished span to the metrics and to its conversation timeline."""
+        with self._lock:
+            metric = self._metrics[(span.kind, span.name)]
+            metric.count[span.status] += 1
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if span.wall_time <= bound:
+                    metric.buckets[index] += 1
+            metric.wall_time += span.wall_time
+            metric.queue_time += span.queue_time
+            metric.bytes_in += span.bytes_in
+            metric.bytes_out += span.bytes_out
+            metric.prompt_tokens += span.prompt_tokens
+            metric.completion_tokens += span.completion_tokens
+
+            if span.conversation:
+                timeline = self._timelines.get(span.conversation)
+                if timeline is None:
+                    timeline = self._timelines[span.conversation] = deque(maxlen=self.max_spans)
+                self._timelines.move_to_end(span.conversation)
+                timeline.append(span)
+                while len(self._timelines) > self.max_conversations:
+                    self._timelines.popitem(last=False)
+
+    def timeline(self, conversation: str) -> List[Span]:
+        """The recorded spans of a conversation, oldest first."""
+        with self._lock:
+            return list(self._timelines.get(str(conversation), ()))
+
+    def render_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP sapchatbot_operations_total Operations by kind, name and status.",
+            "# TYPE sapchatbot_operations_total counter",
+        ]
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+
+            for (kind, name), metric in metrics:
+                for status, count in sorted(metric.count.items()):
+                    lines.append(f"sapchatbot_operations_total{_labels(kind, name, status=status)} {count}")
+
+            lines += [
+                "# HELP sapchatbot_operation_seconds Wall time of the operations.",
+                "# TYPE sapchatbot_operation_seconds histogram",
+            ]
+            for (kind, name), metric in metrics:
+                total = sum(metric.count.values())
+                for bound, count in zip(LATENCY_BUCKETS, metric.buckets):
+                    lines.append(f"sapchatbot_operation_seconds_bucket{_labels(kind, name, le=f'{bound:g}')} {count}")
+                lines.append(f"sapchatbot_operation_seconds_bucket{_labels(kind, name, le='+Inf')} {total}")
+                lines.append(f"sapchatbot_operation_seconds_sum{_labels(kind, name)} {metric.wall_time:.6f}")
+                lines.append(f"sapchatbot_operation_seconds_count{_labels(kind, name)} {total}")
+
+            lines += [
+                "# HELP sapchatbot_operation_queue_seconds_total Time the operations waited for a slot.",
+                "# TYPE sapchatbot_operation_queue_seconds_total counter",
+            ]
+            for (kind, name), metric in metrics:
+                lines.append(f"sapchatbot_operation_queue_seconds_total{_labels(kind, name)} {metric.queue_time:.6f}")
+
+            lines += [
+                "# HELP sapchatbot_operation_bytes_total Bytes given to (in) and returned by (out) the operations.",
+                "# TYPE sapchatbot_operation_bytes_total counter",
+            ]
+            for (kind, name), metric in metrics:
+                lines.append(f"sapchatbot_operation_bytes_total{_labels(kind, name, direction='in')} {metric.bytes_in}")
+                lines.append(f"sapchatbot_operation_bytes_total{_labels(kind, name, direction='out')} {metric.bytes_out}")
+
+            lines += [
+                "# HELP sapchatbot_llm_tokens_total Prompt and completion tokens of the LLM calls.",
+                "# TYPE sapchatbot_llm_tokens_total counter",
+            ]
+            for (kind, name), metric in metrics:
+                if metric.prompt_tokens or metric.completion_tokens:
+                    lines.append(f"sapchatbot_llm_tokens_total{_labels(kind, name, type='prompt')} {metric.prompt_tokens}")
+                    lines.append(
+                        f"sapchatbot_llm_tokens_total{_labels(kind, name, type='completion')} {metric.completion_tokens}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(kind: str, name: str, **extra: str) -> str:
+    labels = {"kind": kind, "name": name, **extra}
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+# ------------------------------------------------------------------ #
+# HTTP client hooks
+# ------------------------------------------------------------------ #
+
+
+def request_kind(url) -> str:
+    """The span kind of an outgoing request: GitHub or, for the SAP systems, OData."""
+    return "github" if "github" in (urlparse(str(url)).hostname or "") else "odata"
+
+
+def _request_name(url) -> str:
+    """The first path segment names the request (GitHub `repos`, the OData service, ...)."""
+    parsed = urlparse(str(url))
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    return f"{parsed.hostname}/{segments[0]}" if segments else str(parsed.hostname)
+
+
+def requests_hook(kind: str):
+    """A `requests` response hook recording a span per request of a session."""
+
+    def hook(response, *args, **kwargs):
+        body = response.request.body or b""
+        get_telemetry().record(
+            Span(
+                kind=kind,
+                name=_request_name(response.url),
+                conversation=_conversation.get(),
+                started_at=time.time() - response.elapsed.total_seconds(),
+                wall_time=response.elapsed.total_seconds(),
+                bytes_in=len(body),
+                bytes_out=len(response.content),
+                status="ok" if response.ok else str(response.status_code),
+            )
+        )
+        return response
+
+    return hook
+
+
+async def _on_request(request) -> None:
+    request.extensions["telemetry_started"] = time.monotonic()
+
+
+async def _on_response(response) -> None:
+    # Reading the body here keeps the span accurate; httpx keeps it for the caller
+    await response.aread()
+    started = response.request.extensions.get("telemetry_started", time.monotonic())
+    wall_time = time.monotonic() - started
+    get_telemetry().record(
+        Span(
+            kind=request_kind(response.url),
+            name=_request_name(response.url),
+            conversation=_conversation.get(),
+            started_at=time.time() - wall_time,
+            wall_time=wall_time,
+            bytes_in=len(response.request.content or b""),
+            bytes_out=len(response.content),
+            status="ok" if response.is_success else str(response.status_code),
+        )
+    )
+
+
+def httpx_event_hooks() -> dict:
+    """`event_hooks` of an httpx.AsyncClient recording a span per request."""
+    return {"request": [_on_request], "response": [_on_response]}
+
+
+# ------------------------------------------------------------------ #
+# Metrics endpoint
+# ------------------------------------------------------------------ #
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_telemetry().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are not worth a log line each
+        pass
+
+
+_telemetry = Telemetry()
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """Returns the telemetry of the process."""
+    return _telemetry
+
+
+def start_metrics_server(port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Serves `/metrics` on a daemon thread, once per process.
+
+    The port is read from the `METRICS_PORT` setting; 0 (the default) disables the endpoint.
+    """
+    global _metrics_server
+
+    port = port if port is not None else get_int_setting("METRICS_PORT", 0)
+    if not port:
+        return None
+
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer(("", port), _MetricsHandler)
+            except OSError as error:
+                print(f"Metrics endpoint could not be started on port {port}: {error}")
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics", daemon=True).start()
+        return _metrics_server
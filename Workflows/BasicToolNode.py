@@ -1,58 +1,213 @@
-from langchain_core.messages import ToolMessage, trim_messages
-
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+from typing import Optional
 import json
+import math
+import threading
+import time
+
+from langchain_core.messages import ToolMessage
+
+from Utilities.GetConfig import get_int_setting, get_float_setting
+from Utilities.Telemetry import get_telemetry
+from Workflows.BlobStore import to_blob_message
+from Workflows.ToolCache import ToolCache, get_tool_cache
 
 
 class BasicToolNode:
     """A node that runs the tools requested in the last AIMessage."""
 
-    def __init__(self, tools: list) -> None:
+    def __init__(
+        self,
+        tools: list,
+        max_concurrency: Optional[int] = None,
+        tool_timeout: Optional[float] = None,
+        tool_cache: Optional[ToolCache] = None,
+    ) -> None:
+        """
+        Args:
+            tools: The tools the node can run.
+            max_concurrency: Maximum number of tool calls run at the same time. Defaults to
+                the `TOOL_MAX_CONCURRENCY` setting (4); 1 runs the tool calls sequentially.
+            tool_timeout: Seconds a single tool call may run before it is reported as timed out.
+                Defaults to the `TOOL_TIMEOUT_SECONDS` setting (60).
+            tool_cache: Cache of the tool outputs, shared by the sessions of the process.
+                Defaults to the process-wide ToolCache.
+        """
         self.tools_by_name = {tool.name: tool for tool in tools}
+        self.max_concurrency = max(
+            1, max_concurrency or get_int_setting("TOOL_MAX_CONCURRENCY", 4)
+        )
+        self.tool_timeout = tool_timeout or get_float_setting("TOOL_TIMEOUT_SECONDS", 60)
+        self.tool_cache = tool_cache or get_tool_cache()
 
     def __call__(self, inputs: dict):
+        tool_calls = self._get_tool_calls(inputs)
+
+        if not tool_calls:
+            return {"messages": []}
+
+        # Even a single call runs on the pool, so a hung tool is cut off by the timeout
+        return {"messages": self._run_concurrently(tool_calls)}
+
+    async def acall(self, inputs: dict):
+        """
+        Async version of `__call__`. The tool calls run as coroutines on the event loop, at most
+        `max_concurrency` at a time, so no thread is held while a tool waits on the network.
+        """
+        tool_calls = self._get_tool_calls(inputs)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(tool_call: dict) -> ToolMessage:
+            queued_at = time.monotonic()
+            async with semaphore:
+                return await self.arun_tool(tool_call, queue_time=time.monotonic() - queued_at)
+
+        # gather keeps the order of the tool calls
+        return {"messages": list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))}
+
+    @staticmethod
+    def _get_tool_calls(inputs: dict) -> list:
+        if messages := inputs.get("messages", []):
+            message = messages[-1]
+        else:
+            raise ValueError("No message found in input")
+
+        return getattr(message, "tool_calls", [])
+
+    async def arun_tool(self, tool_call: dict, queue_time: float = 0.0) -> ToolMessage:
+        """Async version of `run_tool`. The timeout starts once the call got a concurrency slot."""
+        tool_name = tool_call.get("name", "")
+        tool_args = tool_call.get("args", {})
+
+        if tool_name not in self.tools_by_name:
+            return ToolMessage(
+                content=f"Tool '{tool_name}' not found.",
+                name=tool_name,
+                tool_call_id=tool_call["id"],
+            )
+
         try:
-            if messages := inputs.get("messages", []):
-                message = messages[-1]
-            else:
-                raise ValueError("No message found in input")
+            with get_telemetry().span("tool", tool_name, queue_time=queue_time) as span:
+                span.bytes_in = len(json.dumps(tool_args, default=str))
+                # Identical calls of other sessions are answered from the cache or share one run
+                content = await asyncio.wait_for(
+                    self.tool_cache.ainvoke(self.tools_by_name[tool_name], tool_args), self.tool_timeout
+                )
+                span.bytes_out = len(content)
 
-            outputs = []
+            # Large outputs go to the blob store, the state only keeps a reference
+            return await asyncio.to_thread(
+                to_blob_message,
+                ToolMessage(
+                    content=content,
+                    name=tool_name,
+                    tool_call_id=tool_call["id"],
+                ),
+            )
+
+        except asyncio.TimeoutError:
+            return ToolMessage(
+                content=f"Error occurred in tool '{tool_name}': timed out after {self.tool_timeout:g} seconds.",
+                name=tool_name,
+                tool_call_id=tool_call["id"],
+            )
+
+        except Exception as e:
+            return ToolMessage(
+                content=f"Error occurred in tool '{tool_name}': {str(e)}",
+                name=tool_name,
+                tool_call_id=tool_call["id"],
+            )
+
+    def run_tool(self, tool_call: dict, queue_time: float = 0.0) -> ToolMessage:
+        """
+        Runs a single tool call. Errors are returned to the LLM as the content of the ToolMessage.
+        `queue_time` is the time the call waited for a worker, reported with its telemetry span.
+        """
+        tool_name = tool_call.get("name", "")
+        tool_args = tool_call.get("args", {})
+
+        if tool_name not in self.tools_by_name:
+            return ToolMessage(
+                content=f"Tool '{tool_name}' not found.",
+                name=tool_name,
+                tool_call_id=tool_call["id"],
+            )
+
+        try:
+            with get_telemetry().span("tool", tool_name, queue_time=queue_time) as span:
+                span.bytes_in = len(json.dumps(tool_args, default=str))
+                # Identical calls of other sessions are answered from the cache or share one run
+                content = self.tool_cache.invoke(self.tools_by_name[tool_name], tool_args)
+                span.bytes_out = len(content)
+
+            # Large outputs go to the blob store, the state only keeps a reference
+            return to_blob_message(
+                ToolMessage(
+                    content=content,
+                    name=tool_name,
+                    tool_call_id=tool_call["id"],
+                )
+            )
+
+        except Exception as e:
+            return ToolMessage(
+                content=f"Error occurred in tool '{tool_name}': {str(e)}",
+                name=tool_name,
+                tool_call_id=tool_call["id"],
+            )
 
-            for tool_call in getattr(message, "tool_calls", []):
-                tool_name = tool_call.get("name", "")
-                tool_args = tool_call.get("args", {})
+    def _run_concurrently(self, tool_calls: list) -> list:
+        """
+        Runs the tool calls on a thread pool, each within `tool_timeout`. The ToolMessages are
+        returned in the order of the tool calls, whatever order the tools finish in.
+        """
+        started = [threading.Event() for _ in tool_calls]
+        started_at = [0.0] * len(tool_calls)
+        submitted_at = time.monotonic()
 
-                if tool_name in self.tools_by_name:
-                    tool_result = self.tools_by_name[tool_name].invoke(tool_args)
+        def run(index: int, tool_call: dict) -> ToolMessage:
+            started_at[index] = time.monotonic()
+            started[index].set()
+            return self.run_tool(tool_call, queue_time=started_at[index] - submitted_at)
 
+        # A fresh pool per step, so a hung tool never blocks the tool calls of later steps
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(tool_calls)),
+            thread_name_prefix="tool",
+        )
+        try:
+            # Each call runs in a copy of the context, so its spans keep their conversation
+            futures = [
+                executor.submit(contextvars.copy_context().run, run, index, tool_call)
+                for index, tool_call in enumerate(tool_calls)
+            ]
+
+            # Calls waiting for a free worker wait at most for the slots ahead of them
+            queue_deadline = time.monotonic() + self.tool_timeout * math.ceil(
+                len(tool_calls) / self.max_concurrency
+            )
+
+            outputs = []
+            for index, (tool_call, future) in enumerate(zip(tool_calls, futures)):
+                try:
+                    if not started[index].wait(max(0.0, queue_deadline - time.monotonic())):
+                        raise TimeoutError
+                    remaining = started_at[index] + self.tool_timeout - time.monotonic()
+                    outputs.append(future.result(timeout=max(0.0, remaining)))
+                except TimeoutError:
+                    future.cancel()
+                    tool_name = tool_call.get("name", "")
                     outputs.append(
                         ToolMessage(
-                            content=json.dumps(tool_result),
+                            content=f"Error occurred in tool '{tool_name}': timed out after {self.tool_timeout:g} seconds.",
                             name=tool_name,
                             tool_call_id=tool_call["id"],
                         )
                     )
+            return outputs
 
-                else:
-                    return {
-                        "messages": [
-                            ToolMessage(
-                                content=f"Tool '{tool_name}' not found.",
-                                name=tool_name,
-                                tool_call_id=tool_call["id"],
-                            )
-                        ]
-                    }
-
-            return {"messages": outputs}
-
-        except Exception as e:
-            return {
-                "messages": [
-                    ToolMessage(
-                        content=f"Error occurred in tool '{tool_name}': {str(e)}",
-                        name=tool_name,
-                        tool_call_id=tool_call["id"],
-                    )
-                ]
-            }
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Set
+
+from langchain_core.messages import BaseMessage, ToolMessage
+
+from Utilities.GetConfig import get_setting, get_int_setting, get_float_setting
+
+# Key of the blob reference in `ToolMessage.additional_kwargs`
+BLOB_REF = "blob_ref"
+
+
+class BlobStore:
+    """
+    A content-addressed store for tool outputs.
+
+    Each distinct output is stored once under its SHA-1, however many tool calls returned it.
+    The graph state (and thus every checkpoint) only holds the reference. Blobs are kept in
+    an in-process LRU and, when a directory is configured, on disk, so references stay
+    resolvable as long as the checkpoints that hold them.
+
+    The checkpointer deletes the on-disk blobs no checkpoint refers to any more (see `delete`
+    and `sweep`). A blob stored or stored again within the last `grace_seconds` is never
+    deleted, as the checkpoint referring to it may not be written yet.
+    """
+
+    def __init__(
+        self,
+        blob_dir: Optional[str] = None,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        grace_seconds: float = 60 * 60,
+    ):
+        """
+        Args:
+            blob_dir: Directory for the on-disk blobs. `None` keeps the blobs in memory only.
+            max_memory_bytes: Upper bound of the blob content held in memory (LRU evicted).
+            grace_seconds: Age below which an unreferenced on-disk blob is kept.
+        """
+        self.blob_dir = Path(blob_dir) if blob_dir else None
+        self.max_memory_bytes = max_memory_bytes
+        self.grace_seconds = grace_seconds
+
+        self._blobs: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.blob_dir:
+            self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+    def put(self, content: str) -> str:
+        """Stores `content` (once) and returns its reference."""
+        data = content.encode("utf-8")
+        ref = hashlib.sha1(data).hexdigest()
+
+        with self._lock:
+            self._store_in_memory(ref, content)
+
+        if self.blob_dir:
+            blob_file = self._blob_file(ref)
+            try:
+                if blob_file.exists():
+                    # Restarts the grace period, a new checkpoint is about to refer to the blob
+                    os.utime(blob_file)
+                else:
+                    blob_file.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_file = blob_file.with_name(f"{ref}.{os.getpid()}.{threading.get_ident()}.tmp")
+                    tmp_file.write_bytes(data)
+                    os.replace(tmp_file, blob_file)
+            except OSError as error:
+                # The blob stays available from memory
+                print(f"Blob store write failed: {error}")
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        """Returns the content of a reference, or None if it is unknown."""
+        with self._lock:
+            content = self._blobs.get(ref)
+            if content is not None:
+                self._blobs.move_to_end(ref)
+                return content
+
+        if not self.blob_dir:
+            return None
+
+        try:
+            data = self._blob_file(ref).read_bytes()
+        except (OSError, ValueError):
+            return None
+        if hashlib.sha1(data).hexdigest() != ref:
+            return None
+
+        content = data.decode("utf-8")
+        with self._lock:
+            self._store_in_memory(ref, content)
+        return content
+
+    def delete(self, refs: Iterable[str]) -> int:
+        """
+        Deletes the on-disk blobs of references no checkpoint holds any more, except those
+        written within the grace period. The in-memory LRU is bounded on its own.
+
+        Returns:
+            The number of blobs deleted.
+        """
+        if not self.blob_dir:
+            return 0
+
+        deleted = 0
+        cutoff = time.time() - self.grace_seconds
+        for ref in refs:
+            try:
+                blob_file = self._blob_file(ref)
+                if blob_file.stat().st_mtime < cutoff:
+                    blob_file.unlink()
+                    deleted += 1
+            except (OSError, ValueError):
+                continue
+        return deleted
+
+    def sweep(self, live_refs: Set[str]) -> int:
+        """
+        Deletes every on-disk blob (and leftover temporary file) past the grace period that is
+        not in `live_refs`, e.g. those a crash left behind.
+
+        Returns:
+            The number of files deleted.
+        """
+        if not self.blob_dir:
+            return 0
+
+        deleted = 0
+        cutoff = time.time() - self.grace_seconds
+        for blob_file in self.blob_dir.glob("*/*"):
+            if blob_file.name in live_refs:
+                continue
+            try:
+                if blob_file.stat().st_mtime < cutoff:
+                    blob_file.unlink()
+                    deleted += 1
+            except OSError:
+                continue
+        return deleted
+
+    def _store_in_memory(self, ref: str, content: str) -> None:
+        """Adds a blob to the LRU and evicts the oldest ones beyond the byte budget. Caller holds the lock."""
+        if ref in self._blobs:
+            self._blobs.move_to_end(ref)
+            return
+
+        self._blobs[ref] = content
+        self._memory_bytes += len(content)
+
+        while self._memory_bytes > self.max_memory_bytes and len(self._blobs) > 1:
+            _, evicted = self._blobs.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _blob_file(self, ref: str) -> Path:
+        if len(ref) != 40 or not all(char in "0123456789abcdef" for char in ref):
+            raise ValueError(f"Invalid blob reference: {ref}")
+        return self.blob_dir / ref[:2] / ref
+
+
+def to_blob_message(message: ToolMessage, min_size: Optional[int] = None) -> ToolMessage:
+    """
+    Moves the content of a large ToolMessage into the blob store.
+
+    Returns:
+        The message with only a reference as content, or the message itself if it is small.
+    """
+    min_size = min_size if min_size is not None else get_int_setting("BLOB_STORE_MIN_BYTES", 1024)
+    if not isinstance(message.content, str) or len(message.content) < min_size:
+        return message
+
+    ref = get_blob_store().put(message.content)
+    return message.model_copy(
+        update={
+            "content": f"[blob {ref}]",
+            "additional_kwargs": {**message.additional_kwargs, BLOB_REF: ref},
+        }
+    )
+
+
+def resolve_message(message: BaseMessage) -> BaseMessage:
+    """Returns the message with the content of its blob reference restored."""
+    ref = message.additional_kwargs.get(BLOB_REF)
+    if not ref:
+        return message
+
+    content = get_blob_store().get(ref)
+    if content is None:
+        content = f"[The output {ref} is no longer available, call the tool again.]"
+
+    additional_kwargs = {key: value for key, value in message.additional_kwargs.items() if key != BLOB_REF}
+    return message.model_copy(update={"content": content, "additional_kwargs": additional_kwargs})
+
+
+def resolve_messages(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Restores the content of all the blob references of a message list."""
+    return [resolve_message(message) for message in messages]
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """
+    Returns the process-wide blob store, configured from the `BLOB_STORE_*` settings.
+
+    Settings:
+        BLOB_STORE_DIR: On-disk blob directory (default: `blobs` next to the `CHECKPOINT_DB_PATH`
+            database, so the blobs live as long as the checkpoints referring to them; empty to disable).
+        BLOB_STORE_MAX_MEMORY_MB: In-process LRU budget in MB (default: 64).
+        BLOB_STORE_MIN_BYTES: Tool outputs below this size stay inline in the state (default: 1024).
+        BLOB_STORE_GRACE_SECONDS: Age below which an unreferenced blob is kept on disk (default: 3600).
+    """
+    global _blob_store
+
+    with _blob_store_lock:
+        if _blob_store is None:
+            checkpoint_db_path = get_setting("CHECKPOINT_DB_PATH", ".cache/checkpoints.sqlite3")
+            default_dir = (
+                str(Path(checkpoint_db_path).parent / "blobs")
+                if checkpoint_db_path != ":memory:"
+                else ".cache/blobs"
+            )
+            _blob_store = BlobStore(
+                blob_dir=get_setting("BLOB_STORE_DIR", default_dir) or None,
+                max_memory_bytes=get_int_setting("BLOB_STORE_MAX_MEMORY_MB", 64) * 1024 * 1024,
+                grace_seconds=get_float_setting("BLOB_STORE_GRACE_SECONDS", 60 * 60),
+            )
+        return _blob_store
@@ -0,0 +1,531 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from Utilities.GetConfig import get_setting, get_int_setting, get_float_setting
+from Workflows.BlobStore import BLOB_REF, get_blob_store
+
+# Suffix of the serialized type of compressed payloads
+COMPRESSED_SUFFIX = "+zlib"
+
+# Key marking a `messages` channel value stored as a delta of the parent checkpoint
+DELTA_KEY = "__messages_delta__"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Serializes checkpoints with the default serializer and zlib-compresses the larger payloads."""
+
+    def __init__(self, serde: Optional[SerializerProtocol] = None, min_size: int = 512, level: int = 6):
+        """
+        Args:
+            serde: The serializer producing the payloads. Defaults to the LangGraph JsonPlusSerializer.
+            min_size: Payloads below this number of bytes are stored uncompressed.
+            level: The zlib compression level.
+        """
+        self.serde = serde or JsonPlusSerializer()
+        self.min_size = min_size
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        return type_ + COMPRESSED_SUFFIX, zlib.compress(data, self.level)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(COMPRESSED_SUFFIX):
+            return self.serde.loads_typed((type_[: -len(COMPRESSED_SUFFIX)], zlib.decompress(payload)))
+        return self.serde.loads_typed((type_, payload))
+
+
+@dataclass
+class _ChainHead:
+    """The latest checkpoint of a thread, kept to compute the next delta without holding its messages."""
+
+    checkpoint_id: str
+    message_count: int
+    fingerprint: int  # See `_fingerprint`
+    depth: int  # Number of deltas since the snapshot
+    snapshot_id: str
+
+
+class CheckpointStats:
+    """Counts the checkpoints written and their size."""
+
+    def __init__(self):
+        self.puts = 0
+        self.snapshots = 0
+        self.bytes_written = 0
+        self.last_bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, size: int, snapshot: bool = False) -> None:
+        with self._lock:
+            self.puts += 1
+            self.snapshots += int(snapshot)
+            self.bytes_written += size
+            self.last_bytes = size
+
+    def record_writes(self, size: int) -> None:
+        """Adds the pending writes of a step to its checkpoint."""
+        with self._lock:
+            self.bytes_written += size
+            self.last_bytes += size
+
+    @property
+    def bytes_per_put(self) -> float:
+        return self.bytes_written / self.puts if self.puts else 0.0
+
+
+class BoundedSqliteSaver(SqliteSaver):
+    """
+    A SQLite checkpointer whose size stays bounded.
+
+    - Checkpoints are compressed (see `CompressedSerializer`).
+    - The `messages` channel is stored as a delta: the number of messages kept from the parent
+      checkpoint and the new ones. Every `snapshot_every` steps the full list is stored, so a
+      checkpoint is rebuilt from at most that many rows and the bytes written per step do not
+      grow with the length of the conversation.
+    - Only the newest `keep_per_thread` checkpoints of a conversation are kept (plus the
+      checkpoints back to their snapshot); the latest one is all that is needed to resume it.
+    - Conversations idle for longer than `retention_seconds` are deleted.
+    - The blob references of each checkpoint are recorded, so the tool outputs in the blob store
+      are deleted along with the last checkpoint referring to them.
+    - The SQLite page cache is capped at `cache_mb`, so memory stays flat however many
+      conversations are stored: they live on disk, not in the process.
+
+    The async methods run the SQLite calls in a worker thread, so the checkpointer also
+    serves the async graph path.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        keep_per_thread: int = 10,
+        retention_seconds: float = 7 * 24 * 60 * 60,
+        cache_mb: int = 16,
+        snapshot_every: int = 20,
+        max_heads: int = 256,
+    ) -> None:
+        super().__init__(conn, serde=serde or CompressedSerializer())
+        self.keep_per_thread = max(1, keep_per_thread)
+        self.retention_seconds = retention_seconds
+        self.cache_mb = cache_mb
+        self.snapshot_every = max(1, snapshot_every)
+        self.max_heads = max_heads
+        self.stats = CheckpointStats()
+        self._last_expiry = 0.0
+
+        self._heads: "OrderedDict[tuple, _ChainHead]" = OrderedDict()
+        self._heads_lock = threading.Lock()
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.executescript(
+            f"""
+            PRAGMA journal_mode=WAL;
+            PRAGMA cache_size=-{self.cache_mb * 1024};
+            CREATE TABLE IF NOT EXISTS thread_activity (
+                thread_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_chain (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                snapshot_id TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                ref TEXT NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, ref)
+            );
+            CREATE INDEX IF NOT EXISTS checkpoint_blobs_ref ON checkpoint_blobs (ref);
+            """
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        checkpoint_tuple = super().get_tuple(config)
+        return self._restore(checkpoint_tuple) if checkpoint_tuple else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # The base class holds the connection lock while it yields, and restoring a delta reads
+        # the parent checkpoints, so the rows are fetched first
+        checkpoint_tuples = list(super().list(config, filter=filter, before=before, limit=limit))
+        for checkpoint_tuple in checkpoint_tuples:
+            yield self._restore(checkpoint_tuple)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+
+        messages = checkpoint["channel_values"].get("messages")
+        stored = checkpoint
+        depth, snapshot_id = 0, checkpoint["id"]
+        new_messages = messages if isinstance(messages, list) else []
+
+        if isinstance(messages, list):
+            head = self._head(thread_id, checkpoint_ns, parent_id) if parent_id else None
+            keep = head.message_count if head and head.message_count <= len(messages) else 0
+            prefix = _fingerprint(messages[:keep])
+            # The usual append-only update: the parent messages are a prefix of the new ones
+            if head and head.depth + 1 < self.snapshot_every and prefix == head.fingerprint:
+                depth, snapshot_id = head.depth + 1, head.snapshot_id
+                new_messages = messages[keep:]
+                delta = {"parent": parent_id, "keep": keep, "tail": new_messages}
+                stored = {
+                    **checkpoint,
+                    "channel_values": {**checkpoint["channel_values"], "messages": {DELTA_KEY: delta}},
+                }
+
+        saved_config = super().put(config, stored, metadata, new_versions)
+
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoint_chain VALUES (?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], snapshot_id, depth),
+            )
+            # A delta only records the references of its new messages: the checkpoints back to
+            # its snapshot, which hold the others, are kept as long as it is
+            cur.executemany(
+                "INSERT OR IGNORE INTO checkpoint_blobs VALUES (?, ?, ?, ?)",
+                [(thread_id, checkpoint_ns, checkpoint["id"], ref) for ref in _blob_refs(new_messages)],
+            )
+            size = cur.execute(
+                "SELECT length(checkpoint) + length(metadata) FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint["id"]),
+            ).fetchone()[0]
+        self.stats.record(size, snapshot=depth == 0)
+
+        if isinstance(messages, list):
+            self._set_head(
+                (thread_id, checkpoint_ns),
+                _ChainHead(
+                    checkpoint["id"], len(messages), _fingerprint(messages[keep:], prefix), depth, snapshot_id
+                ),
+            )
+
+        self._prune(thread_id, checkpoint_ns)
+        return saved_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        with self.cursor() as cur:
+            size = cur.execute(
+                "SELECT SUM(length(value)) FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? AND task_id = ?",
+                (
+                    str(config["configurable"]["thread_id"]),
+                    str(config["configurable"].get("checkpoint_ns", "")),
+                    str(config["configurable"]["checkpoint_id"]),
+                    task_id,
+                ),
+            ).fetchone()[0]
+        self.stats.record_writes(size or 0)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+            cur.execute("DELETE FROM checkpoint_chain WHERE thread_id = ?", (str(thread_id),))
+            refs = {
+                row[0]
+                for row in cur.execute(
+                    "SELECT DISTINCT ref FROM checkpoint_blobs WHERE thread_id = ?", (str(thread_id),)
+                ).fetchall()
+            }
+            cur.execute("DELETE FROM checkpoint_blobs WHERE thread_id = ?", (str(thread_id),))
+        with self._heads_lock:
+            for key in [key for key in self._heads if key[0] == str(thread_id)]:
+                del self._heads[key]
+        self._release_blobs(refs)
+
+    def expire_threads(self) -> int:
+        """Deletes the conversations idle for longer than the retention. Returns their number."""
+        cutoff = time.time() - self.retention_seconds
+        with self.cursor() as cur:
+            expired = [
+                row[0]
+                for row in cur.execute(
+                    "SELECT thread_id FROM thread_activity WHERE updated_at < ?", (cutoff,)
+                ).fetchall()
+            ]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+
+        # Blobs whose references were never recorded, e.g. a crash between the tool call and its checkpoint
+        with self.cursor(transaction=False) as cur:
+            live_refs = {row[0] for row in cur.execute("SELECT DISTINCT ref FROM checkpoint_blobs").fetchall()}
+        get_blob_store().sweep(live_refs)
+        return len(expired)
+
+    def _prune(self, thread_id: str, checkpoint_ns: str = "") -> None:
+        """Keeps the newest checkpoints of a thread, and those their deltas depend on, and records its activity."""
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO thread_activity (thread_id, updated_at) VALUES (?, ?)",
+                (thread_id, time.time()),
+            )
+            # Checkpoint ids are time ordered (uuid6): every checkpoint from the oldest snapshot
+            # of the kept checkpoints onwards is needed to rebuild them
+            cur.execute(
+                """DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < (
+                    SELECT MIN(COALESCE(chain.snapshot_id, kept.checkpoint_id)) FROM (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                        ORDER BY checkpoint_id DESC LIMIT ?) AS kept
+                    LEFT JOIN checkpoint_chain AS chain
+                        ON chain.thread_id = ? AND chain.checkpoint_ns = ? AND chain.checkpoint_id = kept.checkpoint_id)""",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    thread_id,
+                    checkpoint_ns,
+                    self.keep_per_thread,
+                    thread_id,
+                    checkpoint_ns,
+                ),
+            )
+            refs = {
+                row[0]
+                for row in cur.execute(
+                    """SELECT DISTINCT ref FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?
+                    AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)""",
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+                ).fetchall()
+            }
+            for table in ("writes", "checkpoint_chain", "checkpoint_blobs"):
+                cur.execute(
+                    f"""DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)""",
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+                )
+        self._release_blobs(refs)
+
+        # Expire idle conversations at most once an hour
+        if time.time() - self._last_expiry > 60 * 60:
+            self._last_expiry = time.time()
+            self.expire_threads()
+
+    def _release_blobs(self, refs: set) -> None:
+        """Deletes the blobs of `refs` that no checkpoint refers to any more."""
+        refs = list(refs)
+        orphans = []
+        # Chunked to stay below the SQLite limit of bound parameters
+        for start in range(0, len(refs), 500):
+            chunk = refs[start : start + 500]
+            with self.cursor(transaction=False) as cur:
+                live = {
+                    row[0]
+                    for row in cur.execute(
+                        f"SELECT DISTINCT ref FROM checkpoint_blobs WHERE ref IN ({', '.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                }
+            orphans += [ref for ref in chunk if ref not in live]
+        if orphans:
+            get_blob_store().delete(orphans)
+
+    # ------------------------------------------------------------------ #
+    # Message deltas
+    # ------------------------------------------------------------------ #
+
+    def _restore(self, checkpoint_tuple: CheckpointTuple) -> CheckpointTuple:
+        """Replaces a stored `messages` delta by the full message list."""
+        checkpoint = checkpoint_tuple.checkpoint
+        delta = checkpoint["channel_values"].get("messages")
+        if not (isinstance(delta, dict) and DELTA_KEY in delta):
+            return checkpoint_tuple
+
+        delta = delta[DELTA_KEY]
+        configurable = checkpoint_tuple.config["configurable"]
+        parent = self._messages_of(str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""), delta["parent"])
+        messages = parent[: delta["keep"]] + list(delta["tail"])
+        return checkpoint_tuple._replace(
+            checkpoint={**checkpoint, "channel_values": {**checkpoint["channel_values"], "messages": messages}}
+        )
+
+    def _messages_of(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Any]:
+        parent = super().get_tuple(
+            {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+        )
+        if parent is None:
+            raise ValueError(f"Checkpoint {checkpoint_id} of thread {thread_id} is missing, the delta chain is broken")
+        return self._restore(parent).checkpoint["channel_values"].get("messages") or []
+
+    def _head(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[_ChainHead]:
+        """The message fingerprint and chain position of the parent checkpoint of a put."""
+        with self._heads_lock:
+            head = self._heads.get((thread_id, checkpoint_ns))
+            if head and head.checkpoint_id == checkpoint_id:
+                self._heads.move_to_end((thread_id, checkpoint_ns))
+                return head
+
+        with self.cursor(transaction=False) as cur:
+            row = cur.execute(
+                "SELECT snapshot_id, depth FROM checkpoint_chain "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        if row is None:
+            # Written before deltas were introduced: start a new chain
+            return None
+        messages = self._messages_of(thread_id, checkpoint_ns, checkpoint_id)
+        return _ChainHead(checkpoint_id, len(messages), _fingerprint(messages), row[1], row[0])
+
+    def _set_head(self, key: tuple, head: _ChainHead) -> None:
+        with self._heads_lock:
+            self._heads[key] = head
+            self._heads.move_to_end(key)
+            while len(self._heads) > self.max_heads:
+                self._heads.popitem(last=False)
+
+    # ------------------------------------------------------------------ #
+    # Async API, on top of the sync one
+    # ------------------------------------------------------------------ #
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _fingerprint(messages: List[Any], seed: int = 0) -> int:
+    """
+    A hash of a message list, continuing from `seed` (the fingerprint of the preceding messages).
+
+    Each message contributes its type, id, content and tool calls; Python caches the hash of a
+    string, so fingerprinting the unchanged messages of a conversation again is cheap.
+    """
+    fingerprint = seed
+    for message in messages:
+        content = getattr(message, "content", message)
+        fingerprint = hash(
+            (
+                fingerprint,
+                type(message).__name__,
+                getattr(message, "id", None),
+                content if isinstance(content, str) else repr(content),
+                repr(getattr(message, "tool_calls", None)),
+            )
+        )
+    return fingerprint
+
+
+def _blob_refs(messages: List[Any]) -> List[str]:
+    """The blob references held by a list of messages."""
+    return list(
+        dict.fromkeys(
+            ref
+            for message in messages
+            if (ref := (getattr(message, "additional_kwargs", None) or {}).get(BLOB_REF))
+        )
+    )
+
+
+_checkpointer: Optional[BoundedSqliteSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> BoundedSqliteSaver:
+    """
+    Returns the process-wide checkpointer, configured from the `CHECKPOINT_*` settings.
+
+    Settings:
+        CHECKPOINT_DB_PATH: SQLite database file (default: `.cache/checkpoints.sqlite3`). The database
+            is in WAL mode: it must be on a local volume and not be shared with other pods.
+        CHECKPOINT_KEEP_PER_THREAD: Checkpoints kept per conversation (default: 10).
+        CHECKPOINT_RETENTION_DAYS: Idle conversations older than this are deleted (default: 7).
+        CHECKPOINT_CACHE_MB: SQLite page cache ceiling in MB (default: 16).
+        CHECKPOINT_SNAPSHOT_EVERY: A full message list is stored every this many steps (default: 20).
+    """
+    global _checkpointer
+
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            db_path = get_setting("CHECKPOINT_DB_PATH", ".cache/checkpoints.sqlite3")
+            if db_path != ":memory:":
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            _checkpointer = BoundedSqliteSaver(
+                sqlite3.connect(db_path, check_same_thread=False),
+                keep_per_thread=get_int_setting("CHECKPOINT_KEEP_PER_THREAD", 10),
+                retention_seconds=get_float_setting("CHECKPOINT_RETENTION_DAYS", 7) * 24 * 60 * 60,
+                cache_mb=get_int_setting("CHECKPOINT_CACHE_MB", 16),
+                snapshot_every=get_int_setting("CHECKPOINT_SNAPSHOT_EVERY", 20),
+            )
+        return _checkpointer
@@ -0,0 +1,162 @@
+import json
+import threading
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from Utilities.GetConfig import get_int_setting
+from Workflows.BlobStore import BLOB_REF, get_blob_store, resolve_message
+
+# Tool arguments that identify the ABAP object a tool output belongs to, in display order
+REFERENCE_ARGS = ("class_name", "interface_name", "object_name", "meth_name", "table_name", "table_names")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about 4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Estimated prompt tokens of a message, including the arguments of its tool calls."""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tokens = estimate_tokens(content) + 4
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(json.dumps(tool_call.get("args", {}))) + 4
+    return tokens
+
+
+class ContextManager:
+    """
+    Builds the message list sent to the LLM from the conversation state.
+
+    The state itself is never modified; only the prompt is compacted:
+    - Tool outputs held in the blob store are resolved to their content.
+    - Large tool outputs of earlier turns held in the blob store are replaced by a short
+      reference (tool, object, method, hash). The model can get the full output back with the `expand_tool_output` tool.
+    - If the prompt is still over budget, the oldest turns are dropped. Turns are cut at
+      HumanMessage boundaries, so a tool call is never separated from its tool output. Turns are
+      dropped `drop_step` at a time, so the start of the prompt stays the same for several calls
+      and keeps hitting the provider's prompt cache.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        tool_output_tokens: Optional[int] = None,
+        keep_turns: Optional[int] = None,
+        drop_step: Optional[int] = None,
+    ):
+        """
+        Args:
+            max_tokens: Token budget of the conversation part of the prompt. Defaults to the
+                `CONTEXT_MAX_TOKENS` setting (60000).
+            tool_output_tokens: Tool outputs of earlier turns above this size are replaced by a
+                reference, if they are held in the blob store. Defaults to the
+                `CONTEXT_TOOL_OUTPUT_TOKENS` setting (500).
+            keep_turns: Number of most recent turns that are always sent in full. Defaults to the
+                `CONTEXT_KEEP_TURNS` setting (2).
+            drop_step: Number of turns dropped at once when over budget. Defaults to the
+                `CONTEXT_DROP_STEP` setting (4).
+        """
+        self.max_tokens = max_tokens or get_int_setting("CONTEXT_MAX_TOKENS", 60000)
+        self.tool_output_tokens = tool_output_tokens or get_int_setting("CONTEXT_TOOL_OUTPUT_TOKENS", 500)
+        self.keep_turns = max(1, keep_turns or get_int_setting("CONTEXT_KEEP_TURNS", 2))
+        self.drop_step = max(1, drop_step or get_int_setting("CONTEXT_DROP_STEP", 4))
+
+    def prepare(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Returns the messages to send to the LLM, within the token budget."""
+        turns = split_turns(messages)
+        recent = len(turns) - self.keep_turns
+
+        compacted: List[List[BaseMessage]] = []
+        for index, turn in enumerate(turns):
+            if index >= recent:
+                compacted.append([resolve_message(message) for message in turn])
+            else:
+                compacted.append(self._compact_turn(turn))
+
+        # Drop the oldest turns while over budget, always keeping the current one
+        tokens = [sum(message_tokens(message) for message in turn) for turn in compacted]
+        dropped = 0
+        while dropped < len(compacted) - 1 and sum(tokens[dropped:]) > self.max_tokens:
+            dropped = min(dropped + self.drop_step, len(compacted) - 1)
+
+        result = [message for turn in compacted[dropped:] for message in turn]
+        if dropped:
+            result.insert(
+                0,
+                SystemMessage(
+                    content=f"[{dropped} earlier turn(s) of this conversation were omitted to stay within the context budget.]"
+                ),
+            )
+        return result
+
+    def get_output(self, ref: str) -> Optional[str]:
+        """Returns a compacted tool output by its reference."""
+        return get_blob_store().get(ref)
+
+    def _compact_turn(self, turn: List[BaseMessage]) -> List[BaseMessage]:
+        tool_calls: Dict[str, dict] = {
+            tool_call["id"]: tool_call
+            for message in turn
+            if isinstance(message, AIMessage)
+            for tool_call in message.tool_calls or []
+        }
+
+        result = []
+        for message in turn:
+            ref = message.additional_kwargs.get(BLOB_REF)
+            # Only outputs already in the blob store are compacted: their reference is recorded
+            # with the checkpoints, so it stays expandable as long as the conversation holds it.
+            # Outputs kept inline (below `BLOB_STORE_MIN_BYTES`) are sent in full.
+            if not isinstance(message, ToolMessage) or not ref:
+                result.append(message)
+                continue
+
+            size = len(get_blob_store().get(ref) or "")
+            if size // 4 + 1 <= self.tool_output_tokens:
+                result.append(resolve_message(message))
+                continue
+
+            result.append(
+                message.model_copy(
+                    update={
+                        "content": self._reference(message, ref, size, tool_calls.get(message.tool_call_id)),
+                        "additional_kwargs": {},
+                    }
+                )
+            )
+        return result
+
+    def _reference(self, message: ToolMessage, ref: str, size: int, tool_call: Optional[dict]) -> str:
+        args = (tool_call or {}).get("args", {})
+        subject = ", ".join(f"{name}={args[name]}" for name in REFERENCE_ARGS if args.get(name))
+        return (
+            f"[Output of {message.name or 'tool'}({subject}) from an earlier turn, "
+            f"{size} characters, ref {ref}. "
+            f'Call expand_tool_output with ref "{ref}" if it is needed again.]'
+        )
+
+
+def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Splits a conversation into turns, each starting at a HumanMessage."""
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+_context_manager: Optional[ContextManager] = None
+_context_manager_lock = threading.Lock()
+
+
+def get_context_manager() -> ContextManager:
+    """Returns the process-wide ContextManager, configured from the `CONTEXT_*` settings."""
+    global _context_manager
+
+    with _context_manager_lock:
+        if _context_manager is None:
+            _context_manager = ContextManager()
+        return _context_manager
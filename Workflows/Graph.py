@@ -1,12 +1,18 @@
+import threading
+
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from typing_extensions import Annotated
 from typing_extensions import TypedDict
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 from Utilities.GetAzureLLM import get_azure_llm
-from Prompts import Prompts
+from Utilities.Telemetry import get_telemetry, prompt_bytes
 from Workflows.BasicToolNode import BasicToolNode 
+from Workflows.Checkpointer import get_checkpointer
+from Workflows.LLMCache import get_llm_cache
+from Workflows.PromptAssembly import get_prefix_cache_stats, get_prompt_assembler
 from Workflows.Tools import tools
 
 # Define the state of the graph
@@ -31,29 +37,122 @@ def route_tools(state: State):
 
     return END
 
-def create_graph(memory: MemorySaver):
+# ✅ Process-wide registry: the LLM client and the compiled graph are built once and shared by
+# all sessions. Conversations are kept apart by the `thread_id` of the shared checkpointer.
+_registry_lock = threading.RLock()
+_llm_with_tools = None
+_graph = None
+
+
+def get_llm_with_tools():
+    """Returns the process-wide LLM client with the tools bound, creating it on first use."""
+    global _llm_with_tools
+
+    if _llm_with_tools is None:
+        with _registry_lock:
+            if _llm_with_tools is None:
+                _llm_with_tools = get_azure_llm().bind_tools(tools)
+
+    return _llm_with_tools
+
+
+def get_graph():
+    """
+    Returns the process-wide compiled graph, creating it on first use.
+
+    Sessions bind to their own conversation through the config, i.e.
+    `{"configurable": {"thread_id": <session thread id>}}`.
+    """
+    global _graph
+
+    if _graph is None:
+        with _registry_lock:
+            if _graph is None:
+                _graph = create_graph(get_checkpointer())
+
+    return _graph
+
+
+def delete_thread(thread_id: str) -> None:
+    """Drops the checkpoints of a conversation from the shared checkpointer."""
+    get_checkpointer().delete_thread(thread_id)
+
+
+def traced_node(name: str, func, afunc) -> RunnableLambda:
+    """
+    Wraps the sync and async implementations of a node in a telemetry span. The spans recorded
+    during the step (LLM calls, tools, HTTP requests) are attributed to the conversation of the config.
+    """
+    telemetry = get_telemetry()
+
+    def run(state: State, config: RunnableConfig):
+        with telemetry.conversation(config["configurable"].get("thread_id", "")), telemetry.span("node", name):
+            return func(state)
+
+    async def arun(state: State, config: RunnableConfig):
+        with telemetry.conversation(config["configurable"].get("thread_id", "")), telemetry.span("node", name):
+            return await afunc(state)
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
+
+def create_graph(memory: BaseCheckpointSaver):
     # Get the LLM Chat Model
-    llm = get_azure_llm()
-    llm_with_tools = llm.bind_tools(tools)
-        
+    llm_with_tools = get_llm_with_tools()
+
+    # Builds a prompt with a stable, cacheable prefix within the token budget;
+    # the state keeps the full history
+    prompt_assembler = get_prompt_assembler()
+    prefix_cache_stats = get_prefix_cache_stats()
+
+    # Replays the tool calls of planning steps already seen with the same history (opt-in)
+    llm_cache = get_llm_cache()
+
+    telemetry = get_telemetry()
+
     # Create the state graph
     graph_builder = StateGraph(State)
 
     def chatbot(state: State):
-        system_prompt_message = {"role": "system", "content": Prompts.system_prompt}
-
         if "messages" not in state or not isinstance(state["messages"], list):
             state["messages"] = []
 
-        messages = [system_prompt_message] + state["messages"]
-        return {"messages": [llm_with_tools.invoke(messages)]}
-
-    # Add the nodes to the graph
-    graph_builder.add_node("chatbot", chatbot)
+        prompt = prompt_assembler.assemble(state["messages"])
+        with telemetry.span("llm", "chat") as span:
+            span.bytes_in = prompt_bytes(prompt)
+            cache_key = llm_cache.key(prompt)
+            response = llm_cache.get(cache_key)
+            if response is None:
+                response = llm_with_tools.invoke(prompt)
+                prefix_cache_stats.record(response)
+                llm_cache.put(cache_key, response)
+            else:
+                span.status = "cached"
+            span.add_usage(response)
+        return {"messages": [response]}
+
+    async def achatbot(state: State):
+        prompt = prompt_assembler.assemble(state.get("messages", []))
+        with telemetry.span("llm", "chat") as span:
+            span.bytes_in = prompt_bytes(prompt)
+            cache_key = llm_cache.key(prompt)
+            response = llm_cache.get(cache_key)
+            if response is None:
+                response = await llm_with_tools.ainvoke(prompt)
+                prefix_cache_stats.record(response)
+                llm_cache.put(cache_key, response)
+            else:
+                span.status = "cached"
+            span.add_usage(response)
+        return {"messages": [response]}
+
+    # ✅ Each node has a sync and an async implementation: `stream`/`invoke` run the sync ones,
+    # `astream`/`ainvoke` run the async ones, so one event loop can serve many conversations
+    graph_builder.add_node("chatbot", traced_node("chatbot", chatbot, achatbot))
 
     # Create the tool node
     tool_node = BasicToolNode(tools=tools)
-    graph_builder.add_node("tools", tool_node)
+    graph_builder.add_node("tools", traced_node("tools", tool_node, tool_node.acall))
 
     # Add the conditional edges
     graph_builder.add_conditional_edges("chatbot", route_tools)
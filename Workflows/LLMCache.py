@@ -0,0 +1,141 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from Utilities.GetConfig import get_bool_setting, get_int_setting, get_float_setting
+
+
+def normalize_message(message: BaseMessage) -> dict:
+    """
+    The parts of a message the LLM sees. Ids, timestamps and tool call ids change from one
+    conversation to the next and are left out; whitespace is collapsed.
+    """
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, sort_keys=True)
+    normalized = {"type": message.type, "content": " ".join(content.split())}
+    if getattr(message, "name", None):
+        normalized["name"] = message.name
+    if getattr(message, "tool_calls", None):
+        normalized["tool_calls"] = [
+            {"name": tool_call["name"], "args": tool_call.get("args", {})} for tool_call in message.tool_calls
+        ]
+    return normalized
+
+
+class LLMCache:
+    """
+    An exact cache of LLM responses, keyed by a hash of the normalized prompt.
+
+    Only responses made of tool calls are cached: the planning steps of the workflow ("list the
+    methods", "fetch the signature") produce the same tool calls for the same history, while
+    answers to the user are always generated. The tool calls of a cached response get fresh ids,
+    so it can be replayed in any conversation.
+    """
+
+    def __init__(self, enabled: bool = False, max_entries: int = 512, ttl_seconds: float = 60 * 60):
+        """
+        Args:
+            enabled: The cache is opt-in; when disabled every call goes to the LLM.
+            max_entries: Number of responses held in memory (LRU evicted).
+            ttl_seconds: How long a response is replayed.
+        """
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, messages: List[BaseMessage]) -> Optional[str]:
+        """Hash of the normalized prompt, or None when the cache is disabled."""
+        if not self.enabled:
+            return None
+        payload = json.dumps([normalize_message(message) for message in messages], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[AIMessage]:
+        """Returns a replay of the cached response, or None on a miss."""
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                if entry:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+        response = entry[0]
+        return AIMessage(
+            content=response["content"],
+            tool_calls=[
+                {"name": tool_call["name"], "args": tool_call["args"], "id": f"call_{uuid.uuid4().hex[:24]}"}
+                for tool_call in response["tool_calls"]
+            ],
+            response_metadata={"llm_cache": "hit"},
+        )
+
+    def put(self, key: Optional[str], response: BaseMessage) -> None:
+        """Stores a response if it is a tool-calling planning step."""
+        if key is None or not getattr(response, "tool_calls", None):
+            return
+
+        entry = {
+            "content": response.content,
+            "tool_calls": [
+                {"name": tool_call["name"], "args": tool_call.get("args", {})} for tool_call in response.tool_calls
+            ],
+        }
+        with self._lock:
+            self._entries[key] = (entry, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes every cached response."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the LLM calls answered from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    Returns the process-wide LLM response cache, configured from the `LLM_CACHE_*` settings.
+
+    Settings:
+        LLM_CACHE_ENABLED: Turns the cache on (default: false).
+        LLM_CACHE_MAX_ENTRIES: Number of responses held in memory (default: 512).
+        LLM_CACHE_TTL_SECONDS: Lifetime of a cached response (default: 3600).
+    """
+    global _llm_cache
+
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache(
+                enabled=get_bool_setting("LLM_CACHE_ENABLED", False),
+                max_entries=get_int_setting("LLM_CACHE_MAX_ENTRIES", 512),
+                ttl_seconds=get_float_setting("LLM_CACHE_TTL_SECONDS", 60 * 60),
+            )
+        return _llm_cache
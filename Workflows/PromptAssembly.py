@@ -0,0 +1,141 @@
+import json
+import threading
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+
+from Prompts import Prompts
+from Workflows.BlobStore import resolve_message
+from Workflows.ContextManager import ContextManager, get_context_manager
+
+# The tool whose outputs are hoisted into the system context
+EXAMPLES_TOOL = "get_test_double_examples"
+
+
+class PromptAssembler:
+    """
+    Lays out the prompt so that its beginning is identical from one LLM call to the next.
+
+    Providers with prompt caching only reuse a cached prefix if it matches token for token, so
+    the prompt is built as:
+    1. The system prompt (the tool schemas are sent in a fixed order by `bind_tools`).
+    2. The test double examples loaded in this conversation, hoisted out of the history in the
+       order they were first loaded. A newly loaded example is appended, never inserted.
+    3. The conversation, compacted by the ContextManager, with the example tool outputs replaced
+       by a short note.
+    """
+
+    def __init__(self, system_prompt: Optional[str] = None, context_manager: Optional[ContextManager] = None):
+        """
+        Args:
+            system_prompt: The system prompt. Defaults to `Prompts.system_prompt`.
+            context_manager: Compacts the conversation. Defaults to the process-wide ContextManager.
+        """
+        self.system_prompt = system_prompt or Prompts.system_prompt
+        self.context_manager = context_manager or get_context_manager()
+
+    def assemble(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Returns the full message list for the LLM."""
+        examples: Dict[str, str] = {}
+        conversation = []
+
+        example_types = {
+            tool_call["id"]: str(tool_call.get("args", {}).get("test_double_type", "")).lower().strip()
+            for message in messages
+            if isinstance(message, AIMessage)
+            for tool_call in message.tool_calls or []
+            if tool_call.get("name") == EXAMPLES_TOOL
+        }
+
+        for message in messages:
+            example_type = example_types.get(getattr(message, "tool_call_id", None))
+            if isinstance(message, ToolMessage) and example_type:
+                text = _example_text(message)
+                if text is not None:
+                    # Dicts keep the order in which the examples were first loaded
+                    examples.setdefault(example_type, text)
+                    message = message.model_copy(
+                        update={
+                            "content": f"[The {example_type} test double examples are loaded into the system context.]",
+                            "additional_kwargs": {},
+                        }
+                    )
+            conversation.append(message)
+
+        prefix: List[BaseMessage] = [SystemMessage(content=self.system_prompt)]
+        if examples:
+            prefix.append(
+                SystemMessage(
+                    content="Test double examples loaded in this conversation:\n\n"
+                    + "\n\n".join(f"### {example_type}\n{text}" for example_type, text in examples.items())
+                )
+            )
+
+        return prefix + self.context_manager.prepare(conversation)
+
+
+def _example_text(message: ToolMessage) -> Optional[str]:
+    """The example text of a successful examples tool output, or None for errors."""
+    content = resolve_message(message).content
+    if not isinstance(content, str) or content.startswith("Error occurred in tool"):
+        return None
+    try:
+        text = json.loads(content)
+    except ValueError:
+        return None
+    return text if isinstance(text, str) and not text.startswith("Error reading file") else None
+
+
+class PrefixCacheStats:
+    """Counts prompt tokens and the part of them served from the provider's prompt cache."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, message: BaseMessage) -> None:
+        """Adds the token usage reported in the metadata of an LLM response."""
+        prompt_tokens, cached_tokens = _prompt_usage(message)
+        if not prompt_tokens:
+            return
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the prompt tokens that were read from the prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+def _prompt_usage(message: BaseMessage):
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        return usage["input_tokens"], (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    details = token_usage.get("prompt_tokens_details") or {}
+    return token_usage.get("prompt_tokens", 0) or 0, details.get("cached_tokens", 0) or 0
+
+
+_prompt_assembler: Optional[PromptAssembler] = None
+_prefix_cache_stats = PrefixCacheStats()
+_prompt_assembler_lock = threading.Lock()
+
+
+def get_prompt_assembler() -> PromptAssembler:
+    """Returns the process-wide PromptAssembler."""
+    global _prompt_assembler
+
+    with _prompt_assembler_lock:
+        if _prompt_assembler is None:
+            _prompt_assembler = PromptAssembler()
+        return _prompt_assembler
+
+
+def get_prefix_cache_stats() -> PrefixCacheStats:
+    """Returns the prompt cache statistics of the process."""
+    return _prefix_cache_stats
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from DocumentLoaders.RepoIndex import get_repo_index
+from Utilities.GetConfig import get_setting, get_int_setting, get_float_setting
+
+# Repository the source tools read from (see Utilities/GetClassSourceCode.py)
+SOURCE_REPO = "cisco-it-finance/sap-brim-repo"
+SOURCE_BRANCH = "dha-main"
+
+# Tools whose output only depends on their arguments and on one ABAP object of the repository:
+# tool name -> (argument holding the object name, abapGit object type)
+SOURCE_TOOLS: Dict[str, Tuple[str, str]] = {
+    "get_method_list": ("class_name", "clas"),
+    "get_class_definition": ("class_name", "clas"),
+    "get_method_code": ("class_name", "clas"),
+    "get_interface_definition": ("interface_name", "intf"),
+}
+
+
+def normalize_args(args: dict) -> dict:
+    """ABAP names are case insensitive: string arguments are compared stripped and lower-cased."""
+    return {
+        name: value.strip().lower() if isinstance(value, str) else value
+        for name, value in sorted(args.items())
+        if value not in (None, "")
+    }
+
+
+class ToolCache:
+    """
+    A per-process (per pod) cache of tool outputs, shared by the sessions of the process.
+
+    Entries are keyed by tool name, normalized arguments and the SHA of the source file the
+    output was computed from (taken from the RepoIndex), so a changed class is fetched again and
+    no invalidation is needed. Concurrent identical calls are coalesced: the first one runs the
+    tool and the others wait for its output (single flight).
+
+    Entries are held in an in-process LRU and, when a database is configured, in SQLite, so they
+    survive a restart. The database is in WAL mode and belongs to one process: replicas must each
+    have their own file, as WAL does not work on a volume shared between hosts. Replicas therefore
+    do not share outputs; the same call on another replica runs the tool again.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 1024,
+        ttl_seconds: float = 7 * 24 * 60 * 60,
+    ):
+        """
+        Args:
+            db_path: Path of the SQLite database. `None` keeps the cache in memory only.
+            max_entries: Number of outputs held in memory (LRU evicted).
+            ttl_seconds: How long an output is kept. Outputs never go stale (the key holds the
+                source SHA); the TTL only bounds the size of the database.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._last_cleanup = 0.0
+
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_outputs (key TEXT PRIMARY KEY, content TEXT, stored_at REAL)"
+            )
+            self._db.commit()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def invoke(self, tool, args: dict) -> str:
+        """Runs a tool through the cache and returns its output serialized as JSON."""
+        key = self._cache_key(tool.name, args, self._source_sha(tool.name, args))
+        if key is None:
+            return json.dumps(tool.invoke(args))
+
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            content = json.dumps(tool.invoke(args))
+        except BaseException as error:
+            self._finish(key, future, error=error)
+            raise
+        self._finish(key, future, content=content)
+        return content
+
+    async def ainvoke(self, tool, args: dict) -> str:
+        """Async version of `invoke`."""
+        key = self._cache_key(tool.name, args, await self._asource_sha(tool.name, args))
+        if key is None:
+            return json.dumps(await tool.ainvoke(args))
+
+        future, leader = self._join(key)
+        if not leader:
+            # shield: a caller timing out must not cancel the shared call
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            content = json.dumps(await tool.ainvoke(args))
+        except asyncio.CancelledError:
+            self._finish(key, future, error=RuntimeError(f"The shared call of '{tool.name}' was cancelled."))
+            raise
+        except Exception as error:
+            self._finish(key, future, error=error)
+            raise
+        self._finish(key, future, content=content)
+        return content
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns a cached output, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db:
+                row = self._db.execute(
+                    "SELECT content, stored_at FROM tool_outputs WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._store_in_memory(key, entry)
+
+            if entry and time.time() - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return entry[0]
+            return None
+
+    def put(self, key: str, content: str) -> None:
+        """Stores the output of a tool call."""
+        entry = (content, time.time())
+        with self._lock:
+            self._store_in_memory(key, entry)
+            if self._db:
+                self._db.execute("INSERT OR REPLACE INTO tool_outputs VALUES (?, ?, ?)", (key, *entry))
+                # Drop the expired outputs at most once an hour
+                if entry[1] - self._last_cleanup > 60 * 60:
+                    self._last_cleanup = entry[1]
+                    self._db.execute("DELETE FROM tool_outputs WHERE stored_at < ?", (entry[1] - self.ttl_seconds,))
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Removes every cached output."""
+        with self._lock:
+            self._entries.clear()
+            if self._db:
+                self._db.execute("DELETE FROM tool_outputs")
+                self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the cacheable calls answered without running the tool (cached or coalesced)."""
+        calls = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / calls if calls else 0.0
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """
+        Returns the future holding the output of a call and whether the caller has to run it
+        (leader) or only wait for it.
+        """
+        cached = self.get(key)
+
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+                future = Future()
+                future.set_result(cached)
+                return future, False
+
+            if key in self._inflight:
+                self.coalesced += 1
+                return self._inflight[key], False
+
+            self.misses += 1
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _finish(self, key: str, future: Future, content: Optional[str] = None, error: Optional[BaseException] = None) -> None:
+        """Publishes the output of a leader call to the waiting callers; only outputs are cached, errors are not."""
+        if error is None:
+            self.put(key, content)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is None:
+            future.set_result(content)
+        else:
+            future.set_exception(error)
+
+    @staticmethod
+    def _cache_key(tool_name: str, args: dict, source_sha: Optional[str]) -> Optional[str]:
+        if not source_sha:
+            return None
+        payload = json.dumps(
+            {"tool": tool_name, "args": normalize_args(args), "sha": source_sha},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _source_sha(tool_name: str, args: dict) -> Optional[str]:
+        """SHA of the source file a call reads, or None if the call is not cacheable."""
+        if tool_name not in SOURCE_TOOLS:
+            return None
+        arg_name, object_type = SOURCE_TOOLS[tool_name]
+        if not isinstance(args.get(arg_name), str) or not args[arg_name].strip():
+            return None
+        try:
+            entry = get_repo_index(SOURCE_REPO, SOURCE_BRANCH).lookup(args[arg_name], object_type)
+        except Exception:
+            # The tool itself reports why the repository cannot be read
+            return None
+        return entry.sha if entry else None
+
+    @staticmethod
+    async def _asource_sha(tool_name: str, args: dict) -> Optional[str]:
+        if tool_name not in SOURCE_TOOLS:
+            return None
+        arg_name, object_type = SOURCE_TOOLS[tool_name]
+        if not isinstance(args.get(arg_name), str) or not args[arg_name].strip():
+            return None
+        try:
+            entry = await get_repo_index(SOURCE_REPO, SOURCE_BRANCH).alookup(args[arg_name], object_type)
+        except Exception:
+            return None
+        return entry.sha if entry else None
+
+    def _store_in_memory(self, key: str, entry: Tuple[str, float]) -> None:
+        """Adds an entry to the LRU and evicts the oldest ones beyond the budget. Caller holds the lock."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_tool_cache: Optional[ToolCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolCache:
+    """
+    Returns the process-wide tool cache, configured from the `TOOL_CACHE_*` settings.
+
+    Settings:
+        TOOL_CACHE_PATH: SQLite database file (default: `.cache/tools.sqlite3`, empty to disable).
+            It must be on a local volume and not be shared with other pods.
+        TOOL_CACHE_MAX_ENTRIES: Number of outputs held in memory (default: 1024).
+        TOOL_CACHE_TTL_SECONDS: Lifetime of a cached output (default: 604800).
+    """
+    global _tool_cache
+
+    with _tool_cache_lock:
+        if _tool_cache is None:
+            _tool_cache = ToolCache(
+                db_path=get_setting("TOOL_CACHE_PATH", ".cache/tools.sqlite3") or None,
+                max_entries=get_int_setting("TOOL_CACHE_MAX_ENTRIES", 1024),
+                ttl_seconds=get_float_setting("TOOL_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60),
+            )
+        return _tool_cache
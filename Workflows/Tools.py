@@ -1,4 +1,5 @@
 from Tools.GetClassDefinition import GetClassDefinition
+from Tools.ExpandToolOutput import ExpandToolOutput
 from Tools.GetExamples import GetExamples
 from Tools.GetInterfaceDefinition import GetInterfaceDefinition
 from Tools.GetMethodCode import GetMethodCode
@@ -13,5 +14,6 @@ tools = [
     GetInterfaceDefinition(),
     GetMethodCode(),
     GetTableSchema(),
-    GetExamples()
+    GetExamples(),
+    ExpandToolOutput(),
 ]   
\ No newline at end of file
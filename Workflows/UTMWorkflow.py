@@ -1,51 +1,17 @@
 import traceback
 
-from typing import Annotated
-from typing_extensions import TypedDict
+from Workflows.Graph import get_graph, delete_thread
 
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
-
-from ChatModels.GetAzureLLM import CiscoAzureOpenAI
-from Prompts import Prompts
-from Workflows.BasicToolNode import BasicToolNode
-from ChatModels.GetAuthToken import TokenManager
-
-from Workflows.Tools import tools
-
-
-# Define the state of the graph
-class State(TypedDict):
-    messages: Annotated[list, add_messages]
+# The conversation of the command line chatbot in the shared checkpointer
+THREAD_ID = "1"
 
 
 def clear_memory():
     """Clears the saved memory state."""
-    global memory  # Access the global memory instance
-    memory = MemorySaver()  # Reinitialize to clear past states
+    delete_thread(THREAD_ID)
     print("🔄 Memory cleared successfully!")
 
 
-def route_tools(state: State):
-    """
-    Use in the conditional_edge to route to the ToolNode if the last message
-    has tool calls. Otherwise, route to the end.
-    """
-
-    messages = state.get("messages", [])
-
-    if not messages:
-        raise ValueError(f"No messages found in input state to tool_edge: {state}")
-
-    ai_message = messages[-1]  # Always get the last message
-
-    if hasattr(ai_message, "tool_calls") and ai_message.tool_calls:
-        return "tools"
-
-    return END
-
-
 # Define the tools the chatbot will use
 # @tool
 # def human_assistance(query: str) -> str:
@@ -54,55 +20,12 @@ def route_tools(state: State):
 #     # return str(human_response)
 #     return human_response["data"]
 
-# The memory saver will save the state of the graph to disk
-memory = MemorySaver()
-
-
-def create_graph():
-    # Get the LLM Chat Model
-    llm = CiscoAzureOpenAI(token_manager=TokenManager()).get_llm()
-
-    # Create the state graph
-    graph_builder = StateGraph(State)
-
-    llm_with_tools = llm.bind_tools(tools)
-
-    def chatbot(state: State):
-        system_prompt_message = {"role": "system", "content": Prompts.system_prompt}
-
-        if "messages" not in state or not isinstance(state["messages"], list):
-            state["messages"] = []
-
-        messages = [system_prompt_message] + state["messages"]
-        return {"messages": [llm_with_tools.invoke(messages)]}
-
-    # Add the nodes to the graph
-    graph_builder.add_node("chatbot", chatbot)
-
-    # Create the tool node
-    tool_node = BasicToolNode(tools=tools)
-    graph_builder.add_node("tools", tool_node)
-
-    # Add the conditional edges
-    graph_builder.add_conditional_edges("chatbot", route_tools)
-
-    # Add the nodes to the graph
-    graph_builder.add_edge("tools", "chatbot")
-    graph_builder.add_edge(START, "chatbot")
-    graph = graph_builder.compile(checkpointer=memory)
-
-    return graph
-
-
-def get_graph():
-    return create_graph()
-
 
 def token_usage():
     print("\nTokens Usage: ")
 
     graph = get_graph()
-    config = {"configurable": {"thread_id": "1"}}
+    config = {"configurable": {"thread_id": THREAD_ID}}
 
     try:
         # Get the current state of the graph
@@ -132,7 +55,7 @@ def stream_graph_updates(user_input: str):
     graph = get_graph()
 
     # Configurable is a dictionary that can be passed to the graph to configure the graph
-    config = {"configurable": {"thread_id": "1"}}
+    config = {"configurable": {"thread_id": THREAD_ID}}
 
     events = graph.stream(
         {"messages": [{"role": "user", "content": user_input}]},
@@ -0,0 +1,12 @@
+"""
+Runs all benchmarks:
+    python -m benchmarks
+"""
+
+from benchmarks import bench_extractors, bench_get_dependencies
+
+print("== Dependency extraction ==")
+bench_get_dependencies.main()
+
+print("\n== Extractors ==")
+bench_extractors.main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of the extractors behind the class tools, on every source of the corpus.
+
+Each extractor is timed cold (the source is parsed from scratch), which is what a tool call
+pays the first time it sees a class. Results can be saved and compared against a baseline,
+so regressions in the tool hot paths show up as a non-zero exit code.
+
+Run from the repository root:
+    python -m benchmarks.bench_extractors
+    python -m benchmarks.bench_extractors --save baseline.json
+    python -m benchmarks.bench_extractors --compare baseline.json --threshold 0.25
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+from typing import Callable, Dict
+
+from Utilities.AbapClass import _parse
+from Utilities.AbapLexer import iter_statements, tokenize
+from Utilities.GetDependencies import extract_dependencies
+from Utilities.RemoveComments import remove_comments
+from benchmarks.corpus import best_of, load_corpus
+
+
+def _method_list(source: str):
+    return [method.lower() for method in _parse(source, "benchmark").method_names]
+
+
+def _method_code(source: str):
+    abap_class = _parse(source, "benchmark")
+    if abap_class.methods:
+        return abap_class.method_code(abap_class.get_method(abap_class.methods[-1].name))
+
+
+EXTRACTORS: Dict[str, Callable[[str], object]] = {
+    "remove_comments": remove_comments,
+    "tokenize": lambda source: deque(tokenize(source), maxlen=0),
+    "statements": lambda source: deque(iter_statements(tokenize(source)), maxlen=0),
+    "parse_class": lambda source: _parse(source, "benchmark"),
+    "class_definition": lambda source: _parse(source, "benchmark").definition_code,
+    "method_list": _method_list,
+    "method_code": _method_code,
+    "get_dependencies": lambda source: extract_dependencies(_parse(source, "benchmark")),
+}
+
+
+def run(repeat: int) -> Dict[str, Dict[str, float]]:
+    """Times every extractor on every corpus source. Returns {source: {extractor: milliseconds}}."""
+    results = {}
+    for name, source in load_corpus().items():
+        results[name] = {
+            extractor: best_of(lambda: function(source), repeat) * 1000
+            for extractor, function in EXTRACTORS.items()
+        }
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    header = f"{'source':<32}" + "".join(f"{extractor:>18}" for extractor in EXTRACTORS)
+    print(header)
+    print("-" * len(header))
+    for name, timings in results.items():
+        print(f"{name:<32}" + "".join(f"{timings[extractor]:>15.2f} ms" for extractor in EXTRACTORS))
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> int:
+    """Prints the timings that got slower than the baseline by more than `threshold`. Returns their count."""
+    regressions = 0
+    for name, timings in results.items():
+        for extractor, elapsed in timings.items():
+            before = baseline.get(name, {}).get(extractor)
+            # Sub-millisecond timings are too noisy to compare
+            if before and max(before, elapsed) > 1 and elapsed > before * (1 + threshold):
+                regressions += 1
+                print(f"REGRESSION {name} / {extractor}: {before:.2f} ms -> {elapsed:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the fastest one is kept.")
+    parser.add_argument("--save", help="Write the timings to this JSON file.")
+    parser.add_argument("--compare", help="Compare the timings with a JSON file written by --save.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before reporting a regression.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark of the dependency extraction on a synthetic 20k line ABAP class.
+
+Compares the previous approach (one freshly compiled `METHOD <name>.*?ENDMETHOD` regex per
+method, searched from the start of the class) with the single-pass method splitter.
+
+Run from the repository root:
+    python -m benchmarks.bench_get_dependencies
+"""
+
+import re
+
+from Utilities.AbapClass import parse_abap_class, _parse
+from Utilities.GetDependencies import extract_dependencies
+from benchmarks.corpus import best_of, build_class
+
+
+def legacy_extract_table_names(method_body: str) -> list:
+    """The previous regex based table extraction, kept as a fixed baseline."""
+    select_query_pattern = re.compile(
+        r"\bSELECT\b.*?\bFROM\b.*?(?=\bINTO\b|\bWHERE\b|\bORDER\b|\bGROUP\b|\bHAVING\b|\bENDSELECT\b|$)",
+        re.IGNORECASE | re.DOTALL
+    )
+    table_pattern = re.compile(
+        r"(?i)\b(?:FROM|(?:(?:LEFT|RIGHT|FULL|INNER|CROSS)\s*(?:OUTER\s*)?)?JOIN)\s+([A-Za-z0-9_]+)",
+        re.IGNORECASE
+    )
+    tables = {}
+    for match in select_query_pattern.finditer(method_body):
+        for table in table_pattern.findall(match.group(0).strip()):
+            tables.setdefault(table.upper(), None)
+    return list(tables)
+
+
+def legacy_extract_class_references(method_body: str) -> list:
+    """The previous regex based class extraction, kept as a fixed baseline."""
+    instantiation_pattern = re.compile(
+        r"\b(?:CREATE\s+OBJECT\s+\w+\s+TYPE\s+|CREATE\s+OBJECT\s+|DATA\s*\(\w+\)\s*=\s*NEW\s+|NEW\s+)(CL_\w+|ZCL_\w+)",
+        re.IGNORECASE
+    )
+    static_call_pattern = re.compile(r"\b(CL_\w+|ZCL_\w+)\s*=>\s*\w+\s*\(", re.IGNORECASE)
+    classes = {}
+    for class_name in instantiation_pattern.findall(method_body) + static_call_pattern.findall(method_body):
+        classes.setdefault(class_name.upper(), None)
+    return list(classes)
+
+
+def legacy_get_dependencies(class_code: str) -> dict:
+    """The previous implementation: O(methods x class size)."""
+    dependencies = {"interfaces": [], "methods": {}}
+
+    interface_pattern = re.compile(r"\bINTERFACES\s+(\w+)", re.IGNORECASE)
+    dependencies["interfaces"] = [interface.upper() for interface in interface_pattern.findall(class_code)]
+
+    method_pattern = re.compile(r"\b[Mm]ETHOD\s+([/\w~]+)\s*\.", re.IGNORECASE)
+    methods = [method.upper() for method in method_pattern.findall(class_code)]
+
+    for method in methods:
+        method_body_pattern = re.compile(
+            r"METHOD\s+" + method + r".*?ENDMETHOD", re.IGNORECASE | re.DOTALL
+        )
+        method_body = method_body_pattern.search(class_code).group()
+        function_pattern = re.compile(r"CALL\s+FUNCTION\s+'(\w+)'", re.IGNORECASE)
+        dependencies["methods"][method] = {
+            "codelines": len([line for line in method_body.splitlines() if line.strip()]),
+            "tables": legacy_extract_table_names(method_body),
+            "function_modules": list(set(function.upper() for function in function_pattern.findall(method_body))),
+            "classes": legacy_extract_class_references(method_body),
+            "source_code": method_body,
+        }
+
+    return dependencies
+
+
+def main():
+    class_code = build_class()
+    print(f"Synthetic class: {class_code.count(chr(10)) + 1} lines, {len(class_code) / 1024:.0f} KB")
+
+    # Uncached parse + extraction, to compare like for like with the legacy code
+    legacy = best_of(lambda: legacy_get_dependencies(class_code))
+    single_pass = best_of(lambda: extract_dependencies(_parse(class_code, "benchmark")))
+
+    # Split only, i.e. the part that used to be quadratic
+    split_only = best_of(lambda: _parse(class_code, "benchmark"))
+
+    # Repeated call on the same source, served from the parsed-class memo
+    parse_abap_class(class_code)
+    memoized = best_of(lambda: parse_abap_class(class_code))
+
+    print(f"legacy get_dependencies      : {legacy * 1000:9.1f} ms")
+    print(f"single-pass get_dependencies : {single_pass * 1000:9.1f} ms  ({legacy / single_pass:.1f}x)")
+    print(f"single-pass method split     : {split_only * 1000:9.1f} ms")
+    print(f"memoized parse               : {memoized * 1000:9.3f} ms")
+
+    assert legacy_get_dependencies(class_code)["methods"].keys() == extract_dependencies(_parse(class_code, "benchmark"))["methods"].keys()
+
+
+if __name__ == "__main__":
+    main()
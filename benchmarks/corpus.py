@@ -0,0 +1,86 @@
+"""
+Corpus of ABAP sources for the benchmarks.
+
+Synthetic classes of increasing size stand in for the real-size classes of the repository,
+the test double examples shipped in `Examples/` add real-world formatting, and any `*.abap`
+file in the folder given by `ABAP_BENCH_CORPUS` (e.g. a mirror snapshot) is added as well.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+METHOD_TEMPLATE = """  METHOD {name}.
+    DATA lt_items TYPE STANDARD TABLE OF zdt_item_{index}.
+    " Read the header of the order
+    SELECT SINGLE * FROM zdt_head_{index} INTO @DATA(ls_head) WHERE id = @iv_id.
+    IF sy-subrc <> 0.
+      RETURN.
+    ENDIF.
+    SELECT a~item, b~price
+      FROM zdt_item_{index} AS a
+      INNER JOIN zdt_price AS b ON a~item = b~item
+      INTO TABLE @lt_items
+      WHERE a~id = @iv_id.
+    LOOP AT lt_items ASSIGNING FIELD-SYMBOL(<ls_item>).
+      <ls_item>-price = <ls_item>-price * 2.
+      CALL FUNCTION 'Z_FM_CONVERT_{index}'
+        EXPORTING
+          iv_value = <ls_item>-price.
+    ENDLOOP.
+    DATA(lo_helper) = NEW zcl_helper_{index}( ).
+    lo_helper->run( ).
+    zcl_logger=>log( |Processed {{ lines( lt_items ) }} items| ).
+    rv_count = lines( lt_items ).
+  ENDMETHOD.
+"""
+
+COMMENT_BLOCK = """*----------------------------------------------------------------------*
+* Change history
+* {index}: Adjusted the pricing logic
+*----------------------------------------------------------------------*
+"""
+
+
+def build_class(target_lines: int = 20_000) -> str:
+    """Builds a synthetic class with enough methods to reach `target_lines` lines."""
+    method_lines = METHOD_TEMPLATE.count("\n") + COMMENT_BLOCK.count("\n")
+    method_count = max(1, target_lines // method_lines)
+
+    definition = ["CLASS zcl_benchmark DEFINITION PUBLIC FINAL CREATE PUBLIC.", "  PUBLIC SECTION.", "    INTERFACES: zif_benchmark, if_serializable_object."]
+    definition += [f"    METHODS method_{index} IMPORTING iv_id TYPE string RETURNING VALUE(rv_count) TYPE i." for index in range(method_count)]
+    definition += ["  PROTECTED SECTION.", "  PRIVATE SECTION.", "    DATA mv_state TYPE i.", "ENDCLASS.", ""]
+
+    implementation = ["CLASS zcl_benchmark IMPLEMENTATION."]
+    for index in range(method_count):
+        implementation.append(COMMENT_BLOCK.format(index=index) + METHOD_TEMPLATE.format(name=f"method_{index}", index=index))
+    implementation += ["ENDCLASS."]
+
+    return "\n".join(definition + implementation)
+
+
+def load_corpus() -> Dict[str, str]:
+    """Returns the benchmark corpus as {name: ABAP source}."""
+    corpus = {f"synthetic_{lines // 1000}k": build_class(lines) for lines in (1_000, 5_000, 20_000)}
+
+    for example in sorted((BASE_DIR / "Examples").glob("*.txt")):
+        corpus[f"example_{example.stem}"] = example.read_text(encoding="utf-8")
+
+    if corpus_dir := os.getenv("ABAP_BENCH_CORPUS"):
+        for source_file in sorted(Path(corpus_dir).rglob("*.clas.abap")):
+            corpus[source_file.name] = source_file.read_text(encoding="utf-8")
+
+    return corpus
+
+
+def best_of(function: Callable[[], object], repeat: int = 3) -> float:
+    """Runs `function` `repeat` times and returns the fastest wall time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
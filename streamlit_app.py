@@ -1,17 +1,23 @@
 from pydantic import ValidationError
 import streamlit as st
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_community.callbacks import get_openai_callback
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, ToolMessage
 from Prompts import GreetingMsg
 
 from datetime import datetime
 import time
+import uuid
 import pytz
-import re
  
 from Workflows.Tools import tools
-from Workflows.Graph import create_graph
+from Workflows.Graph import delete_thread, get_graph
+from Workflows.BlobStore import resolve_message
+from Workflows.Checkpointer import get_checkpointer
+from Workflows.LLMCache import get_llm_cache
+from Workflows.ToolCache import get_tool_cache
+from Workflows.PromptAssembly import get_prefix_cache_stats
+from Utilities.AbapPatterns import MARKDOWN_CODE_BLOCK
+from Utilities.GetConfig import get_float_setting, get_setting
+from Utilities.Telemetry import get_telemetry, start_metrics_server
 
 # Set page config (has to be done before any Streamlit command)
 st.set_page_config(
@@ -20,21 +26,43 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Ensure all session state variables are initialized
-# Step 1: Ensure "memory" is initialized first
-if "memory" not in st.session_state:
-    st.session_state["memory"] = MemorySaver()
+# Minimum seconds between two re-renders of a streaming response
+STREAM_RENDER_INTERVAL = get_float_setting("STREAM_RENDER_INTERVAL_SECONDS", 0.05)
+
+# The replica serving this process; its conversations are stored on its own volume
+POD_NAME = get_setting("POD_NAME", "")
+
+# ✅ Prometheus metrics on `METRICS_PORT` (started once per process, disabled when unset)
+start_metrics_server()
 
-# Step 2: Now initialize other session variables, using memory
+# ✅ The compiled graph is shared by all sessions of the process
+@st.cache_resource
+def load_graph():
+    return get_graph()
+
+
+# Ensure all session state variables are initialized
 for var, default in {
     "total_token_usage": 0,
     "last_token_usage": 0,
-    "show_logs": False, 
-    "graph": create_graph(st.session_state["memory"]),  # Now memory is available
+    "show_logs": False,
 }.items():
     if var not in st.session_state:
         st.session_state[var] = default
 
+# Each session has its own conversation in the checkpointer of the pod. The thread id is kept in the
+# URL, so a reload on the same pod (or after it restarts) resumes the conversation from the persisted
+# checkpoints. The id starts with the pod name: a conversation reached on another replica is not
+# there, and the user is told so instead of silently getting an empty one.
+if "thread_id" not in st.session_state:
+    thread_id = st.query_params.get("thread")
+    owner = thread_id.rpartition(".")[0] if thread_id else ""
+    if owner and owner != POD_NAME:
+        st.session_state.thread_elsewhere = owner
+        thread_id = None
+    st.session_state.thread_id = thread_id or (f"{POD_NAME}.{uuid.uuid4()}" if POD_NAME else str(uuid.uuid4()))
+st.query_params["thread"] = st.session_state.thread_id
+
 
 # Override with Custom CSS
 with open("style.css") as f:
@@ -62,7 +90,19 @@ def get_time_html(current_pst_time):
 # Helper: Initialize chat history in session state
 def initialize_chat_history():
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = load_chat_history()
+
+
+def load_chat_history():
+    """Rebuilds the displayed messages of a resumed conversation from its checkpoint."""
+    state = load_graph().get_state(get_config())
+    messages = []
+    for message in state.values.get("messages", []) if state else []:
+        if isinstance(message, HumanMessage):
+            messages.append(HumanMessage(content=message.content, role="user"))
+        elif isinstance(message, AIMessage) and message.content:
+            messages.append(AIMessage(content=message.content, role="assistant"))
+    return messages
 
 
 def extract_code_blocks(text):
@@ -70,10 +110,8 @@ def extract_code_blocks(text):
     Splits the LLM response into alternating text and code segments.
     Handles edge cases where code may appear first, consecutively, or not at all.
     """
-    pattern = (
-        r"```(?:\w+)?\n(.*?)```"  # Matches code blocks enclosed in triple backticks
-    )
-    raw_parts = re.split(pattern, text, flags=re.DOTALL)
+    # Matches code blocks enclosed in triple backticks
+    raw_parts = MARKDOWN_CODE_BLOCK.split(text)
 
     structured_parts = []
     is_code = text.startswith("```")  # Check if the response starts with code
@@ -98,12 +136,12 @@ def display_chat_messages():
             #     else:
             #         st.code(body=content["content"], language="abap", line_numbers=True)
             st.markdown(message.content)
-            st.html(get_time_html(message.additional_kwargs["time"]))
+            st.html(get_time_html(message.additional_kwargs.get("time", "")))
 
 
 # Get the configuration for the graph
 def get_config():
-    return {"configurable": {"thread_id": "1"}}
+    return {"configurable": {"thread_id": st.session_state.thread_id}}
 
 
 # Helper: Add a message to the chat history
@@ -121,60 +159,90 @@ def update_token_usage():
 
 # Streamed response generator using LangGraph
 def response_generator(role, prompt, **kwargs):
+    """
+    Streams the agent response as `(kind, text)` pairs, where kind is "block" for a new
+    paragraph of the response and "delta" for text appended to the last paragraph.
+
+    LLM tokens arrive through the `messages` stream mode as soon as they are generated, while
+    tool calls and tool outputs are taken from the `values` stream mode once they are complete.
+    """
 
     # Define the configuration
     config = get_config()
 
+    # Ids of the AI messages whose content was already streamed token by token
+    streamed_ids = set()
+    current_id = None
+
     with st.spinner("Processing..."):
 
         try:
-            with get_openai_callback() as cb:
-                for event in st.session_state.graph.stream( 
-                    {"messages": [{"role": role, "content": prompt}]},
-                    config=config,
-                    stream_mode="values",
-                ):
-                    if "messages" in event and event["messages"]:
-                        message = event["messages"][-1]
-                        if isinstance(message, HumanMessage):
-                            print(f"\nUser Message: {message.content}")
-                            continue  # Skip user messages
-
-                        elif isinstance(message, AIMessage):
-                            if message.content:
-                                print(f"\nAI Message: {message.content}")
-                                yield message.content
-
-                            elif message.tool_calls:
-                                for tool_call in message.tool_calls:
-                                    markdown_text = f":green[Calling Tool:]\n\n```abap\n{(tool_call['name'])}\n{(tool_call['args'])}\n```"
-                                    print(f"\nAI Tool Call: {markdown_text}")
-                                    if st.session_state.show_logs:
-                                        yield markdown_text
-
-                        elif isinstance(message, ToolMessage):
-                            if message.content:
-                                print(f"\nTool Message: {message.content}")
-                                if "\\n" in message.content:
-                                    # Convert to a proper string (removes escaped backslashes)
-                                    formatted_string = message.content.replace(
-                                        "\\n", "\n"
-                                    )
-                                    markdown_text = f":green[Tool Output:]\n\n```abap\n{formatted_string}\n```"
-                                    print(f"\nTool Message Output having ABAP Code")                                    
-                                    if st.session_state.show_logs:
-                                        yield markdown_text
-
-            st.session_state.total_token_usage = cb.total_tokens
+            for mode, event in load_graph().stream(
+                {"messages": [{"role": role, "content": prompt}]},
+                config=config,
+                stream_mode=["messages", "values"],
+            ):
+                if mode == "messages":
+                    chunk, metadata = event
+                    # Only forward the tokens of the chatbot, not the messages produced by tools
+                    if (
+                        isinstance(chunk, AIMessageChunk)
+                        and chunk.content
+                        and metadata.get("langgraph_node") == "chatbot"
+                    ):
+                        if chunk.id != current_id:
+                            current_id = chunk.id
+                            streamed_ids.add(chunk.id)
+                            yield "block", chunk.content
+                        else:
+                            yield "delta", chunk.content
+                    continue
+
+                if "messages" in event and event["messages"]:
+                    message = event["messages"][-1]
+                    if isinstance(message, HumanMessage):
+                        print(f"\nUser Message: {message.content}")
+                        continue  # Skip user messages
+
+                    elif isinstance(message, AIMessage):
+                        if message.content:
+                            print(f"\nAI Message: {message.content}")
+                            # Only yield content the LLM did not stream already
+                            if message.id not in streamed_ids:
+                                yield "block", message.content
+
+                        elif message.tool_calls:
+                            for tool_call in message.tool_calls:
+                                markdown_text = f":green[Calling Tool:]\n\n```abap\n{(tool_call['name'])}\n{(tool_call['args'])}\n```"
+                                print(f"\nAI Tool Call: {markdown_text}")
+                                if st.session_state.show_logs:
+                                    yield "block", markdown_text
+
+                    elif isinstance(message, ToolMessage):
+                        # Large tool outputs are stored as blob references in the state
+                        message = resolve_message(message)
+                        if message.content:
+                            print(f"\nTool Message: {message.content}")
+                            if "\\n" in message.content:
+                                # Convert to a proper string (removes escaped backslashes)
+                                formatted_string = message.content.replace(
+                                    "\\n", "\n"
+                                )
+                                markdown_text = f":green[Tool Output:]\n\n```abap\n{formatted_string}\n```"
+                                print(f"\nTool Message Output having ABAP Code")
+                                if st.session_state.show_logs:
+                                    yield "block", markdown_text
+
+            update_token_usage()
 
         except Exception as error:
             print(f"\nException caught `response_generator`")
 
             # Check if error has 'args' and it's a dictionary
             if hasattr(error, "args") and len(error.args) > 0:
-                yield str(error.args[0])
+                yield "block", str(error.args[0])
             else:
-                yield "Some exception was caught in `response_generator`"
+                yield "block", "Some exception was caught in `response_generator`"
 
 
 def initial_greeting():  # Display initial greeting message
@@ -194,21 +262,17 @@ def initial_greeting():  # Display initial greeting message
 
 
 def get_total_token_usage():
-    # Fetches token usage statistics from the graph state.
+    # Sums the token usage of all the LLM responses of the conversation
     try:
-        snapshot = st.session_state.graph.get_state(get_config())
-        if snapshot:
-            response_metadata = snapshot.values.get("messages", [])[
-                -1
-            ].response_metadata
-            if response_metadata:
-                token_usage = response_metadata.get("token_usage", {})
-                if token_usage:
-                    # st.toast(f"Total Token Usage:{token_usage}")
-                    return token_usage["total_tokens"]
-            else:
-                st.toast(f":red[Error fetching token usage:] {str(e)}")
-                return 0
+        snapshot = load_graph().get_state(get_config())
+        total_tokens = 0
+        for message in snapshot.values.get("messages", []) if snapshot else []:
+            if not isinstance(message, AIMessage):
+                continue
+            usage_metadata = message.usage_metadata or {}
+            token_usage = message.response_metadata.get("token_usage") or {}
+            total_tokens += usage_metadata.get("total_tokens") or token_usage.get("total_tokens") or 0
+        return total_tokens
     except Exception as e:
         st.toast(f":red[Error fetching token usage:] {str(e)}")
         return 0
@@ -249,6 +313,50 @@ def add_side_bar():
                 border=False,
             )
 
+        # Share of the prompt tokens served from the provider's prompt cache
+        prefix_cache_stats = get_prefix_cache_stats()
+        if prefix_cache_stats.calls:
+            st.caption(f"Prompt cache hit rate: {prefix_cache_stats.hit_rate:.0%}")
+
+        # Share of the tool calls answered from the cross-session tool cache
+        tool_cache = get_tool_cache()
+        if tool_cache.hits + tool_cache.coalesced + tool_cache.misses:
+            st.caption(f"Tool cache hit rate: {tool_cache.hit_rate:.0%}")
+
+        # Share of the LLM calls replayed from the response cache (when enabled)
+        llm_cache = get_llm_cache()
+        if llm_cache.hits + llm_cache.misses:
+            st.caption(f"LLM cache hit rate: {llm_cache.hit_rate:.0%}")
+
+        # Size of the checkpoints written per graph step
+        checkpoint_stats = get_checkpointer().stats
+        if checkpoint_stats.puts:
+            st.caption(
+                f"Checkpoint writes: {checkpoint_stats.last_bytes / 1024:.1f} KB last step, "
+                f"{checkpoint_stats.bytes_per_put / 1024:.1f} KB/step on average"
+            )
+
+    # Timeline of the graph steps, tool calls, LLM calls and requests of this conversation
+    timeline = get_telemetry().timeline(st.session_state.thread_id)
+    if timeline:
+        with st.sidebar.expander(":material/timeline: Timeline"):
+            st.dataframe(
+                [
+                    {
+                        "time": datetime.fromtimestamp(span.started_at, pytz.timezone("America/Los_Angeles")).strftime("%H:%M:%S"),
+                        "kind": span.kind,
+                        "name": span.name,
+                        "ms": round(span.wall_time * 1000),
+                        "queue ms": round(span.queue_time * 1000),
+                        "bytes in/out": f"{span.bytes_in}/{span.bytes_out}",
+                        "tokens in/out": f"{span.prompt_tokens}/{span.completion_tokens}",
+                        "status": span.status,
+                    }
+                    for span in reversed(timeline)
+                ],
+                hide_index=True,
+            )
+
     with st.sidebar.container(border=False):
         # Add a separator
         st.write("")
@@ -257,7 +365,9 @@ def add_side_bar():
         st.caption(":material/settings: **Manage History**")
         # Reset Button
         if st.button(":material/restart_alt: Clear Chat History", type="secondary"):
-            st.session_state["reset_memory"] = True  # Set flag for reset
+            # Drop the conversation from the checkpointer, a new thread id is assigned on rerun
+            delete_thread(st.session_state.thread_id)
+            del st.query_params["thread"]
             # Reset all the session state variables
             st.session_state.clear()
             st.toast(":green[Chat history was cleared]", icon=":material/ink_eraser:")
@@ -272,6 +382,13 @@ def main():
     # Setting Header
     st.header(":blue[SAP ABAP Unit Testing AI Agent]", divider=True)
 
+    if owner := st.session_state.pop("thread_elsewhere", None):
+        st.warning(
+            f"The conversation of this link is stored on the replica {owner}, which did not serve this "
+            "request. A new conversation was started.",
+            icon=":material/warning:",
+        )
+
     # Display chat history
     display_chat_messages()
 
@@ -300,15 +417,33 @@ def main():
 
         # Generate assistant response
         with st.chat_message("assistant"):  # ,avatar=":material/smart_toy:"):
-            response_container = st.empty()
+            # ✅ Each block of the reply gets its own element: a finished block is rendered once,
+            # and only the block being streamed is re-rendered as deltas arrive
             response_lines = []
+            block, block_container = "", None
+            rendered_at = 0.0
 
-            for line in response_generator(
+            for kind, text in response_generator(
                 "user",
                 prompt
             ):
-                response_lines.append(line)
-                response_container.markdown("  \n\n".join(response_lines))
+                if kind == "delta" and block_container is not None:
+                    block += text
+                else:
+                    if block_container is not None:
+                        block_container.markdown(block)
+                        response_lines.append(block)
+                    block, block_container = text, st.empty()
+                    rendered_at = 0.0
+
+                # Re-render at most every STREAM_RENDER_INTERVAL seconds, not on every token
+                if time.monotonic() - rendered_at >= STREAM_RENDER_INTERVAL:
+                    block_container.markdown(block)
+                    rendered_at = time.monotonic()
+
+            if block_container is not None:
+                block_container.markdown(block)
+                response_lines.append(block)
 
             # Combine streamed response into a single string
             final_response = "  \n\n".join(response_lines)
@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+import streamlit as st
+
+# The modules are imported from the repository root, as `streamlit run` does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# The GitHub loaders read their token from the Streamlit secrets when they are imported;
+# outside of a deployment there is no secrets file, so the settings fall back to the environment
+try:
+    st.secrets["CISCO_GITHUB_TOKEN"]
+except Exception:
+    st.secrets = {"CISCO_GITHUB_TOKEN": ""}
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from Utilities.GetAuthToken import TokenManager
+
+
+class FakeTokenServer:
+    """A local token endpoint issuing numbered tokens; queued status codes are answered first."""
+
+    def __init__(self, expires_in: float = 3600, delay: float = 0.2):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.errors = []
+        self.issued = 0
+        self.lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+                with fake.lock:
+                    if fake.errors:
+                        self.send_response(fake.errors.pop(0))
+                        self.end_headers()
+                        return
+                    fake.issued += 1
+                    token = f"token-{fake.issued}"
+
+                # Slow token endpoint, so concurrent callers overlap
+                time.sleep(fake.delay)
+
+                body = json.dumps({"access_token": token, "expires_in": fake.expires_in}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/token"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def token_server():
+    server = FakeTokenServer()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def test_concurrent_callers_share_one_fetch(token_server):
+    manager = TokenManager("client", "secret", token_server.url, background_refresh=False)
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        tokens = set(executor.map(lambda _: manager.get_token(), range(20)))
+
+    assert tokens == {"token-1"}
+    assert manager.fetch_count == 1
+
+
+def test_token_is_refreshed_in_the_background(token_server):
+    token_server.expires_in = 15
+    # The refresh is scheduled max(1, expires_in - refresh_margin) = 1 second after the fetch
+    manager = TokenManager("client", "secret", token_server.url, refresh_margin=14.5)
+    try:
+        assert manager.get_token() == "token-1"
+
+        time.sleep(1.5)
+        started = time.monotonic()
+        token = manager.get_token()
+
+        assert token == "token-2"
+        assert manager.fetch_count == 2
+        # The caller was served the refreshed token without waiting for the endpoint
+        assert time.monotonic() - started < token_server.delay
+    finally:
+        manager.stop()
+
+
+def test_failed_fetches_are_retried(token_server):
+    token_server.errors = [503, 502]
+    manager = TokenManager("client", "secret", token_server.url, backoff=0.01, background_refresh=False)
+
+    assert manager.get_token() == "token-1"
+    assert manager.fetch_count == 3
+
+
+def test_client_errors_are_not_retried(token_server):
+    token_server.errors = [401]
+    manager = TokenManager("client", "secret", token_server.url, backoff=0.01, background_refresh=False)
+
+    assert manager.get_token() is None
+    assert manager.fetch_count == 1
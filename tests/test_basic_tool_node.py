@@ -0,0 +1,47 @@
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from Workflows.BasicToolNode import BasicToolNode
+from Workflows.ToolCache import ToolCache
+
+
+@tool
+def slow_tool(seconds: float) -> str:
+    """Sleeps for `seconds`."""
+    time.sleep(seconds)
+    return "done"
+
+
+def tool_calls(*seconds):
+    return {
+        "messages": [
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "slow_tool", "args": {"seconds": value}, "id": f"call_{index}"}
+                    for index, value in enumerate(seconds)
+                ],
+            )
+        ]
+    }
+
+
+def test_single_call_times_out():
+    node = BasicToolNode([slow_tool], tool_timeout=0.2, tool_cache=ToolCache())
+
+    started = time.monotonic()
+    messages = node(tool_calls(2))["messages"]
+
+    assert time.monotonic() - started < 1
+    assert "timed out" in messages[0].content
+
+
+def test_sequential_calls_time_out():
+    node = BasicToolNode([slow_tool], max_concurrency=1, tool_timeout=0.2, tool_cache=ToolCache())
+
+    messages = node(tool_calls(0, 2))["messages"]
+
+    assert messages[0].content == '"done"'
+    assert "timed out" in messages[1].content
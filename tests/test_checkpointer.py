@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+from langchain_core.messages import HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+
+from Workflows import Checkpointer
+from Workflows.BlobStore import BLOB_REF, BlobStore
+
+
+@pytest.fixture
+def blob_store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / "blobs"), grace_seconds=0)
+    monkeypatch.setattr(Checkpointer, "get_blob_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def saver():
+    saver = Checkpointer.BoundedSqliteSaver(sqlite3.connect(":memory:", check_same_thread=False), keep_per_thread=1)
+    saver.setup()
+    return saver
+
+
+def tool_output(store: BlobStore, content: str) -> ToolMessage:
+    ref = store.put(content)
+    return ToolMessage(content=f"[blob {ref}]", tool_call_id=ref[:8], additional_kwargs={BLOB_REF: ref})
+
+
+def put(saver, thread_id, messages, parent_id=None):
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": messages}
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": parent_id}}
+    return saver.put(config, checkpoint, {}, {})["configurable"]["checkpoint_id"]
+
+
+def test_blobs_are_deleted_with_their_last_checkpoint(saver, blob_store):
+    dropped = tool_output(blob_store, "dropped output " * 100)
+    kept = tool_output(blob_store, "kept output " * 100)
+
+    first = put(saver, "thread", [HumanMessage(content="hi"), dropped, kept])
+    # The next checkpoint no longer holds `dropped` (e.g. the history was trimmed), and the
+    # first one is pruned as only the newest checkpoint is kept
+    put(saver, "thread", [HumanMessage(content="hi"), kept, HumanMessage(content="again")], first)
+
+    assert blob_store.get(dropped.additional_kwargs[BLOB_REF]) is not None  # Still in memory
+    assert not blob_store._blob_file(dropped.additional_kwargs[BLOB_REF]).exists()
+    assert blob_store._blob_file(kept.additional_kwargs[BLOB_REF]).exists()
+
+
+def test_delete_thread_keeps_the_blobs_of_other_threads(saver, blob_store):
+    shared = tool_output(blob_store, "shared output " * 100)
+    own = tool_output(blob_store, "own output " * 100)
+
+    put(saver, "deleted", [HumanMessage(content="hi"), shared, own])
+    put(saver, "other", [HumanMessage(content="hi"), shared])
+    saver.delete_thread("deleted")
+
+    assert not blob_store._blob_file(own.additional_kwargs[BLOB_REF]).exists()
+    assert blob_store._blob_file(shared.additional_kwargs[BLOB_REF]).exists()
+
+
+def test_recent_blobs_are_kept_without_a_checkpoint(blob_store):
+    blob_store.grace_seconds = 60
+    pending = tool_output(blob_store, "pending output " * 100)
+
+    blob_store.sweep(live_refs=set())
+
+    assert blob_store._blob_file(pending.additional_kwargs[BLOB_REF]).exists()
+
+
+def chain_depth(saver, checkpoint_id):
+    with saver.cursor(transaction=False) as cur:
+        return cur.execute("SELECT depth FROM checkpoint_chain WHERE checkpoint_id = ?", (checkpoint_id,)).fetchone()[0]
+
+
+def test_appended_messages_are_stored_as_deltas():
+    saver = Checkpointer.BoundedSqliteSaver(sqlite3.connect(":memory:", check_same_thread=False))
+    saver.setup()
+    messages = [HumanMessage(content="hi", id="1")]
+
+    checkpoint_id = put(saver, "thread", list(messages))
+    for index in range(2, 5):
+        messages.append(HumanMessage(content=f"message {index}", id=str(index)))
+        checkpoint_id = put(saver, "thread", list(messages), checkpoint_id)
+
+    assert chain_depth(saver, checkpoint_id) == 3
+    # The head of the thread only keeps a fingerprint of the messages
+    assert not hasattr(saver._heads[("thread", "")], "messages")
+
+    restored = saver.get_tuple({"configurable": {"thread_id": "thread", "checkpoint_ns": ""}})
+    assert [message.content for message in restored.checkpoint["channel_values"]["messages"]] == [
+        "hi", "message 2", "message 3", "message 4"
+    ]
+
+
+def test_edited_messages_start_a_new_snapshot():
+    saver = Checkpointer.BoundedSqliteSaver(sqlite3.connect(":memory:", check_same_thread=False))
+    saver.setup()
+
+    first = put(saver, "thread", [HumanMessage(content="hi", id="1"), HumanMessage(content="draft", id="2")])
+    # Same ids, different content: the parent messages are no longer a prefix
+    second = put(saver, "thread", [HumanMessage(content="hi", id="1"), HumanMessage(content="final", id="2")], first)
+
+    assert chain_depth(saver, second) == 0
+    restored = saver.get_tuple({"configurable": {"thread_id": "thread", "checkpoint_ns": ""}})
+    assert restored.checkpoint["channel_values"]["messages"][1].content == "final"
@@ -0,0 +1,38 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from Workflows import BlobStore, ContextManager
+
+
+def conversation(tool_output: ToolMessage):
+    return [
+        HumanMessage(content="first"),
+        AIMessage(content="", tool_calls=[{"name": "get_class", "args": {"class_name": "ZCL_FOO"}, "id": "call_1"}]),
+        tool_output,
+        HumanMessage(content="second"),
+        HumanMessage(content="third"),
+    ]
+
+
+def test_compaction_never_writes_to_the_blob_store(monkeypatch):
+    store = BlobStore.BlobStore()
+    monkeypatch.setattr(ContextManager, "get_blob_store", lambda: store)
+    inline = ToolMessage(content="x" * 10000, name="get_class", tool_call_id="call_1")
+
+    prepared = ContextManager.ContextManager(tool_output_tokens=100, keep_turns=1).prepare(conversation(inline))
+
+    # An output kept inline has no recorded reference, so it is sent in full
+    assert prepared[2].content == inline.content
+    assert not store._blobs
+
+
+def test_blob_outputs_of_earlier_turns_are_replaced_by_their_reference(monkeypatch):
+    store = BlobStore.BlobStore()
+    monkeypatch.setattr(ContextManager, "get_blob_store", lambda: store)
+    monkeypatch.setattr(BlobStore, "get_blob_store", lambda: store)
+    stored = BlobStore.to_blob_message(ToolMessage(content="x" * 10000, name="get_class", tool_call_id="call_1"))
+    ref = stored.additional_kwargs[BlobStore.BLOB_REF]
+
+    prepared = ContextManager.ContextManager(tool_output_tokens=100, keep_turns=1).prepare(conversation(stored))
+
+    assert f"ref {ref}" in prepared[2].content
+    assert "class_name=ZCL_FOO" in prepared[2].content
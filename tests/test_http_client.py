@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from Utilities.GetHttpClient import PerLoopTransport
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connections stay in the pool between requests
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_is_usable_from_successive_event_loops(server_url):
+    client = httpx.AsyncClient(transport=PerLoopTransport(httpx.Limits(max_keepalive_connections=5)))
+
+    async def get():
+        response = await client.get(server_url)
+        return response.text
+
+    # Each run has its own loop; a pool bound to the first loop would fail on the second one
+    assert asyncio.run(get()) == "ok"
+    assert asyncio.run(get()) == "ok"
+
+
+def test_concurrent_loops_use_separate_pools(server_url):
+    transport = PerLoopTransport(httpx.Limits(max_keepalive_connections=5))
+    client = httpx.AsyncClient(transport=transport)
+
+    async def get():
+        response = await client.get(server_url)
+        return response.text
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(get()))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["ok"] * 4
@@ -0,0 +1,73 @@
+import pytest
+
+from Tools.GetTableSchema import format_schemas
+from Utilities import ODataClient as odata
+from Utilities.SchemaCache import SchemaCache
+
+
+class FakeService:
+    """Stands in for the TabFields service, answering with the current metadata etag."""
+
+    def __init__(self):
+        self.etag = "etag-1"
+        self.requests = []
+
+    def get_table_fields(self, table_names, field_names=None):
+        self.requests.append(list(table_names))
+        return {
+            "@odata.context": "$metadata#TabFields",
+            "@odata.metadataEtag": self.etag,
+            "value": [
+                {"tableName": table_name, "fieldname": f"{self.etag}-KEY", "keyflag": True}
+                for table_name in table_names
+            ],
+        }
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def make(etag_check_seconds):
+        cache = SchemaCache(etag_check_seconds=etag_check_seconds)
+        monkeypatch.setattr(odata, "get_schema_cache", lambda: cache)
+
+        client = odata.ODataClient("RHA", "user", "password")
+        client.service = FakeService()
+        monkeypatch.setattr(client, "get_table_fields", client.service.get_table_fields)
+        return client
+
+    return make
+
+
+def test_cached_schemas_are_served_until_the_etag_check_is_due(make_client):
+    client = make_client(etag_check_seconds=3600)
+
+    client.get_table_schemas(["MARA", "VBAK"])
+    client.get_table_schemas(["MARA", "VBAK"])
+
+    assert client.service.requests == [["MARA", "VBAK"]]
+
+
+def test_changed_etag_is_noticed_without_a_cache_miss(make_client):
+    client = make_client(etag_check_seconds=0)
+
+    client.get_table_schemas(["MARA", "VBAK"])
+    client.service.etag = "etag-2"
+    response = client.get_table_schemas(["MARA", "VBAK"])
+
+    # One table revalidates the etag, the other one is fetched again because it is stale
+    assert client.service.requests == [["MARA", "VBAK"], ["MARA"], ["VBAK"]]
+    assert {row["fieldname"] for row in response["value"]} == {"etag-2-KEY"}
+
+
+def test_compact_schemas_report_the_missing_tables():
+    response = {
+        "value": [
+            {"tableName": "MARA", "fieldname": "MATNR", "keyflag": True, "leng": "000040", "decimals": "000000"},
+        ]
+    }
+
+    tables = format_schemas(response, "compact", ["MARA", "ZDT_UNKNOWN"])
+
+    assert tables["MARA"]["fieldname"] == ["MATNR"]
+    assert tables["MARA"]["leng"] == [40]
+    assert tables["ZDT_UNKNOWN"] == "not found: ZDT_UNKNOWN"
@@ -0,0 +1,75 @@
+import subprocess
+
+from DocumentLoaders import RepoMirror
+from DocumentLoaders.LoadGithubFile import load_github_files
+from DocumentLoaders.RepoMirror import create_stand_in_repo, get_repo_mirror
+
+FILES = {
+    "zs4intcpq/zcl_foo.clas.abap": "CLASS zcl_foo DEFINITION PUBLIC.\nENDCLASS.\n",
+    "zs4intcpq/zif_bar.intf.abap": "INTERFACE zif_bar PUBLIC.\nENDINTERFACE.\n",
+    "zs4intcpq/empty.prog.abap": "",
+    "README.md": "Stand-in repository\n",
+}
+
+
+def use_mirror(monkeypatch, tmp_path, remote_url):
+    monkeypatch.setenv("GITHUB_MIRROR_ENABLED", "true")
+    monkeypatch.setenv("GITHUB_MIRROR_DIR", str(tmp_path / "mirrors"))
+    monkeypatch.setenv("GITHUB_MIRROR_URL", remote_url)
+    monkeypatch.setenv("GITHUB_MIRROR_SYNC_SECONDS", "0")
+    monkeypatch.setattr(RepoMirror, "_mirrors", {})
+
+
+def test_load_github_files_from_stand_in_repo(monkeypatch, tmp_path):
+    use_mirror(monkeypatch, tmp_path, create_stand_in_repo(str(tmp_path / "remote"), FILES))
+
+    documents = load_github_files(
+        "owner/repo", branch="main", file_filter=lambda path: path.endswith(".abap")
+    )
+
+    contents = {document.metadata["path"]: document.page_content for document in documents}
+    assert contents == {path: content for path, content in FILES.items() if path.endswith(".abap")}
+    assert all(len(document.metadata["sha"]) == 40 for document in documents)
+
+
+def test_branches_of_one_repo_share_the_fetch_lock(monkeypatch, tmp_path):
+    use_mirror(monkeypatch, tmp_path, create_stand_in_repo(str(tmp_path / "remote"), FILES))
+
+    main = get_repo_mirror("owner/repo", "main")
+    other = RepoMirror.RepoMirror("owner/repo", "dev", mirror_dir=str(tmp_path / "mirrors"))
+
+    assert main.git_dir == other.git_dir
+    assert main._sync_lock is other._sync_lock
+
+
+def test_failed_clone_falls_back_and_backs_off(monkeypatch, tmp_path):
+    use_mirror(monkeypatch, tmp_path, (tmp_path / "missing").as_uri())
+    monkeypatch.setenv("GITHUB_MIRROR_RETRY_SECONDS", "60")
+
+    assert get_repo_mirror("owner/repo", "main") is None
+
+    mirror = RepoMirror._mirrors[("owner/repo", "main")]
+    assert mirror._failures == 1
+
+    # Within the backoff the clone is not tried again
+    assert get_repo_mirror("owner/repo", "main") is None
+    assert mirror._failures == 1
+
+
+def test_reads_stay_on_the_snapshot_they_started_with(monkeypatch, tmp_path):
+    remote = tmp_path / "remote"
+    use_mirror(monkeypatch, tmp_path, create_stand_in_repo(str(remote), FILES))
+    mirror = get_repo_mirror("owner/repo", "main")
+    before = mirror._snapshot
+
+    # The remote drops a file and a sync switches the mirror to the new commit
+    subprocess.run(["git", "-C", str(remote), "rm", "--quiet", "README.md"], check=True)
+    subprocess.run(
+        ["git", "-C", str(remote), "-c", "user.name=t", "-c", "user.email=t@localhost", "commit", "--quiet", "-m", "rm"],
+        check=True,
+    )
+    assert mirror.sync()
+
+    assert mirror.load_file("README.md") is None
+    # A read that took the previous snapshot still sees its files
+    assert mirror._read(before, "README.md") == FILES["README.md"]